@@ -0,0 +1,97 @@
+# Ticks per second of every behavior tree in behavior_trees.yml, walking the node graph vs. running the compiled form.
+# Lives next to tstt_rl.py because the assets are resolved relative to the entry point.
+# With --profile, the compiled ticks are also profiled per node and the stats written to the given JSON file,
+# which py_roguelike_external_tools/behavior-tree-yml-to-mermaid.py can render.
+#
+# uv run python src/bench_behavior_trees.py [--profile bt_profile.json]
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from py_roguelike_tutorial import setup_game
+from py_roguelike_tutorial.behavior_trees.behavior_trees import (
+    BlackboardSpecialKey,
+    BtContext,
+    BtResult,
+)
+from py_roguelike_tutorial.behavior_trees.profiler import BtProfiler
+from py_roguelike_tutorial.components.ai import BehaviorTreeAI
+from py_roguelike_tutorial.entity import Actor
+from py_roguelike_tutorial.entity_factory import EntityPrefabs
+from py_roguelike_tutorial.main import load_data_files
+from py_roguelike_tutorial.screen_stack import ScreenStack
+from py_roguelike_tutorial.types import Coord
+
+TICKS = 2000
+AGENT_PREFAB = "orc_archer"
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--profile", help="write per-node stats of the compiled ticks here")
+args = parser.parse_args()
+
+load_data_files()
+engine = setup_game.new_game(ScreenStack())
+# keep the player alive no matter how often they get shot
+engine.player.health.max_hp = 10**9
+engine.player.health.hp = 10**9
+
+
+def free_position() -> Coord:
+    game_map = engine.game_map
+    for x, y in np.argwhere(game_map.tiles["walkable"]):
+        if not game_map.is_blocked(int(x), int(y)):
+            return int(x), int(y)
+    raise AssertionError("No free position on the map.")
+
+
+def spawn_agent(tree_id: str) -> Actor:
+    agent = EntityPrefabs.npcs[AGENT_PREFAB].spawn(engine.game_map, *free_position())
+    ai = agent.ai
+    assert isinstance(ai, BehaviorTreeAI)
+    ai.tree = EntityPrefabs.behavior_trees[tree_id]
+    ai.ctx = BtContext()
+    ai.visual_sense.blackboard = ai.ctx.blackboard
+    ai.ctx.bind(agent=agent, player=engine.player, engine=engine)
+    ai.ctx.blackboard.set(BlackboardSpecialKey.SpawnLocation.value, agent.pos)
+    engine.perception.refresh([agent])
+    return agent
+
+
+def ticks_per_second(tree_id: str, compiled: bool) -> float:
+    random.seed(0)
+    agent = spawn_agent(tree_id)
+    ai = agent.ai
+    assert isinstance(ai, BehaviorTreeAI)
+    tick = ai.tree.compiled if compiled else ai.tree.tick
+    ctx = ai.ctx
+
+    def safe_tick() -> BtResult | None:
+        try:
+            return tick(ctx)
+        except AssertionError:
+            return None
+
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        safe_tick()
+    elapsed = time.perf_counter() - start
+    engine.game_map.entities.discard(agent)
+    return TICKS / elapsed
+
+
+print(f"{'tree':<20} {'graph walk':>12} {'compiled':>12} {'speedup':>8}")
+for tree_id in EntityPrefabs.behavior_trees:
+    walked = ticks_per_second(tree_id, compiled=False)
+    compiled = ticks_per_second(tree_id, compiled=True)
+    print(f"{tree_id:<20} {walked:>12.0f} {compiled:>12.0f} {compiled / walked:>7.2f}x")
+
+if args.profile:
+    BtProfiler.enable()
+    for tree_id in EntityPrefabs.behavior_trees:
+        ticks_per_second(tree_id, compiled=True)
+    BtProfiler.disable()
+    BtProfiler.save(args.profile)
+    print(f"Wrote the per-node profile to {args.profile}")
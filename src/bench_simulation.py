@@ -0,0 +1,37 @@
+# Headless soak test: a bot plays the game without a window, and the turns per second are reported.
+# When the bot dies, a new game is started with the next seed, until all steps were played.
+# Lives next to tstt_rl.py because the assets are resolved relative to the entry point.
+#
+# uv run python src/bench_simulation.py [--steps 20000] [--seed 42]
+#     [--fov-workers 1] [--planning-workers 1]
+
+import argparse
+
+from py_roguelike_tutorial.constants import RNG_SEED
+from py_roguelike_tutorial.simulation import BotPlayer, Simulation, SimulationStats
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--steps", type=int, default=20_000)
+parser.add_argument("--seed", type=int, default=RNG_SEED)
+parser.add_argument("--fov-workers", type=int, default=1)
+parser.add_argument("--planning-workers", type=int, default=1)
+args = parser.parse_args()
+
+stats = SimulationStats()
+games = 0
+deepest_floor = 0
+while stats.turns + stats.refused < args.steps:
+    seed = args.seed + games
+    simulation = Simulation.new_game(BotPlayer(seed), seed=seed)
+    simulation.engine.perception.fov_workers = args.fov_workers
+    simulation.engine.planning_workers = args.planning_workers
+    stats += simulation.run(args.steps - stats.turns - stats.refused)
+    games += 1
+    deepest_floor = max(deepest_floor, simulation.engine.game_world.current_floor)
+
+print(f"turns:         {stats.turns}")
+print(f"refused:       {stats.refused}")
+print(f"npc actions:   {stats.npc_actions}")
+print(f"games:         {games}")
+print(f"deepest floor: {deepest_floor}")
+print(f"turns/second:  {stats.turns_per_second:.0f}")
@@ -1,23 +1,76 @@
-import yaml
+"""Exports a behavior tree from behavior_trees.yml as a Mermaid graph.
+With a profile written by BtProfiler.save(), e.g. from `src/bench_behavior_trees.py --profile bt_profile.json`,
+every node is annotated with its calls, results and time, and colored from cold (blue) to hot (red) by time.
+
+uv run python src/py_roguelike_external_tools/behavior-tree-yml-to-mermaid.py melee_attacker --profile bt_profile.json
+"""
 
+import argparse
+import json
+
+import yaml
 
 filename = "src/assets/data/experiments/behavior_trees.yml"
-out_filename = "behavior_tree.mermaid"
+
+parser = argparse.ArgumentParser(
+    description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+)
+parser.add_argument("tree_id", nargs="?", default="melee_attacker")
+parser.add_argument("--profile", help="JSON file written by BtProfiler.save()")
+parser.add_argument("--out", default="behavior_tree.mermaid")
+args = parser.parse_args()
 
 with open(filename) as file:
     data = yaml.safe_load(file.read())
 
-bt = data["melee_attacker"]["root"]
+if args.tree_id not in data:
+    parser.error(f"Unknown tree id {args.tree_id}. Known: {', '.join(data)}")
+bt = data[args.tree_id]["root"]
+
+profile: dict[str, dict] = {}
+if args.profile:
+    with open(args.profile) as file:
+        profile = json.load(file).get(args.tree_id, {})
+max_seconds = max((stats["seconds"] for stats in profile.values()), default=0.0)
+
 
+def heat_color(seconds: float) -> str:
+    """Linear blend from blue (no time) to red (the slowest node of the tree)."""
+    heat = seconds / max_seconds if max_seconds > 0 else 0.0
+    red, blue = int(80 + 175 * heat), int(255 - 175 * heat)
+    return f"#{red:02x}50{blue:02x}"
 
-def draw_tree(tree: dict, start_index: int, subtree_root: str | None) -> list[str]:
+
+def describe_stats(stats: dict) -> str:
+    calls = stats["calls"]
+    results = " ".join(
+        f"{result[0]}:{count}" for result, count in sorted(stats["results"].items())
+    )
+    per_call_us = stats["seconds"] / calls * 1e6 if calls else 0.0
+    return (
+        f"<br/>calls: {calls} | {results}"
+        f"<br/>{stats['seconds'] * 1000:.2f} ms total, {per_call_us:.1f} µs/call"
+    )
+
+
+def draw_tree(
+    tree: dict, start_index: int, subtree_root: str | None, styles: list[str]
+) -> list[str]:
     maybe_comment = f"<br/>{tree.get('comment')}" if tree.get("comment") else ""
     maybe_params = (
         f"<br/>{'<br/>'.join((f"{param[0]}: {param[1]}" for param in tree.get('params', {}).items()))}"
         if tree.get("params")
         else ""
     )
-    current_node = f"{start_index}[{tree['type']}<br/>{maybe_comment}{maybe_params}]"
+    stats = profile.get(str(start_index))
+    maybe_stats = describe_stats(stats) if stats else ""
+    if stats:
+        styles.append(
+            f"style {start_index} fill:{heat_color(stats['seconds'])},color:#fff"
+        )
+    current_node = (
+        f'{start_index}["{tree['type']}<br/>{maybe_comment}{maybe_params}{maybe_stats}"]'
+    )
     res: list[str] = (
         [f"{subtree_root} --> {current_node}"]
         if subtree_root is not None
@@ -26,19 +79,20 @@ def draw_tree(tree: dict, start_index: int, subtree_root: str | None) -> list[st
     j = start_index + 1
     if "children" in tree:
         for child_tree in tree["children"]:
-            drawn_subtree = draw_tree(child_tree, j, current_node)
+            drawn_subtree = draw_tree(child_tree, j, current_node, styles)
             res += drawn_subtree
             j += len(drawn_subtree)
     return res
 
 
-with open(out_filename, "w") as outfile:
-    header = """---
-title: Behavior Tree 
+with open(args.out, "w") as outfile:
+    header = f"""---
+title: Behavior Tree {args.tree_id}
 ---
 graph TB"""
-    drawn_tree = draw_tree(bt, 0, None)
-    drawn_tree_indented = [f"    {s}" for s in drawn_tree]
+    styles: list[str] = []
+    drawn_tree = draw_tree(bt, 0, None, styles)
+    drawn_tree_indented = [f"    {s}" for s in (*drawn_tree, *styles)]
 
     contents = "\n".join((header, *drawn_tree_indented))
     outfile.write(contents)
@@ -0,0 +1,58 @@
+"""Compares computing many NPC FOVs in a serial loop with the threaded batch API.
+
+uv run python src/py_roguelike_external_tools/benchmark-batch-fov.py
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from py_roguelike_tutorial.fov import compute_local_fov, compute_local_fov_batch
+
+MAP_WIDTH, MAP_HEIGHT = 400, 400
+NUM_ORIGINS = 500
+RADII = (8, 20, 40)
+REPETITIONS = 5
+
+rng = np.random.default_rng(42)
+transparency = rng.random((MAP_WIDTH, MAP_HEIGHT)) > 0.2
+origins = [
+    (int(x), int(y))
+    for x, y in zip(
+        rng.integers(0, MAP_WIDTH, NUM_ORIGINS),
+        rng.integers(0, MAP_HEIGHT, NUM_ORIGINS),
+    )
+]
+
+
+def best_of(fn) -> float:
+    timings = []
+    for _ in range(REPETITIONS):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+max_workers = os.cpu_count() or 1
+worker_counts = sorted({n for n in (1, 2, 4, 8) if n <= max_workers} | {max_workers})
+
+print(f"{NUM_ORIGINS} origins on a {MAP_WIDTH}x{MAP_HEIGHT} map, {max_workers} cores")
+for radius in RADII:
+    serial = best_of(
+        lambda: [compute_local_fov(transparency, pov, radius) for pov in origins]
+    )
+    print(f"radius {radius:>3}: serial loop {serial * 1000:8.2f} ms")
+    for workers in worker_counts:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            batched = best_of(
+                lambda: compute_local_fov_batch(
+                    transparency, origins, radius, executor=executor, workers=workers
+                )
+            )
+        print(
+            f"            {workers:>2} workers {batched * 1000:8.2f} ms"
+            f"  speedup x{serial / batched:.2f}"
+        )
@@ -1,22 +1,51 @@
 from __future__ import annotations
 
 import sys
+from enum import StrEnum
 from typing import TYPE_CHECKING, Callable
 
-from py_roguelike_tutorial import exceptions
 from py_roguelike_tutorial.constants import Theme
 from py_roguelike_tutorial.entity import Prop
-from py_roguelike_tutorial.events.events import RangedAttackEvent, TalkEvent
+from py_roguelike_tutorial.events.events import (
+    NoiseEvent,
+    RangedAttackEvent,
+    TalkEvent,
+)
 from py_roguelike_tutorial.exceptions import Impossible
 from py_roguelike_tutorial.types import Coord
 
+COMBAT_NOISE_RADIUS = 6
+
 if TYPE_CHECKING:
     from py_roguelike_tutorial.engine import Engine
     from py_roguelike_tutorial.entity import Entity, Actor, Item
 
 
+class Refusal(StrEnum):
+    """Why an action cannot be performed. The values are the messages for the player,
+    formatted with the refused action."""
+
+    NothingToAttack = "Nothing to attack."
+    Blocked = "The way is blocked."
+    NoRangedWeapon = (
+        "{action.entity.name} does not have know how to use a bow and arrows."
+    )
+    NoArrows = "{action.entity.name} does not have any arrows to shoot."
+    NotInterested = "{action.target.name} doesn't seem interested in talking."
+    NothingToPickUp = "There is nothing here to pick up."
+    InventoryFull = "Your backpack is full."
+    NoStairs = "There are no stairs here."
+    FullHealth = "You are at full health already."
+    NoEnemyInRange = "No enemy is close enough to strike."
+    NoTargetsInRadius = "There are no targets in the radius."
+
+    def message(self, action: Action) -> str:
+        return self.value.format(action=action)
+
+
 class Action:
-    """Command pattern. Named Action to stick with the tutorial notion."""
+    """Command pattern. Named Action to stick with the tutorial notion.
+    Subclasses implement `execute`, and `validate` if the action may be impossible."""
 
     def __init__(self, entity: Actor):
         self.entity = entity
@@ -26,16 +55,41 @@ class Action:
         return self.entity.parent.engine
 
     def perform(self) -> None:
-        raise NotImplementedError("subclasses must implement perform")
+        """Carries out the action, or raises Impossible with a message for the player."""
+        refusal = self.try_perform()
+        if refusal is not None:
+            raise Impossible(refusal.message(self))
+
+    def try_perform(self) -> Refusal | None:
+        """Carries out the action if it is valid, otherwise returns why not. For AI code, which has no use for messages."""
+        refusal = self.validate()
+        if refusal is None:
+            self.execute()
+        return refusal
+
+    def validate(self) -> Refusal | None:
+        """Why the action cannot be performed in the current state of the world, None if it can.
+        Does not change the world, so it is safe to call while agents are planning."""
+        return None
+
+    def can_perform(self) -> bool:
+        return self.validate() is None
+
+    def execute(self) -> None:
+        """Carries out the action, which was found to be valid."""
+        raise NotImplementedError("subclasses must implement execute")
+
+    def make_noise(self, pos: Coord, radius: int = COMBAT_NOISE_RADIUS) -> None:
+        self.engine.event_bus.publish(NoiseEvent(type="noise", pos=pos, radius=radius))
 
 
 class WaitAction(Action):
-    def perform(self) -> None:
+    def execute(self) -> None:
         pass
 
 
 class EscapeAction(Action):
-    def perform(self) -> None:
+    def execute(self) -> None:
         sys.exit()
 
 
@@ -69,11 +123,14 @@ class DirectedAction(Action):
 
 
 class MeleeAction(DirectedAction):
-    def perform(self) -> None:
-        target = self.target_actor
-        if not target:
-            raise exceptions.Impossible("Nothing to attack.")
+    def validate(self) -> Refusal | None:
+        if not self.target_actor:
+            return Refusal.NothingToAttack
+        return None
 
+    def execute(self) -> None:
+        target = self.target_actor
+        assert target is not None
         damage = self.entity.fighter.power - target.fighter.defense
 
         attack_desc = f"{self.entity.name} hits {target.name}"
@@ -88,17 +145,19 @@ class MeleeAction(DirectedAction):
         else:
             txt = f"{attack_desc} but does no damage."
             self.engine.message_log.add(txt, fg=log_color)
+        self.make_noise(target.pos)
 
 
 class RangedAttackAction(Action):
-    def perform(self) -> None:
+    def validate(self) -> Refusal | None:
         if self.entity.ranged is None:
-            raise Impossible(
-                f"{self.entity.name} does not have know how to use a bow and arrows."
-            )
+            return Refusal.NoRangedWeapon
         if not self.entity.inventory.has_by_tag("kind:arrow"):
-            raise Impossible(f"{self.entity.name} does not have any arrows to shoot.")
+            return Refusal.NoArrows
+        return None
 
+    def execute(self) -> None:
+        assert self.entity.ranged is not None
         target = self.engine.player
         damage = self.entity.ranged.power - target.fighter.defense
         target.health.take_damage(damage)
@@ -116,6 +175,7 @@ class RangedAttackAction(Action):
                 attacker_pos=self.entity.pos,
             )
         )
+        self.make_noise(self.entity.pos)
 
 
 class MoveAction(DirectedAction):
@@ -124,14 +184,18 @@ class MoveAction(DirectedAction):
         """The destination coordinates."""
         return self.entity.test_move(self.dx, self.dy)
 
-    def perform(self) -> None:
+    def validate(self) -> Refusal | None:
         dest_x, dest_y = self.dest_xy
-        if not self.engine.game_map.in_bounds(dest_x, dest_y):
-            raise exceptions.Impossible("The way is blocked.")
-        if not self.engine.game_map.tiles["walkable"][dest_x, dest_y]:
-            raise exceptions.Impossible("The way is blocked.")
-        if self.engine.game_map.get_blocking_entity_at(dest_x, dest_y):
-            raise exceptions.Impossible("The way is blocked.")
+        game_map = self.engine.game_map
+        if not game_map.in_bounds(dest_x, dest_y):
+            return Refusal.Blocked
+        if not game_map.tiles["walkable"][dest_x, dest_y]:
+            return Refusal.Blocked
+        if game_map.get_blocking_entity_at(dest_x, dest_y):
+            return Refusal.Blocked
+        return None
+
+    def execute(self) -> None:
         self.entity.move(self.dx, self.dy)
 
 
@@ -140,11 +204,12 @@ class TalkAction(Action):
         super().__init__(entity)
         self.target = target
 
-    def perform(self) -> None:
+    def validate(self) -> Refusal | None:
         if "attitude:friendly" not in self.target.tags:
-            raise exceptions.Impossible(
-                f"{self.target.name} doesn't seem interested in talking."
-            )
+            return Refusal.NotInterested
+        return None
+
+    def execute(self) -> None:
         self.engine.event_bus.publish(
             TalkEvent(
                 type="talk",
@@ -155,14 +220,34 @@ class TalkAction(Action):
 
 
 class BumpAction(DirectedAction):
-    def perform(self) -> None:
+    def resolve(self) -> Action | None:
+        """The action the bump amounts to. None for props, which are interacted with instead."""
         if isinstance(self.blocking_entity, Prop):
-            return self.blocking_entity.interactable.interact(self.entity)
+            return None
         if self.target_actor:
             if "attitude:friendly" in self.target_actor.tags:
-                return TalkAction(self.entity, self.target_actor).perform()
-            return MeleeAction(self.entity, self.dx, self.dy).perform()
-        return MoveAction(self.entity, self.dx, self.dy).perform()
+                return TalkAction(self.entity, self.target_actor)
+            return MeleeAction(self.entity, self.dx, self.dy)
+        return MoveAction(self.entity, self.dx, self.dy)
+
+    def perform(self) -> None:
+        # the resolved action words its own refusals
+        action = self.resolve()
+        if action is None:
+            return self.execute()
+        action.perform()
+
+    def validate(self) -> Refusal | None:
+        action = self.resolve()
+        return action.validate() if action else None
+
+    def execute(self) -> None:
+        action = self.resolve()
+        if action is None:
+            prop = self.blocking_entity
+            assert isinstance(prop, Prop)
+            return prop.interactable.interact(self.entity)
+        action.execute()
 
 
 class ItemAction(Action):
@@ -175,7 +260,12 @@ class ItemAction(Action):
     def target_actor(self) -> Actor | None:
         return self.engine.game_map.get_actor_at_location(*self.target_xy)
 
-    def perform(self) -> None:
+    def validate(self) -> Refusal | None:
+        if self.item.consumable:
+            return self.item.consumable.validate(self)
+        return None
+
+    def execute(self) -> None:
         if self.item.consumable:
             self.item.consumable.activate(self)
         elif self.item.equippable:
@@ -189,15 +279,18 @@ class PickupAction(Action):
     def target_item(self) -> Item | None:
         return self.engine.game_map.get_item_at_location(*self.entity.pos)
 
-    def perform(self) -> None:
-        item = self.target_item
-        if not item:
-            raise exceptions.Impossible("There is nothing here to pick up.")
+    def validate(self) -> Refusal | None:
+        if not self.target_item:
+            return Refusal.NothingToPickUp
         if not self.entity.inventory.has_capacity(1):
-            raise exceptions.Impossible("Your backpack is full.")
+            return Refusal.InventoryFull
+        return None
 
+    def execute(self) -> None:
+        item = self.target_item
+        assert item is not None
         self.entity.inventory.add(item)
-        self.engine.game_map.entities.remove(item)
+        self.engine.game_map.remove_entity(item)
 
         quantity = f" x{item.quantity}" if item.quantity > 1 else ""
 
@@ -206,17 +299,25 @@ class PickupAction(Action):
 
 
 class DropItemAction(ItemAction):
-    def perform(self):
+    def validate(self) -> Refusal | None:
+        # dropping works whether or not using the item would have an effect
+        return None
+
+    def execute(self):
         if self.entity.equipment.is_equipped(self.item):
             self.entity.equipment.toggle_equippable(self.item)
         self.entity.inventory.drop(self.item)
 
 
 class TakeStairsAction(Action):
-    def perform(self) -> None:
-        """Take the stairs, if any exist at the entity's location."""
+    """Take the stairs, if any exist at the entity's location."""
+
+    def validate(self) -> Refusal | None:
         if self.entity.pos != self.engine.game_map.downstairs_location:
-            raise Impossible("There are no stairs here.")
+            return Refusal.NoStairs
+        return None
+
+    def execute(self) -> None:
         self.engine.game_world.generate_floor()
         self.engine.message_log.add("You descend the staircase.", fg=Theme.descend)
 
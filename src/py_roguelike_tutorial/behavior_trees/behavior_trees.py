@@ -1,13 +1,26 @@
 from __future__ import annotations
 
 import abc
+import threading
+from collections import Counter
 from enum import StrEnum
-from typing import TYPE_CHECKING, Any, Generic, NamedTuple, TypeVar
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Generic,
+    Hashable,
+    Iterable,
+    NamedTuple,
+    TypeVar,
+)
 
 from py_roguelike_tutorial.behavior_trees.blackboard import (
     Blackboard,
+    BlackboardRef,
     BlackboardSpecialKey,
 )
+from py_roguelike_tutorial.behavior_trees.profiler import BtProfiler
 
 if TYPE_CHECKING:
     from py_roguelike_tutorial.engine import Engine
@@ -17,13 +30,21 @@ __all__ = [
     "BtResult",
     "Blackboard",
     "BtConstructorArgs",
+    "BtContext",
+    "Dependency",
+    "union_dependencies",
     "BtNode",
+    "CompiledTick",
+    "compile_node",
     "BtRoot",
     "BtSequence",
+    "BtMemorySequence",
     "BtSelector",
+    "BtMemorySelector",
     "BtParallel",
     "BtAction",
     "BtCondition",
+    "MemoStats",
     "BtInverter",
     "BtDecorator",
     "BtForceFailure",
@@ -40,6 +61,8 @@ class BtResult(StrEnum):
 
 INF = 999999  # for our purposes this is unreachably high
 
+type CompiledTick = Callable[[BtContext], BtResult]
+
 
 T = TypeVar("T")
 
@@ -49,10 +72,85 @@ class BtConstructorArgs(Generic[T], NamedTuple):
     params: T
 
 
+class Dependency(NamedTuple):
+    """Something the result of a condition depends on, e.g. the agent's health or a blackboard key.
+    `read` returns its current value. Values are compared by identity unless they are plain values
+    like numbers, strings or tuples of those, so entities are never compared field by field.
+    """
+
+    key: Hashable
+    read: Callable[[BtContext], Any]
+
+
+def union_dependencies(nodes: Iterable[BtNode]) -> tuple[Dependency, ...] | None:
+    """All dependencies of the given nodes, or None if any of them is not reactive."""
+    union: dict[Hashable, Dependency] = {}
+    for node in nodes:
+        dependencies = node.dependencies()
+        if dependencies is None:
+            return None
+        union.update((dependency.key, dependency) for dependency in dependencies)
+    return tuple(union.values())
+
+
+_PLAIN_VALUES = (int, float, str, tuple, frozenset, type(None))
+
+
+def _unchanged_since(
+    before: list[Any], reads: tuple[Callable[[BtContext], Any], ...], ctx: BtContext
+) -> bool:
+    """Reads the dependencies one by one, stopping at the first that changed."""
+    for old, read in zip(before, reads):
+        new = read(ctx)
+        if old is new:
+            continue
+        if type(old) is not type(new) or not isinstance(old, _PLAIN_VALUES):
+            return False
+        if old != new:
+            return False
+    return True
+
+
+class BtContext:
+    """Everything about a behavior tree that belongs to a single agent.
+    The nodes themselves are immutable and shared by all agents using the same tree,
+    so every tick gets the agent's context passed in."""
+
+    def __init__(self, blackboard: Blackboard | None = None):
+        self.blackboard = blackboard if blackboard is not None else Blackboard()
+        self.running: dict[BtNode, int] = {}
+        """Index of the child that returned Running on the previous tick, by composite node."""
+        self.node_state: dict[BtNode, Any] = {}
+        """Whatever stateful nodes keep between ticks, e.g. the path of a multi-turn move."""
+        self.memo: dict[Hashable, BtResult] = {}
+        """Results of the conditions evaluated since the tick started or the last action ran, see BtCondition."""
+        self.observed: dict[BtNode, tuple[int, BtResult | None, list[Any]]] = {}
+        """What reactive composites saw on their last tick, see `_compile_composite`."""
+        self.intents: list[Any] | None = None
+        """While planning, actions are collected here instead of being performed."""
+        self.intent_writes: list[int] = []
+        """For every intent, how many blackboard writes the plan had made before it, see Blackboard.undo_log."""
+        self.agent: Actor = None  # type: ignore[reportAttributeAccessIssue]
+        self.player: Actor = None  # type: ignore[reportAttributeAccessIssue]
+        self.engine: Engine = None  # type: ignore[reportAttributeAccessIssue]
+
+    def bind(self, *, agent: Actor, player: Actor, engine: Engine) -> None:
+        self.agent, self.player, self.engine = agent, player, engine
+        self.blackboard.bind(agent=agent, player=player, engine=engine)
+
+    def reset(self) -> None:
+        """Forget the running state of the whole tree. The blackboard is kept."""
+        self.running.clear()
+        self.node_state.clear()
+        self.observed.clear()
+
+
 class BtNode(abc.ABC):
-    # we are injecting blackboard after creating the tree, and propagate it to all children.
-    # The alternative of having blackboard in every single node constructor was too boilerplatey
-    _blackboard: Blackboard
+    """Nodes are shared by all agents using the tree, so they must not change after construction.
+    Per-agent state belongs into the BtContext passed to tick()."""
+
+    profile_key: tuple[str, int] | None = None
+    """Id of the tree that defines this node and the node's pre-order index in it, see BtProfiler."""
 
     def __init__(
         self,
@@ -67,91 +165,253 @@ class BtNode(abc.ABC):
                 f" num children: {len(self.children)}, max children: {self.max_children}"
             )
 
+    def __deepcopy__(self, memo: dict) -> BtNode:
+        # copying an entity must not clone the tree it shares with all other entities of its kind
+        return self
+
     @property
     def class_name(self):
         return type(self).__name__
 
-    @property
-    def blackboard(self) -> Blackboard:
-        return self._blackboard
+    @abc.abstractmethod
+    def tick(self, ctx: BtContext) -> BtResult:
+        pass
 
-    @blackboard.setter
-    def blackboard(self, val: Blackboard) -> None:
-        self._blackboard = val
+    def compile(self) -> CompiledTick:
+        """Turn this node and its children into a closure with the same semantics as tick(),
+        but without walking the node graph. Leaf nodes compile to their bound tick method.
+        """
+        return self.tick
+
+    def dependencies(self) -> tuple[Dependency, ...] | None:
+        """What the result of this node depends on, if it is reactive, i.e. free of side effects,
+        never Running, and with a result that only changes when one of the dependencies does.
+        None means the node must be ticked every time, which is the default."""
+        return None
+
+    def reset(self, ctx: BtContext) -> None:
+        """Forget any running state of this node and its descendants, so the next tick starts fresh.
+        Called on a child that was running but is no longer reached, on memory composites once they finish,
+        and on the whole tree when an exception escapes it."""
+        ctx.running.pop(self, None)
+        ctx.node_state.pop(self, None)
         for child in self.children:
-            child.blackboard = self._blackboard
+            child.reset(ctx)
+
+    def track_running(self, ctx: BtContext, index: int, result: BtResult) -> BtResult:
+        """Remember which child is running. A child that was running on the previous tick
+        but did not produce this tick's result gets aborted, i.e. reset."""
+        running = ctx.running
+        previous = running.get(self)
+        if previous is not None and previous != index:
+            self.children[previous].reset(ctx)
+        if result is BtResult.Running:
+            running[self] = index
+        elif previous is not None:
+            del running[self]
+        return result
+
+    def maybe_read_blackboard(self, ctx: BtContext, input: Any) -> tuple[Any, bool]:
+        """Reads params that were resolved with `resolve_param`."""
+        if isinstance(input, BlackboardRef):
+            return ctx.blackboard.get_slot(input.slot), True
+        return input, False
 
-    @property
-    def agent(self) -> Actor:
-        key = BlackboardSpecialKey.Agent
-        return self.blackboard.get(key)  # type: ignore[reportReturnType]
+    def remove_from_blackboard(self, ctx: BtContext, input: BlackboardRef) -> None:
+        ctx.blackboard.remove_slot(input.slot)
 
-    @property
-    def player(self) -> Actor:
-        key = BlackboardSpecialKey.Player
-        return self.blackboard.get(key)  # type: ignore[reportReturnType]
 
-    @property
-    def engine(self) -> Engine:
-        key = BlackboardSpecialKey.Engine
-        return self.blackboard.get(key)  # type: ignore[reportReturnType]
+def compile_node(node: BtNode) -> CompiledTick:
+    """Compiles a node, instrumented if the profiler is enabled.
+    Composites compile their children with this instead of calling compile() directly.
+    """
+    tick = node.compile()
+    if BtProfiler.enabled:
+        return BtProfiler.instrument(node, tick)
+    return tick
 
-    @abc.abstractmethod
-    def tick(self) -> BtResult:
-        pass
 
-    def maybe_read_blackboard(self, input: Any) -> tuple[Any, bool]:
-        if isinstance(input, str) and input.startswith("$"):
-            return self.blackboard.get(input[1:]), True
-        return input, False
+def _compile_composite(node: BtNode, memory: bool, proceed: BtResult) -> CompiledTick:
+    """Sequences proceed to the next child on Success, selectors on Failure.
 
-    def remove_from_blackboard(self, input: Any) -> None:
-        self.blackboard.remove(input[1:])
+    Children at the front that are reactive act as guards: as long as none of their dependencies changed,
+    their results from the last tick still hold, so they are not ticked again.
+    If a guard decided the result, that result is returned right away.
+    If all guards passed, the tick continues at the first non-reactive child, e.g. the running action.
+    A changed dependency re-evaluates the guards, which aborts the running child if one of them no longer passes.
+    """
+    children = tuple(compile_node(child) for child in node.children)
+    last = len(children) - 1
+    guards: list[tuple[Callable[[BtContext], Any], ...]] = []
+    if not memory:
+        for i in range(len(children)):
+            dependencies = union_dependencies(node.children[: i + 1])
+            if dependencies is None:
+                break
+            guards.append(tuple(dependency.read for dependency in dependencies))
+
+    track_running, running_result = node.track_running, BtResult.Running
+
+    if not guards:
+
+        def tick(ctx: BtContext) -> BtResult:
+            running = ctx.running
+            start = running.get(node, 0) if memory else 0
+            for i in range(start, last + 1):
+                child_res = children[i](ctx)
+                if child_res is not proceed:
+                    if child_res is running_result or node in running:
+                        return track_running(ctx, i, child_res)
+                    return child_res
+            return track_running(ctx, last, proceed)
+
+        return tick
+
+    first_active = len(guards)  # index of the first child that is not a guard
+
+    def read(index: int, ctx: BtContext) -> list[Any]:
+        return [read_dependency(ctx) for read_dependency in guards[index]]
+
+    def reactive_tick(ctx: BtContext) -> BtResult:
+        start = 0
+        passed: list[Any] | None = None
+        observed = ctx.observed.get(node)
+        if observed is not None:
+            index, result, before = observed
+            reads = guards[index if result is not None else first_active - 1]
+            if _unchanged_since(before, reads, ctx):
+                if result is not None:
+                    if result is running_result or node in ctx.running:
+                        return track_running(ctx, index, result)
+                    return result
+                start, passed = first_active, before
+        for i in range(start, last + 1):
+            if i == first_active and passed is None:
+                passed = read(first_active - 1, ctx)
+            child_res = children[i](ctx)
+            if child_res is not proceed or i == last:
+                if i < first_active:
+                    ctx.observed[node] = (i, child_res, read(i, ctx))
+                else:
+                    ctx.observed[node] = (first_active, None, passed or [])
+                return node.track_running(ctx, i, child_res)
+        raise AssertionError("unreachable, the last child always decides")
+
+    return reactive_tick
 
 
-class BtRoot(BtNode):
+class BtSequence(BtNode):
+    """Composite node that is basically a logical AND, executing its children serially in order, returning Success if all succeed,
+    or stopping execution once the first child fails or is still running."""
+
+    memory: bool = False
+    """Whether to resume at the running child instead of starting over from the first child."""
+
     def __init__(self, args: BtConstructorArgs):
         super().__init__(children=args.children)
 
-    def tick(self):
-        for child in self.children:
-            child_res = child.tick()
+    def tick(self, ctx: BtContext):
+        start = ctx.running.get(self, 0) if self.memory else 0
+        for i in range(start, len(self.children)):
+            child_res = self.children[i].tick(ctx)
             if child_res == BtResult.Failure or child_res == BtResult.Running:
-                return child_res
-        return BtResult.Success
+                return self.track_running(ctx, i, child_res)
+        return self.track_running(ctx, len(self.children) - 1, BtResult.Success)
 
+    def compile(self) -> CompiledTick:
+        return _compile_composite(self, self.memory, proceed=BtResult.Success)
 
-class BtSequence(BtNode):
-    """Composite node that is basically a logical AND, executing its children serially in order, returning Success if all succeed,
-    or stopping execution once the first child fails."""
+    def dependencies(self) -> tuple[Dependency, ...] | None:
+        return None if self.memory else union_dependencies(self.children)
 
-    def __init__(self, args: BtConstructorArgs):
-        super().__init__(children=args.children)
 
-    def tick(self):
-        for child in self.children:
-            child_res = child.tick()
-            if child_res == BtResult.Failure or child_res == BtResult.Running:
-                return child_res
-        return BtResult.Success
+class BtMemorySequence(BtSequence):
+    """Sequence that remembers its running child and resumes there on the next tick,
+    skipping the children before it, e.g. the conditions that started a multi-turn plan.
+    It starts over from the first child once it succeeded or failed, or when it gets reset.
+    """
+
+    memory = True
+
+
+class BtRoot(BtSequence):
+    _compiled: CompiledTick | None = None
+    _compiled_generation: int = -1
+
+    @property
+    def compiled(self) -> CompiledTick:
+        """The compiled form of the whole tree, created on first use and shared by all agents.
+        Each call is a new tick, so it starts with an empty condition memo."""
+        compiled = self._compiled
+        if compiled is None or self._compiled_generation != BtProfiler.generation:
+            with _compile_lock:
+                # another planning thread may have compiled the tree while this one waited
+                compiled, generation = self._compiled, BtProfiler.generation
+                if compiled is None or self._compiled_generation != generation:
+                    compiled = self._compiled = self._compile()
+                    self._compiled_generation = generation
+        return compiled
+
+    def _compile(self) -> CompiledTick:
+        global _memoized_keys
+        keys = Counter(_memo_keys(self))
+        _memoized_keys = frozenset(key for key, count in keys.items() if count > 1)
+        try:
+            tree = compile_node(self)
+        finally:
+            memoizing, _memoized_keys = bool(_memoized_keys), frozenset()
+        if not memoizing:
+            return tree
+
+        def tick(ctx: BtContext) -> BtResult:
+            ctx.memo.clear()
+            return tree(ctx)
+
+        return tick
+
+    def __getstate__(self):
+        # closures cannot be pickled, so loaded save files recompile
+        state = self.__dict__.copy()
+        state.pop("_compiled", None)
+        return state
 
 
 class BtSelector(BtNode):
-    """Aka Fallback. Composite node that executes its children in order, until one returns Success. Otherwise executes the next one.
+    """Aka Fallback. Composite node that executes its children in order, until one returns Success or Running.
+    Otherwise executes the next one.
     This is also the node to implement _explicit success conditions_,
     i.e. before each action check whether the world is already in the desired state,
     for example, before going to a location check whether you are already at that location.
     """
 
+    memory: bool = False
+    """Whether to resume at the running child instead of starting over from the first child."""
+
     def __init__(self, args: BtConstructorArgs):
         super().__init__(children=args.children)
 
-    def tick(self):
-        for child in self.children:
-            child_res = child.tick()
-            if child_res == BtResult.Success:
-                return BtResult.Success
-        return BtResult.Failure
+    def tick(self, ctx: BtContext):
+        start = ctx.running.get(self, 0) if self.memory else 0
+        for i in range(start, len(self.children)):
+            child_res = self.children[i].tick(ctx)
+            if child_res == BtResult.Success or child_res == BtResult.Running:
+                return self.track_running(ctx, i, child_res)
+        return self.track_running(ctx, len(self.children) - 1, BtResult.Failure)
+
+    def compile(self) -> CompiledTick:
+        return _compile_composite(self, self.memory, proceed=BtResult.Failure)
+
+    def dependencies(self) -> tuple[Dependency, ...] | None:
+        return None if self.memory else union_dependencies(self.children)
+
+
+class BtMemorySelector(BtSelector):
+    """Selector that remembers its running child and resumes there on the next tick,
+    without re-trying the higher-priority children before it.
+    It starts over from the first child once it succeeded or failed, or when it gets reset.
+    """
+
+    memory = True
 
 
 class BtParallel(BtNode):
@@ -162,14 +422,30 @@ class BtParallel(BtNode):
     def __init__(self, args: BtConstructorArgs):
         super().__init__(children=args.children)
 
-    def tick(self):
+    def tick(self, ctx: BtContext):
         res: BtResult = BtResult.Failure
         for child in self.children:
-            child_res = child.tick()
+            child_res = child.tick(ctx)
             if child_res == BtResult.Success:
                 res = BtResult.Success
         return res
 
+    def compile(self) -> CompiledTick:
+        children = tuple(compile_node(child) for child in self.children)
+        success, failure = BtResult.Success, BtResult.Failure
+
+        def tick(ctx: BtContext) -> BtResult:
+            res = failure
+            for child in children:
+                if child(ctx) is success:
+                    res = success
+            return res
+
+        return tick
+
+    def dependencies(self) -> tuple[Dependency, ...] | None:
+        return union_dependencies(self.children)
+
 
 class BtAction(BtNode, abc.ABC):
     """Base class to be implemented with the actual actions performed by the AI"""
@@ -177,19 +453,116 @@ class BtAction(BtNode, abc.ABC):
     def __init__(self, args: BtConstructorArgs):
         super().__init__(children=[], max_children=0)
 
+    def success_else_fail(self, performed: bool) -> BtResult:
+        return BtResult.Success if performed else BtResult.Failure
+
+    def compile(self) -> CompiledTick:
+        tick = self.tick
+        if not _memoized_keys:
+            return tick
+
+        def act(ctx: BtContext) -> BtResult:
+            result = tick(ctx)
+            memo = ctx.memo
+            if memo:
+                # the world may have changed, so conditions evaluated before are stale
+                memo.clear()
+            return result
+
+        return act
+
+
+class MemoStats:
+    """How often compiled conditions were answered from the memo, by memo key.
+    Only trees compiled while enabled are counted, so disabled stats cost nothing on the tick path.
+    Enabling or disabling makes all trees recompile on their next tick."""
+
+    enabled: bool = False
+    hits: Counter[Hashable] = Counter()
+    misses: Counter[Hashable] = Counter()
+
+    @classmethod
+    def enable(cls) -> None:
+        cls.enabled = True
+        BtProfiler.generation += 1
+
+    @classmethod
+    def disable(cls) -> None:
+        cls.enabled = False
+        BtProfiler.generation += 1
+
+    @classmethod
+    def clear(cls) -> None:
+        cls.hits.clear()
+        cls.misses.clear()
+
+
+_memoized_keys: frozenset[Hashable] = frozenset()
+"""Memo keys of the conditions that occur more than once in the tree being compiled, see BtRoot.compiled."""
+_compile_lock = threading.Lock()
+"""Trees compile one at a time, since compiling reads and resets _memoized_keys,
+e.g. when several planning threads find their trees outdated after a profiler change."""
+
+
+def _memo_keys(node: BtNode) -> Iterable[Hashable]:
+    if isinstance(node, BtCondition) and node.memoize:
+        yield node.memo_key
+    for child in node.children:
+        yield from _memo_keys(child)
+
 
 class BtCondition(BtNode, abc.ABC):
     """Base class to be implemented with condition checks.
     Must not have side-effects, i.e. must not change the world state in any way.
     For conditions, tick() must return either Success or Failure. Running is not allowed!
+
+    Because they are pure, compiled conditions are memoized per agent: conditions of the same type and params
+    share one result until the tick ends or an action runs, even across branches of the tree.
+    Only conditions whose type and params occur more than once in the tree are memoized,
+    for the others the memo would cost more than it saves. tick() itself stays uncached.
+
+    Conditions that declare their dependencies() are reactive: composites skip them on later ticks
+    as long as none of the dependencies changed.
     """
 
+    memoize: bool = True
+    """Opt-out for conditions whose result may change without an action running, e.g. random ones."""
+
     def __init__(self, args: BtConstructorArgs):
         super().__init__(children=[], max_children=0)
+        self.memo_key: Hashable = (type(self), repr(args.params))
 
     def success_else_fail(self, successful: bool) -> BtResult:
         return BtResult.Success if successful else BtResult.Failure
 
+    def compile(self) -> CompiledTick:
+        tick, key = self.tick, self.memo_key
+        if key not in _memoized_keys:
+            return tick
+        if MemoStats.enabled:
+            hits, misses = MemoStats.hits, MemoStats.misses
+
+            def counted(ctx: BtContext) -> BtResult:
+                memo = ctx.memo
+                result = memo.get(key)
+                if result is None:
+                    result = memo[key] = tick(ctx)
+                    misses[key] += 1
+                else:
+                    hits[key] += 1
+                return result
+
+            return counted
+
+        def memoized(ctx: BtContext) -> BtResult:
+            memo = ctx.memo
+            result = memo.get(key)
+            if result is None:
+                result = memo[key] = tick(ctx)
+            return result
+
+        return memoized
+
 
 class BtDecorator(BtNode, abc.ABC):
     def __init__(self, args: BtConstructorArgs):
@@ -199,32 +572,74 @@ class BtDecorator(BtNode, abc.ABC):
     def child(self) -> BtNode:
         return self.children[0]
 
+    def dependencies(self) -> tuple[Dependency, ...] | None:
+        return self.child.dependencies()
+
 
 class BtInverter(BtDecorator):
-    def tick(self) -> BtResult:
-        child_res = self.child.tick()
+    def tick(self, ctx: BtContext) -> BtResult:
+        child_res = self.child.tick(ctx)
         if child_res == BtResult.Success:
             return BtResult.Failure
         if child_res == BtResult.Failure:
             return BtResult.Success
         return child_res
 
+    def compile(self) -> CompiledTick:
+        child = compile_node(self.child)
+        inverted = {
+            BtResult.Success: BtResult.Failure,
+            BtResult.Failure: BtResult.Success,
+            BtResult.Running: BtResult.Running,
+        }
+        return lambda ctx: inverted[child(ctx)]
+
 
 class BtForceFailure(BtDecorator):
-    def tick(self) -> BtResult:
-        self.child.tick()
+    def tick(self, ctx: BtContext) -> BtResult:
+        self.child.tick(ctx)
         return BtResult.Failure
 
+    def compile(self) -> CompiledTick:
+        child = compile_node(self.child)
+        failure = BtResult.Failure
+
+        def tick(ctx: BtContext) -> BtResult:
+            child(ctx)
+            return failure
+
+        return tick
+
 
 class BtForceSuccess(BtDecorator):
-    def tick(self) -> BtResult:
-        self.child.tick()
+    def tick(self, ctx: BtContext) -> BtResult:
+        self.child.tick(ctx)
         return BtResult.Success
 
+    def compile(self) -> CompiledTick:
+        child = compile_node(self.child)
+        success = BtResult.Success
+
+        def tick(ctx: BtContext) -> BtResult:
+            child(ctx)
+            return success
+
+        return tick
+
 
 class BtSuccessIsFailure(BtDecorator):
-    def tick(self) -> BtResult:
-        child_res = self.child.tick()
+    def tick(self, ctx: BtContext) -> BtResult:
+        child_res = self.child.tick(ctx)
         if child_res == BtResult.Success:
             return BtResult.Failure
         return child_res
+
+    def compile(self) -> CompiledTick:
+        child = compile_node(self.child)
+        success, failure = BtResult.Success, BtResult.Failure
+
+        def tick(ctx: BtContext) -> BtResult:
+            child_res = child(ctx)
+            return failure if child_res is success else child_res
+
+        return tick
@@ -1,6 +1,5 @@
 """Unlike ./behavior_trees.py, the functionality in this file is customized towards our particular game."""
 
-import copy
 import random
 from typing import TYPE_CHECKING
 
@@ -9,6 +8,7 @@ import tcod
 
 import py_roguelike_tutorial.behavior_trees.behavior_trees as bt
 from py_roguelike_tutorial.actions import (
+    Action,
     EquipAction,
     MoveAction,
     MeleeAction,
@@ -18,10 +18,13 @@ from py_roguelike_tutorial.actions import (
 )
 from py_roguelike_tutorial.behavior_trees import validators as bt_val
 from py_roguelike_tutorial.behavior_trees.behavior_trees import BtResult
+from py_roguelike_tutorial.behavior_trees.blackboard import (
+    BlackboardKeys,
+    resolve_param,
+)
 from py_roguelike_tutorial.constants import INTERCARDINAL_DIRECTIONS
 from py_roguelike_tutorial.entity import Entity
 from py_roguelike_tutorial.entity_factory import EntityPrefabs
-from py_roguelike_tutorial.exceptions import Impossible
 from py_roguelike_tutorial.math import Math
 from py_roguelike_tutorial.pathfinding import find_path
 from py_roguelike_tutorial.types import Coord
@@ -30,27 +33,48 @@ if TYPE_CHECKING:
     pass
 
 
+AGENT_POSITION = bt.Dependency("agent_position", lambda ctx: ctx.agent.pos)
+PLAYER_POSITION = bt.Dependency("player_position", lambda ctx: ctx.player.pos)
+AGENT_HEALTH = bt.Dependency(
+    "agent_health", lambda ctx: (ctx.agent.health.hp, ctx.agent.health.max_hp)
+)
+AGENT_INVENTORY = bt.Dependency(
+    "agent_inventory", lambda ctx: ctx.agent.inventory.version
+)
+
+
+def act(ctx: bt.BtContext, action: Action) -> bool:
+    """Performs the action right away, or records it as the agent's intent while the agent is planning.
+    Returns False if the action is invalid. Planned actions can still turn out invalid once committed,
+    which undoes the blackboard writes made after recording them, see BehaviorTreeAI.commit().
+    """
+    if ctx.intents is None:
+        return action.try_perform() is None
+    if not action.can_perform():
+        return False
+    ctx.intents.append(action)
+    ctx.intent_writes.append(len(ctx.blackboard.undo_log or ()))
+    return True
+
+
 class SeesPlayerCondition(bt.BtCondition):
-    def tick(self) -> bt.BtResult:
-        target = self.player
-        agent = self.agent
-        return self.success_else_fail(
-            self.engine.game_map.has_line_of_sight(target, agent)
-        )
+    def tick(self, ctx: bt.BtContext) -> bt.BtResult:
+        return self.success_else_fail(ctx.engine.perception.sees_player(ctx.agent))
 
+    def dependencies(self) -> tuple[bt.Dependency, ...]:
+        # tiles never change after generation, see GameMap.tiles
+        return AGENT_POSITION, PLAYER_POSITION
 
-class MoveTowardsPlayerBehavior(bt.BtAction):
-    def __init__(self, args: bt.BtConstructorArgs):
-        super().__init__(args)
-        self.path: list[Coord] = []
 
-    def tick(self) -> bt.BtResult:
-        target = self.player
-        self.path = find_path(self.agent.pos, target.pos, self.engine)
-        dest_x, dest_y = self.path.pop(0)
-        step_dx, step_dy = dest_x - self.agent.x, dest_y - self.agent.y
-        MoveAction(self.agent, step_dx, step_dy).perform()
-        return bt.BtResult.Success
+class MoveTowardsPlayerBehavior(bt.BtAction):
+    def tick(self, ctx: bt.BtContext) -> bt.BtResult:
+        target = ctx.player
+        path = find_path(ctx.agent.pos, target.pos, ctx.engine)
+        dest_x, dest_y = path.pop(0)
+        step_dx, step_dy = dest_x - ctx.agent.x, dest_y - ctx.agent.y
+        return self.success_else_fail(
+            act(ctx, MoveAction(ctx.agent, step_dx, step_dy))
+        )
 
 
 class HealthCondition(bt.BtCondition):
@@ -61,15 +85,18 @@ class HealthCondition(bt.BtCondition):
         self.comparator = args.params.comparator
         self.value_percent = args.params.value_percent
 
-    def tick(self) -> bt.BtResult:
+    def tick(self, ctx: bt.BtContext) -> bt.BtResult:
         match self.comparator:
             case "leq":
                 return self.success_else_fail(
-                    self.agent.health.hp_percent <= self.value_percent / 100
+                    ctx.agent.health.hp_percent <= self.value_percent / 100
                 )
             case _:
                 raise ValueError(f"Unsupported comparator: {self.comparator}")
 
+    def dependencies(self) -> tuple[bt.Dependency, ...]:
+        return (AGENT_HEALTH,)
+
 
 class BlackboardCondition(bt.BtCondition):
     def __init__(
@@ -77,29 +104,45 @@ class BlackboardCondition(bt.BtCondition):
     ):
         super().__init__(args)
         self.key = args.params.key
+        self.slot = BlackboardKeys.slot(self.key)
         self.comparator = args.params.comparator
         self.value = args.params.value
 
-    def tick(self) -> bt.BtResult:
+    def tick(self, ctx: bt.BtContext) -> bt.BtResult:
         match self.comparator:
             case "eq":
                 return self.success_else_fail(
-                    self.blackboard.get(self.key) == self.value
+                    ctx.blackboard.get_slot(self.slot) == self.value
                 )
             case "has":
-                return self.success_else_fail(self.blackboard.has(self.key))
+                return self.success_else_fail(ctx.blackboard.has_slot(self.slot))
             case _:
                 raise ValueError(f"Unsupported comparator: {self.comparator}")
 
+    def dependencies(self) -> tuple[bt.Dependency, ...]:
+        slot = self.slot
+        if self.comparator == "has":
+            return (
+                bt.Dependency(
+                    ("blackboard_has", slot), lambda ctx: ctx.blackboard.has_slot(slot)
+                ),
+            )
+        return (
+            bt.Dependency(
+                ("blackboard", slot), lambda ctx: ctx.blackboard.get_slot(slot)
+            ),
+        )
+
 
 class WriteToBlackboardBehavior(bt.BtAction):
     def __init__(self, args: bt.BtConstructorArgs[bt_val.WriteToBlackboardDataParams]):
         super().__init__(args)
         self.key = args.params.key
+        self.slot = BlackboardKeys.slot(self.key)
         self.value = args.params.value
 
-    def tick(self) -> bt.BtResult:
-        self.blackboard.set(self.key, self.value)
+    def tick(self, ctx: bt.BtContext) -> bt.BtResult:
+        ctx.blackboard.set_slot(self.slot, self.value)
         return bt.BtResult.Success
 
 
@@ -109,41 +152,43 @@ class DistanceToPlayerCondition(bt.BtCondition):
         self.max_dist: int = args.params.max_dist
         self.min_dist: int = args.params.min_dist
 
-    def tick(self) -> bt.BtResult:
+    def tick(self, ctx: bt.BtContext) -> bt.BtResult:
         return self.success_else_fail(
-            self.min_dist <= self.player.dist_chebyshev(self.agent) <= self.max_dist
+            self.min_dist <= ctx.player.dist_chebyshev(ctx.agent) <= self.max_dist
         )
 
+    def dependencies(self) -> tuple[bt.Dependency, ...]:
+        return AGENT_POSITION, PLAYER_POSITION
+
 
 class WaitBehavior(bt.BtAction):
-    def tick(self) -> bt.BtResult:
+    def tick(self, ctx: bt.BtContext) -> bt.BtResult:
         # intentionally doing nothing
         return bt.BtResult.Success
 
 
 class FleeBehavior(bt.BtAction):
-    def tick(self) -> BtResult:
-        target = self.engine.game_map.min_position_of_flight_map()
-        path = find_path(self.agent.pos, target, self.engine)
+    def tick(self, ctx: bt.BtContext) -> BtResult:
+        target = ctx.engine.game_map.min_position_of_flight_map()
+        path = find_path(ctx.agent.pos, target, ctx.engine)
         if len(path) == 0:
             return bt.BtResult.Failure
         dest_x, dest_y = path.pop(0)
-        step_dx, step_dy = dest_x - self.agent.x, dest_y - self.agent.y
-        MoveAction(self.agent, step_dx, step_dy).perform()
-        return bt.BtResult.Success
+        step_dx, step_dy = dest_x - ctx.agent.x, dest_y - ctx.agent.y
+        return self.success_else_fail(
+            act(ctx, MoveAction(ctx.agent, step_dx, step_dy))
+        )
 
 
 class MeleeAttackBehavior(bt.BtAction):
-    def tick(self) -> bt.BtResult:
-        (dx, dy) = self.player.diff_from(self.agent)
-        MeleeAction(self.agent, dx, dy).perform()
-        return bt.BtResult.Success
+    def tick(self, ctx: bt.BtContext) -> bt.BtResult:
+        (dx, dy) = ctx.player.diff_from(ctx.agent)
+        return self.success_else_fail(act(ctx, MeleeAction(ctx.agent, dx, dy)))
 
 
 class RangedAttackBehavior(bt.BtAction):
-    def tick(self) -> bt.BtResult:
-        RangedAttackAction(self.agent).perform()
-        return bt.BtResult.Success
+    def tick(self, ctx: bt.BtContext) -> bt.BtResult:
+        return self.success_else_fail(act(ctx, RangedAttackAction(ctx.agent)))
 
 
 class HasItemCondition(bt.BtCondition):
@@ -151,8 +196,11 @@ class HasItemCondition(bt.BtCondition):
         super().__init__(args)
         self.tag = args.params.tag
 
-    def tick(self) -> bt.BtResult:
-        return self.success_else_fail(self.agent.inventory.has_by_tag(self.tag))
+    def tick(self, ctx: bt.BtContext) -> bt.BtResult:
+        return self.success_else_fail(ctx.agent.inventory.has_by_tag(self.tag))
+
+    def dependencies(self) -> tuple[bt.Dependency, ...]:
+        return (AGENT_INVENTORY,)
 
 
 class UseItemBehavior(bt.BtAction):
@@ -162,11 +210,10 @@ class UseItemBehavior(bt.BtAction):
         super().__init__(args)
         self.tag = args.params.tag
 
-    def tick(self) -> bt.BtResult:
-        item = self.agent.inventory.get_first_by_tag(self.tag)
-        assert item, f"{self.agent.name} does not have item with tag: {self.tag}."
-        ItemAction(self.agent, item).perform()
-        return bt.BtResult.Success
+    def tick(self, ctx: bt.BtContext) -> bt.BtResult:
+        item = ctx.agent.inventory.get_first_by_tag(self.tag)
+        assert item, f"{ctx.agent.name} does not have item with tag: {self.tag}."
+        return self.success_else_fail(act(ctx, ItemAction(ctx.agent, item)))
 
 
 class DebugSuccessBehavior(bt.BtAction):
@@ -181,7 +228,7 @@ class DebugSuccessBehavior(bt.BtAction):
             be used as a starting point for debugging.
     """
 
-    def tick(self) -> bt.BtResult:
+    def tick(self, ctx: bt.BtContext) -> bt.BtResult:
         return bt.BtResult.Success
 
 
@@ -197,25 +244,26 @@ class DebugFailureBehavior(bt.BtAction):
             be used as a starting point for debugging.
     """
 
-    def tick(self) -> bt.BtResult:
+    def tick(self, ctx: bt.BtContext) -> bt.BtResult:
         return bt.BtResult.Failure
 
 
 class EquipItemBehavior(bt.BtAction):
     def __init__(self, args: bt.BtConstructorArgs[bt_val.EquipItemDataParams]):
         super().__init__(args)
-        self.id_raw = args.params.id
+        self.id_raw = resolve_param(args.params.id)
 
-    def tick(self) -> bt.BtResult:
-        id, loaded = self.maybe_read_blackboard(self.id_raw)
-        item = self.agent.inventory.get_by_id(id)
+    def tick(self, ctx: bt.BtContext) -> bt.BtResult:
+        id, loaded = self.maybe_read_blackboard(ctx, self.id_raw)
+        item = ctx.agent.inventory.get_by_id(id)
         if item is None:
             raise AssertionError(
-                f"{self.agent.name} tried to equip an item with id {id}, but it does not have such an item."
+                f"{ctx.agent.name} tried to equip an item with id {id}, but it does not have such an item."
             )
-        EquipAction(entity=self.agent, item=item).perform()
+        if not act(ctx, EquipAction(entity=ctx.agent, item=item)):
+            return bt.BtResult.Failure
         if loaded:
-            self.remove_from_blackboard(self.id_raw)
+            self.remove_from_blackboard(ctx, self.id_raw)
         return bt.BtResult.Success
 
 
@@ -223,61 +271,99 @@ class PickUpItemBehavior(bt.BtAction):
     def __init__(self, args: bt.BtConstructorArgs[bt_val.PickUpItemDataParams]):
         super().__init__(args)
         self.key = args.params.key
+        self.slot = BlackboardKeys.slot(self.key)
 
-    def tick(self) -> bt.BtResult:
+    def tick(self, ctx: bt.BtContext) -> bt.BtResult:
         # item must be selected before picking because pickup action will remove the item
-        item = self.engine.game_map.get_item_at_location(*self.agent.pos)
-        PickupAction(self.agent).perform()
+        item = ctx.engine.game_map.get_item_at_location(*ctx.agent.pos)
         if item is None:
             raise AssertionError(
-                f"Agent {self.agent.name} tried to pick up an item at its position, but there is no item there."
+                f"Agent {ctx.agent.name} tried to pick up an item at its position, but there is no item there."
             )
-        self.blackboard.set(self.key, item.id)
+        if not act(ctx, PickupAction(ctx.agent)):
+            return bt.BtResult.Failure
+        ctx.blackboard.set_slot(self.slot, item.id)
         return bt.BtResult.Success
 
 
 class Subtree(bt.BtNode):
+    """Runs another tree in place. The referenced tree is shared, not copied,
+    since all per-agent state lives in the context."""
+
     def __init__(self, args: bt.BtConstructorArgs[bt_val.SubtreeDataParams]):
         super().__init__(
-            children=[copy.deepcopy(EntityPrefabs.behavior_trees[args.params.id])],
+            children=[EntityPrefabs.behavior_trees[args.params.id]],
             max_children=1,
         )
         self.id = args.params.id
 
-    def tick(self) -> bt.BtResult:
+    def tick(self, ctx: bt.BtContext) -> bt.BtResult:
         for child in self.children:
-            child_res = child.tick()
+            child_res = child.tick(ctx)
             if child_res == bt.BtResult.Failure or child_res == bt.BtResult.Running:
                 return child_res
         return bt.BtResult.Success
 
+    def compile(self) -> bt.CompiledTick:
+        # the referenced tree is inlined, there is only a single child
+        return self.children[0].compile()
+
+    def dependencies(self) -> tuple[bt.Dependency, ...] | None:
+        return self.children[0].dependencies()
+
 
 class RandomMoveBehavior(bt.BtAction):
-    def tick(self) -> BtResult:
-        try:
-            dir_x, dir_y = random.choice(INTERCARDINAL_DIRECTIONS)
-            MoveAction(self.agent, dir_x, dir_y).perform()
-            return bt.BtResult.Success
-        except Impossible:
-            return bt.BtResult.Failure
+    def tick(self, ctx: bt.BtContext) -> BtResult:
+        dir_x, dir_y = random.choice(INTERCARDINAL_DIRECTIONS)
+        return self.success_else_fail(act(ctx, MoveAction(ctx.agent, dir_x, dir_y)))
+
+
+class _MoveToEntityState:
+    def __init__(self, target: Entity):
+        self.target = target
+        self.path: list[Coord] = []
 
 
 class MoveToEntityBehavior(bt.BtAction):
+    """Walks to the entity over several turns: Running while on the way, Success once standing on its tile,
+    Failure if it cannot be reached or is gone. The target and the path are kept in the agent's context
+    until this behavior finishes or gets reset, so the path is only searched again when it got blocked or the target moved.
+    """
+
     def __init__(self, args: bt.BtConstructorArgs[bt_val.MoveToEntityDataParams]):
         super().__init__(args)
-        self.to_raw = args.params.to
-
-    def tick(self) -> BtResult:
-        target, _ = self.maybe_read_blackboard(self.to_raw)
-        if not isinstance(target, Entity):
-            raise AssertionError("Expected target to be an Entity.")
-        path = find_path(self.agent.pos, target.pos, self.engine)
+        self.to_raw = resolve_param(args.params.to)
+
+    def tick(self, ctx: bt.BtContext) -> BtResult:
+        state: _MoveToEntityState | None = ctx.node_state.get(self)
+        if state is None:
+            target, _ = self.maybe_read_blackboard(ctx, self.to_raw)
+            if not isinstance(target, Entity):
+                raise AssertionError("Expected target to be an Entity.")
+            state = ctx.node_state[self] = _MoveToEntityState(target)
+        target = state.target
+        game_map = ctx.engine.game_map
+        if target not in game_map.entities:
+            self.reset(ctx)
+            return bt.BtResult.Failure
+        if ctx.agent.pos == target.pos:
+            self.reset(ctx)
+            return bt.BtResult.Success
+        path = state.path
+        # steps are only dropped once taken, since a planned move may still fail when it is performed
+        if path and path[0] == ctx.agent.pos:
+            path.pop(0)
+        if not path or path[-1] != target.pos or game_map.is_blocked(*path[0]):
+            path = state.path = find_path(ctx.agent.pos, target.pos, ctx.engine)
         if len(path) == 0:
+            self.reset(ctx)
             return bt.BtResult.Failure
-        dest_x, dest_y = path.pop(0)
-        step_dx, step_dy = dest_x - self.agent.x, dest_y - self.agent.y
-        MoveAction(self.agent, step_dx, step_dy).perform()
-        return bt.BtResult.Success
+        dest_x, dest_y = path[0]
+        step_dx, step_dy = dest_x - ctx.agent.x, dest_y - ctx.agent.y
+        if not act(ctx, MoveAction(ctx.agent, step_dx, step_dy)):
+            self.reset(ctx)
+            return bt.BtResult.Failure
+        return bt.BtResult.Running
 
 
 class LeashedRandomMoveBehavior(bt.BtAction):
@@ -286,26 +372,24 @@ class LeashedRandomMoveBehavior(bt.BtAction):
     def __init__(self, args: bt.BtConstructorArgs[bt_val.LeashedRandomMoveDataParams]):
         super().__init__(args)
         self.radius = args.params.radius
-        self.center: str = args.params.center
-
-    def tick(self) -> BtResult:
-        try:
-            center, loaded = self.maybe_read_blackboard(self.center)
-            step_dx, step_dy = random.choice(INTERCARDINAL_DIRECTIONS)
-            action = MoveAction(self.agent, step_dx, step_dy)
-            target = action.dest_xy
-            if Math.dist_chebyshev(center, target) > self.radius:
-                return bt.BtResult.Failure
-            action.perform()
-            return bt.BtResult.Success
-        except Impossible:
+        self.center = resolve_param(args.params.center)
+
+    def tick(self, ctx: bt.BtContext) -> BtResult:
+        center, loaded = self.maybe_read_blackboard(ctx, self.center)
+        step_dx, step_dy = random.choice(INTERCARDINAL_DIRECTIONS)
+        action = MoveAction(ctx.agent, step_dx, step_dy)
+        target = action.dest_xy
+        if Math.dist_chebyshev(center, target) > self.radius:
             return bt.BtResult.Failure
+        return self.success_else_fail(act(ctx, action))
 
 
 BT_NODE_NAME_TO_CLASS = {
     "Root": bt.BtRoot,
     "Selector": bt.BtSelector,
     "Sequence": bt.BtSequence,
+    "MemSelector": bt.BtMemorySelector,
+    "MemSequence": bt.BtMemorySequence,
     "Inverter": bt.BtInverter,
     "ForceSuccess": bt.BtForceSuccess,
     "DistanceToPlayer": DistanceToPlayerCondition,
@@ -1,9 +1,18 @@
+from __future__ import annotations
+
 from enum import StrEnum
-from typing import Any
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.engine import Engine
+    from py_roguelike_tutorial.entity import Actor
 
 __all__ = [
     "BlackboardSpecialKey",
+    "BlackboardKeys",
+    "BlackboardRef",
     "Blackboard",
+    "resolve_param",
 ]
 
 
@@ -12,46 +21,161 @@ class BlackboardSpecialKey(StrEnum):
     Agent = "__agent__"
     Player = "__player__"
     SpawnLocation = "__spawn_location__"
-    Vision = "vision:"
 
 
-to_vision_tag = lambda tag: f"{BlackboardSpecialKey.Vision.value}{tag}"
+class BlackboardKeys:
+    """Registry assigning every blackboard key a fixed integer slot.
+    Nodes resolve their keys while the tree is built, so ticks index a list instead of hashing strings.
+    The slots are shared by all trees, which lets subtrees be reused across trees."""
+
+    _slots: dict[str, int] = {}
+    _keys: list[str] = []
+
+    @classmethod
+    def slot(cls, key: str) -> int:
+        slot = cls._slots.get(key)
+        if slot is None:
+            slot = cls._slots[key] = len(cls._keys)
+            cls._keys.append(key)
+        return slot
+
+    @classmethod
+    def key(cls, slot: int) -> str:
+        return cls._keys[slot]
+
+
+for _special_key in BlackboardSpecialKey:
+    BlackboardKeys.slot(_special_key.value)
+
+
+class BlackboardRef(NamedTuple):
+    """A `$key` param, resolved to the slot of the key."""
+
+    slot: int
+    key: str
+
+
+def resolve_param(value: Any) -> Any:
+    """Turns `$key` params into references to the blackboard, any other value is taken literally."""
+    if isinstance(value, str) and value.startswith("$"):
+        key = value[1:]
+        return BlackboardRef(BlackboardKeys.slot(key), key)
+    return value
+
+
+class _Missing:
+    def __repr__(self) -> str:
+        return "<missing>"
+
 
+_MISSING: Any = _Missing()
+
+
+class Blackboard:
+    """Memory of a single agent's behavior tree. Values live in slots, see BlackboardKeys.
+    What the agent saw this turn is kept apart in `vision`, keyed by tag,
+    and serves as fallback for keys that have no value of their own."""
+
+    agent: Actor = None  # type: ignore[reportAssignmentType]
+    player: Actor = None  # type: ignore[reportAssignmentType]
+    engine: Engine = None  # type: ignore[reportAssignmentType]
+    undo_log: list[tuple[int, Any]] | None = None
+    """While the agent plans, every write records the slot's previous value here,
+    so that writes relying on an action that turns out impossible can be undone, see `undo`."""
+
+    def __init__(self):
+        self.values: list[Any] = []
+        self.vision: dict[str, Any] = {}
+
+    def bind(self, *, agent: Actor, player: Actor, engine: Engine) -> None:
+        """Resolve the references every node needs once, instead of looking them up by key on every tick.
+        They remain readable by key, e.g. `$__agent__` in params."""
+        self.agent, self.player, self.engine = agent, player, engine
+        self.set(BlackboardSpecialKey.Agent.value, agent)
+        self.set(BlackboardSpecialKey.Player.value, player)
+        self.set(BlackboardSpecialKey.Engine.value, engine)
+
+    def get_slot(self, slot: int, default: Any | None = None) -> Any:
+        values = self.values
+        val = values[slot] if slot < len(values) else None
+        if val is not None and val is not _MISSING:
+            return val
+        return self.vision.get(BlackboardKeys.key(slot), default)
+
+    def has_slot(self, slot: int) -> bool:
+        values = self.values
+        if slot < len(values) and values[slot] is not _MISSING:
+            return True
+        return BlackboardKeys.key(slot) in self.vision
+
+    def set_slot(self, slot: int, val: Any) -> None:
+        values = self.values
+        if slot >= len(values):
+            values.extend([_MISSING] * (slot + 1 - len(values)))
+        if self.undo_log is not None:
+            self.undo_log.append((slot, values[slot]))
+        values[slot] = val
+
+    def remove_slot(self, slot: int) -> None:
+        values = self.values
+        if slot < len(values):
+            if self.undo_log is not None:
+                self.undo_log.append((slot, values[slot]))
+            values[slot] = _MISSING
+
+    def undo(self, writes: list[tuple[int, Any]]) -> None:
+        """Restores the slots to their values before `writes`, the tail of an undo log."""
+        values = self.values
+        for slot, val in reversed(writes):
+            values[slot] = val
 
-class Blackboard(dict[str, Any]):
     def set(self, key: str, val: Any) -> None:
-        self[key] = val
+        self.set_slot(BlackboardKeys.slot(key), val)
 
-    def set_from_version(self, key: str, val: Any):
-        self.set(to_vision_tag(key), val)
+    def set_vision(self, tag: str, val: Any) -> None:
+        self.vision[tag] = val
 
     def has(self, key: str) -> bool:
-        return key in self or to_vision_tag(key) in self
+        return self.has_slot(BlackboardKeys.slot(key))
 
     def remove(self, key: str) -> None:
-        if key in self:
-            del self[key]
+        self.remove_slot(BlackboardKeys.slot(key))
 
-    def clear_vision(self):
-        for key in list(self.keys()):
-            if key.startswith(BlackboardSpecialKey.Vision.value):
-                del self[key]
+    def clear_vision(self) -> None:
+        self.vision = {}
 
     def get(self, key: str, default: Any | None = None, /) -> Any:
         """
-        Retrieve a value from the blackboard using the specified key. If the key is not found,
-        attempt to retrieve a value using a special vision-prefixed key.
+        Retrieve a value from the blackboard using the specified key. If the key has no value,
+        fall back to what the agent saw this turn under that tag.
 
         Args:
             key (str): The key to look up in the blackboard.
             default (Any): The default value to return if the key is not found.
 
         Returns:
-            Any: The value associated with the key, or the value associated with the vision-prefixed key,
+            Any: The value associated with the key, or the entity seen with the tag of that name,
             or the default value if neither is found.
         """
-        val = super().get(key)
-        if val is not None:
-            return val
-        val2 = super().get(f"{BlackboardSpecialKey.Vision.value}{key}", default)
-        return val2
+        return self.get_slot(BlackboardKeys.slot(key), default)
+
+    def as_dict(self) -> dict[str, Any]:
+        """The values by key, without the vision."""
+        return {
+            BlackboardKeys.key(slot): val
+            for slot, val in enumerate(self.values)
+            if val is not _MISSING
+        }
+
+    def __getstate__(self):
+        # slots of keys first used at runtime may differ between game sessions, so save by key
+        state = self.__dict__.copy()
+        state["values"] = self.as_dict()
+        return state
+
+    def __setstate__(self, state):
+        values = state.pop("values")
+        self.__dict__.update(state)
+        self.values = []
+        for key, val in values.items():
+            self.set(key, val)
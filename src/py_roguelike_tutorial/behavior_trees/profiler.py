@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.behavior_trees.behavior_trees import (
+        BtContext,
+        BtNode,
+        BtResult,
+        CompiledTick,
+    )
+
+__all__ = [
+    "NodeStats",
+    "BtProfiler",
+]
+
+
+class NodeStats:
+    def __init__(self):
+        self.calls = 0
+        self.results: Counter[str] = Counter()
+        self.seconds = 0.0
+        """Cumulative time spent in the node, including its children."""
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"calls": self.calls, "results": self.results, "seconds": self.seconds}
+
+
+class BtProfiler:
+    """Records call counts, results and cumulative time of every behavior tree node,
+    by the id of the tree that defines the node and the node's pre-order index within it.
+    Only trees compiled while the profiler is enabled are instrumented,
+    so disabled profiling costs nothing on the tick path.
+    Enabling or disabling makes all trees recompile on their next tick."""
+
+    enabled: bool = False
+    generation: int = 0
+    stats: dict[str, dict[int, NodeStats]] = {}
+
+    @classmethod
+    def enable(cls) -> None:
+        cls.enabled = True
+        cls.generation += 1
+
+    @classmethod
+    def disable(cls) -> None:
+        cls.enabled = False
+        cls.generation += 1
+
+    @classmethod
+    def clear(cls) -> None:
+        cls.stats.clear()
+
+    @classmethod
+    def instrument(cls, node: BtNode, tick: CompiledTick) -> CompiledTick:
+        tree_id, index = node.profile_key or (node.class_name, 0)
+        stats = cls.stats.setdefault(tree_id, {}).setdefault(index, NodeStats())
+        results = stats.results
+        perf_counter = time.perf_counter
+
+        def profiled(ctx: BtContext) -> BtResult:
+            start = perf_counter()
+            result = tick(ctx)
+            stats.seconds += perf_counter() - start
+            stats.calls += 1
+            results[result.value] += 1
+            return result
+
+        return profiled
+
+    @classmethod
+    def save(cls, filename: str) -> None:
+        """Writes the stats as JSON, in the format that behavior-tree-yml-to-mermaid.py reads."""
+        data = {
+            tree_id: {str(index): stats.to_dict() for index, stats in nodes.items()}
+            for tree_id, nodes in cls.stats.items()
+        }
+        with open(filename, "w") as file:
+            json.dump(data, file, indent=2)
@@ -9,6 +9,8 @@ from pydantic import BaseModel, Field
 type BtChildren = list[
     BtSelectorData
     | BtSequenceData
+    | BtMemorySelectorData
+    | BtMemorySequenceData
     | DistanceToPlayerData
     | SimpleBehaviorData
     | ActorAttributeEqualsData
@@ -50,6 +52,16 @@ class BtSequenceData(BtNodeData):
     children: BtChildren = Field(min_length=1)
 
 
+class BtMemorySelectorData(BtNodeData):
+    type: Literal["MemSelector"]
+    children: BtChildren = Field(min_length=1)
+
+
+class BtMemorySequenceData(BtNodeData):
+    type: Literal["MemSequence"]
+    children: BtChildren = Field(min_length=1)
+
+
 class BtBehaviorData(BtNodeData):
     children: None = None
 
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 import random
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 import numpy as np
 import tcod
 
 from py_roguelike_tutorial.actions import (
+    Action,
     BumpAction,
     MeleeAction,
     MoveAction,
@@ -17,13 +18,19 @@ from py_roguelike_tutorial.constants import INTERCARDINAL_DIRECTIONS
 from py_roguelike_tutorial.pathfinding import find_path
 
 if TYPE_CHECKING:
-    from py_roguelike_tutorial.behavior_trees.behavior_trees import BtNode
+    from py_roguelike_tutorial.behavior_trees.behavior_trees import BtContext, BtRoot
     from py_roguelike_tutorial.engine import Engine
     from py_roguelike_tutorial.entity import Actor
     from py_roguelike_tutorial.types import Coord
 
 
 class BaseAI:
+    dormant: bool = False
+    """Dormant agents skip their turns until something wakes them up."""
+    follows_player_flow: bool = False
+    """Whether a step down the player's flow field can stand in for this AI's plan once the turn's AI budget
+    is spent, see npc_planning.fallback_plan(). Other AIs act as usual, so their turns must be cheap."""
+
     def __init__(self):
         self._agent: Actor = None  # type: ignore
 
@@ -42,25 +49,58 @@ class BaseAI:
     def perform(self) -> None:
         raise NotImplementedError("subclasses must implement perform")
 
+    def plan(self) -> list[Action] | None:
+        """Decides on this turn's actions without changing the world, so that agents can plan in parallel.
+        None if the AI cannot tell deciding from acting apart. It then performs during the commit phase.
+        State the AI keeps for itself must stay valid if commit() refuses the plan."""
+        return None
+
+    def commit(self, plan: list[Action]) -> None:
+        """Performs the planned actions in order, until one turns out impossible,
+        since the rest of the plan relies on it."""
+        for action in plan:
+            if action.try_perform() is not None:
+                break
+
+    @property
+    def is_idle(self) -> bool:
+        """Whether the agent has nothing to do and may fall asleep when far from the player."""
+        return False
+
+    def sleep(self) -> None:
+        if not self.dormant:
+            self.dormant = True
+            self.agent.game_map.dormancy.sleep(self.agent)
+
+    def wake(self) -> None:
+        if self.dormant:
+            self.dormant = False
+            self.agent.game_map.dormancy.wake(self.agent)
+
 
 class HostileEnemy(BaseAI):
+    follows_player_flow = True
+
     def __init__(self):
         super().__init__()
         self.path: list[Coord] = []
         self.alarmed = False
 
     def perform(self) -> None:
+        self.commit(self.plan())
+
+    def plan(self) -> list[Action]:
         target = self.engine.player
 
-        if self.engine.game_map.visible[self.agent.x, self.agent.y]:
+        if self.engine.perception.sees_player(self.agent):
             self.alarmed = True
 
         if self.alarmed:
             distance = target.dist_chebyshev(self.agent)
             in_melee_range = distance <= 1
             if in_melee_range:
-                (dx, dy) = target.diff_from(self.agent)
-                return MeleeAction(self.agent, dx, dy).perform()
+                dx, dy = target.diff_from(self.agent)
+                return [MeleeAction(self.agent, dx, dy)]
 
             else:
                 self.path = find_path(self.agent.pos, target.pos, self.engine)
@@ -68,9 +108,13 @@ class HostileEnemy(BaseAI):
         if self.path:
             dest_x, dest_y = self.path.pop(0)
             step_dx, step_dy = dest_x - self.agent.x, dest_y - self.agent.y
-            return MoveAction(self.agent, step_dx, step_dy).perform()
+            return [MoveAction(self.agent, step_dx, step_dy)]
 
-        return WaitAction(self.agent).perform()
+        return [WaitAction(self.agent)]
+
+    @property
+    def is_idle(self) -> bool:
+        return not self.alarmed and not self.path
 
 
 class ConfusedEnemy(BaseAI):
@@ -97,18 +141,57 @@ class ConfusedEnemy(BaseAI):
     def move_randomly(self):
         dir_x, dir_y = random.choice(INTERCARDINAL_DIRECTIONS)
         self.turns_remaining -= 1
-        return BumpAction(self.agent, dir_x, dir_y).perform()
+        BumpAction(self.agent, dir_x, dir_y).try_perform()
 
 
 class BehaviorTreeAI(BaseAI):
-    def __init__(self, tree: BtNode, visual_sense: VisualSense):
+    AWAKE_KEY = "alarmed"
+    """Trees keep their agent awake by setting this blackboard key, e.g. once it spotted the player."""
+    _planned: tuple[list[Action], list[int], list[tuple[int, Any]]] | None = None
+    """The last plan, with where its intents start in the blackboard's undo log, until it is committed."""
+    follows_player_flow = True
+
+    def __init__(self, tree: BtRoot, ctx: BtContext, visual_sense: VisualSense):
         super().__init__()
         self.tree = tree
+        """Shared by all agents of the same kind. Copying the AI keeps referencing the same tree."""
+        self.ctx = ctx
+        """This agent's blackboard and running state."""
         self.visual_sense: VisualSense = visual_sense
 
     def perform(self) -> None:
         self.visual_sense.sense()
-        self.tree.tick()
+        try:
+            self.tree.compiled(self.ctx)
+        except BaseException:
+            # an interrupted tick leaves no consistent running state to resume from
+            self.ctx.reset()
+            raise
+
+    def plan(self) -> list[Action]:
+        ctx, blackboard = self.ctx, self.ctx.blackboard
+        ctx.intents, ctx.intent_writes, blackboard.undo_log = [], [], []
+        try:
+            self.perform()
+            self._planned = (ctx.intents, ctx.intent_writes, blackboard.undo_log)
+            return ctx.intents
+        finally:
+            ctx.intents, blackboard.undo_log = None, None
+
+    def commit(self, plan: list[Action]) -> None:
+        planned, self._planned = self._planned, None
+        for i, action in enumerate(plan):
+            if action.try_perform() is not None:
+                if planned is not None and planned[0] is plan:
+                    # what the tree wrote after deciding on this action assumed it would happen
+                    intents, intent_writes, undo_log = planned
+                    self.ctx.blackboard.undo(undo_log[intent_writes[i] :])
+                break
+
+    @property
+    def is_idle(self) -> bool:
+        ctx = self.ctx
+        return not ctx.running and not ctx.blackboard.get(self.AWAKE_KEY)
 
     @property
     def agent(self) -> Actor:
@@ -13,15 +13,16 @@ from py_roguelike_tutorial.handlers.single_ranged_attack_handler import (
 )
 import py_roguelike_tutorial.validators.item_validator as validators
 from py_roguelike_tutorial import tile_types
-from py_roguelike_tutorial.actions import Action, ItemAction
-from py_roguelike_tutorial.constants import Theme
+from py_roguelike_tutorial.actions import Action, ItemAction, Refusal
+from py_roguelike_tutorial.constants import Color, Theme
 from py_roguelike_tutorial.components.ai import ConfusedEnemy
 from py_roguelike_tutorial.components.base_component import BaseComponent
 from py_roguelike_tutorial.components.inventory import Inventory
-from py_roguelike_tutorial.exceptions import Impossible
+from py_roguelike_tutorial.components.light_source import LightSource
 
 if TYPE_CHECKING:
     from py_roguelike_tutorial.entity import Actor, Item
+    from py_roguelike_tutorial.types import Coord
 
 
 class Consumable(BaseComponent):
@@ -32,8 +33,12 @@ class Consumable(BaseComponent):
         """Return the action for this item."""
         return ItemAction(consumer, self.parent)
 
+    def validate(self, ctx: ItemAction) -> Refusal | None:
+        """Why using the item would have no effect, None if it would. Must not change the world."""
+        return None
+
     def activate(self, ctx: Action) -> None:
-        """Invoke the item's ability."""
+        """Invoke the item's ability. Only called once validate() passed."""
         raise NotImplementedError("Must be implemented by subclass")
 
     def consume(self) -> None:
@@ -53,16 +58,18 @@ class HealingConsumable(Consumable):
         self.amount = data.amount
         self.charges = data.charges
 
+    def validate(self, ctx: ItemAction) -> Refusal | None:
+        health = ctx.entity.health
+        if health.hp >= health.max_hp:
+            return Refusal.FullHealth
+        return None
+
     def activate(self, ctx: Action) -> None:
         consumer = ctx.entity
         amount_recovered = consumer.health.heal(self.amount)
-
-        if amount_recovered > 0:
-            txt = f"{ctx.entity.name} consumes the {self.parent.name}, and recovers {amount_recovered} HP (-> {consumer.health.hp} HP)."
-            self.engine.message_log.add(text=txt, fg=Theme.health_recovered)
-            self.consume()
-        else:
-            raise Impossible("You are at full health already.")
+        txt = f"{ctx.entity.name} consumes the {self.parent.name}, and recovers {amount_recovered} HP (-> {consumer.health.hp} HP)."
+        self.engine.message_log.add(text=txt, fg=Theme.health_recovered)
+        self.consume()
 
 
 class LightningDamageConsumable(Consumable):
@@ -73,12 +80,15 @@ class LightningDamageConsumable(Consumable):
         self.damage = data.damage
         self.charges = data.charges
 
+    def validate(self, ctx: ItemAction) -> Refusal | None:
+        if self._closest_enemy_in_range(ctx.entity) is None:
+            return Refusal.NoEnemyInRange
+        return None
+
     def activate(self, ctx: ItemAction) -> None:  # type: ignore [reportIncompatibleMethodOverride]
         consumer = ctx.entity
         target = self._closest_enemy_in_range(consumer)
-
-        if not target:
-            raise Impossible("No enemy is close enough to strike.")
+        assert target is not None
 
         txt = f"A lightning bolt stikes the {target.name} with a loud thunder for {self.damage} damage."
         self.engine.message_log.add(txt)
@@ -146,6 +156,13 @@ class FireballDamageConsumable(Consumable):
             callback=lambda xy: ItemAction(consumer, self.parent, xy),
         )
 
+    def validate(self, ctx: ItemAction) -> Refusal | None:
+        xy = ctx.target_xy
+        # targeting unseen areas is not refused, activate() tells the player instead
+        if self.engine.game_map.visible[xy] and not self._actors_hit(xy):
+            return Refusal.NoTargetsInRadius
+        return None
+
     def activate(self, ctx: ItemAction) -> None:  # type: ignore [reportIncompatibleMethodOverride]
         xy = ctx.target_xy
 
@@ -153,20 +170,27 @@ class FireballDamageConsumable(Consumable):
             self.log("Cannot target area you cannot see.")
             return
 
-        some_target_hit = False
+        for actor in self._actors_hit(xy):
+            self.log(
+                f"The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage."
+            )
+            actor.health.take_damage(self.damage)
+
+        explosion = LightSource(
+            radius=self.radius + 2, color=Color.ORANGE_VIBRANT_WARM, intensity=0.8
+        )
+        self.engine.game_map.lighting.add_flash(xy, explosion)
+        ctx.make_noise(xy, radius=3 * self.radius)
+        self.consume()
+
+    def _actors_hit(self, xy: Coord) -> list[Actor]:
         # explicitly using actors and not visible_actors because we can target at the corner of the fog of war
         # and the spell may hit enemies hidden inside fog of war
-        for actor in self.engine.game_map.actors:
-            if actor.dist_chebyshev_pos(*xy) <= self.radius:
-                self.log(
-                    f"The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage."
-                )
-                actor.health.take_damage(self.damage)
-                some_target_hit = True
-
-        if not some_target_hit:
-            raise Impossible("There are no targets in the radius.")
-        self.consume()
+        return [
+            actor
+            for actor in self.engine.game_map.actors
+            if actor.dist_chebyshev_pos(*xy) <= self.radius
+        ]
 
 
 class TeleportSelfConsumable(Consumable):
@@ -21,7 +21,10 @@ class Health(BaseComponent):
 
     @hp.setter
     def hp(self, val: int) -> None:
+        hurt = val < self._hp
         self._hp = max(0, min(self.max_hp, val))
+        if hurt and isinstance(self.parent, Actor) and self.parent.ai:
+            self.parent.ai.wake()
         if self._hp <= 0:
             self.die()
 
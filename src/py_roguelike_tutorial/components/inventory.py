@@ -10,6 +10,8 @@ if TYPE_CHECKING:
 
 class Inventory(BaseComponent):
     parent: Actor | Prop
+    version: int = 0
+    """Bumped whenever items are added or removed, so observers can tell that the contents changed."""
 
     def __init__(self, capacity: int):
         self._capacity = capacity
@@ -41,6 +43,7 @@ class Inventory(BaseComponent):
     def drop(self, item: Item) -> None:
         """Removes the item from the inventory and drops it at the parents location."""
         self.items.remove(item)
+        self.version += 1
         item.place(self.parent.x, self.parent.y, self.engine.game_map)
         txt = f"You dropped the {item.name}."
         self.engine.message_log.add(text=txt)
@@ -62,7 +65,10 @@ class Inventory(BaseComponent):
                 existing_item.quantity += item.quantity
                 return
         self.items.append(item)
+        self.version += 1
         item.parent = self
+        if item.light:
+            self._track_lights()
 
     def add_many(self, items: Iterable[Item]) -> None:
         for item in items:
@@ -73,6 +79,7 @@ class Inventory(BaseComponent):
 
     def remove(self, item: Item) -> None:
         self.items.remove(item)
+        self.version += 1
 
     def has_by_tag(self, tag: str) -> bool:
         item = self.get_first_by_tag(tag)
@@ -107,3 +114,11 @@ class Inventory(BaseComponent):
     def replace_all(self, with_items: list[Item]):
         self.items.clear()
         self.items.extend(with_items)
+        self.version += 1
+        if any(item.light for item in with_items):
+            self._track_lights()
+
+    def _track_lights(self) -> None:
+        # inventories of blueprints and of actors still being generated have no map yet
+        if hasattr(self.parent, "parent"):
+            self.game_map.track_lights(self.parent)
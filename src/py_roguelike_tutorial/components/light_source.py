@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from py_roguelike_tutorial.components.base_component import BaseComponent
+from py_roguelike_tutorial.constants import hex_to_rgb
+import py_roguelike_tutorial.validators.item_validator as validators
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.entity import Item
+    from py_roguelike_tutorial.types import Rgb
+
+
+class LightSource(BaseComponent):
+    """Lights up the surrounding tiles, e.g. a torch lying on the floor or carried by an actor."""
+
+    parent: Item
+
+    def __init__(self, radius: int, color: Rgb, intensity: float = 1.0):
+        self.radius: int = radius
+        self.color: Rgb = color
+        self.intensity: float = intensity
+
+    @classmethod
+    def from_dict(cls, data: validators.LightSourceData):
+        return cls(
+            radius=data.radius,
+            color=hex_to_rgb(data.color),
+            intensity=data.intensity,
+        )
@@ -2,12 +2,15 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from py_roguelike_tutorial.behavior_trees.blackboard import BlackboardKeys
 from py_roguelike_tutorial.entity import Entity
 
 if TYPE_CHECKING:
     from py_roguelike_tutorial.behavior_trees.behavior_trees import Blackboard
     from py_roguelike_tutorial.entity import Actor
 
+_INVENTORY_FULL = BlackboardKeys.slot("inventory_full")
+
 
 class VisualSense:
     agent: Actor
@@ -31,20 +34,18 @@ class VisualSense:
             common_tags = item.tags & self.interests
             if common_tags and self.can_see(item):
                 for tag in common_tags:
-                    self.blackboard.set_from_version(tag, item)
+                    self.blackboard.set_vision(tag, item)
 
         for actor in self.engine.game_map.actors:
             common_tags = set(actor.tags) & self.interests
             if actor.is_alive and common_tags and self.can_see(actor):
                 for tag in common_tags:
-                    self.blackboard.set_from_version(tag, actor)
+                    self.blackboard.set_vision(tag, actor)
 
         if hasattr(self.agent, "inventory"):
             inventory_full = self.agent.inventory.is_full()
-            self.blackboard.set("inventory_full", inventory_full)
+            self.blackboard.set_slot(_INVENTORY_FULL, inventory_full)
 
     def can_see(self, other: Entity) -> bool:
         """Check if the agent can see the entity."""
-        return self.agent.dist_chebyshev(
-            other
-        ) <= self.range and self.engine.game_map.has_line_of_sight(self.agent, other)
+        return self.engine.perception.can_see(self.agent, other, self.range)
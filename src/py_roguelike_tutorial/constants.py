@@ -99,3 +99,4 @@ class Theme:
     menu_background = Color.BLACK
     descend = Color.MAGENTA_LIGHT
     dialogue = Color.WHITE
+    travel_path = Color.BLUE_LOCHMARA
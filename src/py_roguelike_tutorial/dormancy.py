@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from py_roguelike_tutorial.fov import Window, fov_window
+from py_roguelike_tutorial.scheduler import TurnScheduler
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.entity import Actor
+    from py_roguelike_tutorial.types import Coord
+
+
+class Dormancy:
+    """Which NPCs of a floor take turns.
+    Only awake agents are ticked. Dormant ones are indexed by the tile they sleep on,
+    since they do not move, so waking everyone in an area costs as much as the area
+    rather than as much as the floor's population.
+    When the awake agents act is up to the scheduler."""
+
+    def __init__(self):
+        self.awake: set[Actor] = set()
+        self.dormant: dict[Coord, Actor] = {}
+        self.scheduler = TurnScheduler()
+
+    def add(self, actor: Actor) -> None:
+        """Registers a new agent of the floor. Agents start out awake."""
+        if actor.ai and not actor.ai.dormant:
+            self._schedule(actor)
+
+    def sleep(self, actor: Actor) -> None:
+        self.awake.discard(actor)
+        self.scheduler.remove(actor)
+        self.dormant[actor.pos] = actor
+
+    def wake(self, actor: Actor) -> None:
+        if self.dormant.get(actor.pos) is actor:
+            del self.dormant[actor.pos]
+        self._schedule(actor)
+
+    def due(self, until: int) -> list[Actor]:
+        """The awake agents that act before `until`, in order. The dead are dropped on the way."""
+        agents = []
+        for actor in self.scheduler.pop_due(until):
+            if actor.is_alive:
+                agents.append(actor)
+            else:
+                self.awake.discard(actor)
+                self.scheduler.remove(actor)
+        return agents
+
+    def wake_visible(self, visible: np.ndarray, window: Window) -> None:
+        """Wakes all dormant agents on tiles where `visible` (of the shape of `window`) is True."""
+        if not self.dormant:
+            return
+        x0, y0 = window[0].start, window[1].start
+        width, height = visible.shape
+        if visible.size > len(self.dormant):
+            seen = [
+                (x, y)
+                for x, y in self.dormant
+                if 0 <= x - x0 < width
+                and 0 <= y - y0 < height
+                and visible[x - x0, y - y0]
+            ]
+        else:
+            seen = [
+                (int(local_x) + x0, int(local_y) + y0)
+                for local_x, local_y in np.argwhere(visible)
+            ]
+        for tile in seen:
+            self._wake_at(tile)
+
+    def wake_near(self, pos: Coord, radius: int, shape: tuple[int, int]) -> None:
+        """Wakes all dormant agents within `radius` (Chebyshev distance) of `pos`."""
+        x_slice, y_slice = fov_window(shape, pos, radius)
+        area = (x_slice.stop - x_slice.start) * (y_slice.stop - y_slice.start)
+        if area > len(self.dormant):
+            near = [
+                (x, y)
+                for x, y in self.dormant
+                if x_slice.start <= x < x_slice.stop
+                and y_slice.start <= y < y_slice.stop
+            ]
+        else:
+            near = [
+                (x, y)
+                for x in range(x_slice.start, x_slice.stop)
+                for y in range(y_slice.start, y_slice.stop)
+            ]
+        for tile in near:
+            self._wake_at(tile)
+
+    def _schedule(self, actor: Actor) -> None:
+        if actor not in self.awake:
+            self.awake.add(actor)
+            self.scheduler.add(actor)
+
+    def _wake_at(self, pos: Coord) -> None:
+        actor = self.dormant.get(pos)
+        if actor is None:
+            return
+        if actor.ai:
+            actor.ai.wake()
+        else:
+            del self.dormant[pos]
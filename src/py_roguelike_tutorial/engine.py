@@ -1,36 +1,59 @@
 from __future__ import annotations
 import lzma
 import pickle
-from typing import TYPE_CHECKING
+import time
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator
 
 import numpy as np
 from tcod.console import Console
-from tcod.map import compute_fov
 
 from py_roguelike_tutorial import exceptions
+from py_roguelike_tutorial.actions import Action, WaitAction
+from py_roguelike_tutorial.constants import Theme
 from py_roguelike_tutorial.entity import Actor
+from py_roguelike_tutorial.exploration import TravelMaps
+from py_roguelike_tutorial.fov import compute_local_fov
 from py_roguelike_tutorial.game_map import GameMap
 from py_roguelike_tutorial.game_world import GameWorld
 from py_roguelike_tutorial.message_log import MessageLog
+from py_roguelike_tutorial.npc_planning import TurnStats, plan_turns
+from py_roguelike_tutorial.perception import Perception
 from py_roguelike_tutorial.render_functions import (
     render_hp_bar,
     render_names_at,
     render_dungeon_level,
     render_xp,
 )
+from py_roguelike_tutorial.scheduler import ACTION_COST
 from py_roguelike_tutorial.screen_stack import ScreenStack
+from py_roguelike_tutorial.stepping import StepResult, StopCondition, StopReason
 from py_roguelike_tutorial.types import Coord
 
 if TYPE_CHECKING:
     from py_roguelike_tutorial.events.event_bus import EventBus
 
 _FOV_RADIUS = 8
+_DORMANCY_DISTANCE = 2 * _FOV_RADIUS
+"""Idle agents farther away from the player than this fall asleep."""
+AI_BUDGET_IN_SEC = 0.05
+"""Wall-clock time the NPCs may spend planning per player turn, before the rest fall back to cheap plans."""
+TICK_INTERVAL_IN_SEC = 2
+"""Seconds between glyph cycles, e.g. of stacked entities."""
+AMORTIZE_MIN_AGENTS = 500
+"""From this many awake agents on, NPC turns are spread across frames instead of being budgeted."""
+SAVE_FORMAT_VERSION = 1
+"""Bump whenever the pickled state changes shape, so saves of other versions are refused
+with a message rather than loaded into a broken game."""
+_SAVE_MAGIC = b"tstt-save"
 
 
 class Engine:
     game_map: GameMap
     game_world: GameWorld
     np_rng: np.random.Generator
+    planning_workers: int = 1
+    """Threads the NPCs plan on, see plan_turns(). Only pays off on a free-threaded Python.
+    Opt-in only: the game keeps 1, raise it with e.g. `bench_simulation.py --planning-workers 4`."""
 
     def __init__(
         self,
@@ -39,6 +62,7 @@ class Engine:
         np_rng: np.random.Generator,
         stack: ScreenStack,
         event_bus: EventBus,
+        ai_budget_in_sec: float | None = AI_BUDGET_IN_SEC,
     ) -> None:
         self.message_log = MessageLog()
         self.mouse_location: Coord = (0, 0)
@@ -47,12 +71,24 @@ class Engine:
         self.stack = stack
         self.event_bus = event_bus
         self.time_in_sec: float = 0
+        self.perception = Perception(self, player_fov_radius=_FOV_RADIUS)
+        self.ai_budget_in_sec = ai_budget_in_sec
+        """None lets every agent plan in full, however long the turn takes."""
+        self.npc_turn_stats = TurnStats()
+        self.amortize_min_agents: int | None = AMORTIZE_MIN_AGENTS
+        """None always resolves NPC turns at once."""
+        self._fov_key: tuple[GameMap, Coord] | None = None
+        """Map and player position of the last FOV computation."""
+        self.travel_maps = TravelMaps()
 
     @property
     def tick(self):
         # handling ticks inside engine to avoid resetting tick state when switching input handlers, e.g. from ingame view to look around handler
-        tick_interval_in_sec = 2
-        return int(self.time_in_sec) // tick_interval_in_sec
+        return int(self.time_in_sec) // TICK_INTERVAL_IN_SEC
+
+    def tick_changes(self, delta_time: float) -> bool:
+        """Whether rendering after `delta_time` more seconds shows the next tick."""
+        return int(self.time_in_sec + delta_time) // TICK_INTERVAL_IN_SEC != self.tick
 
     def render(self, console: Console, delta_time: float) -> None:
         self.time_in_sec += delta_time
@@ -73,32 +109,166 @@ class Engine:
         )
 
     def update_fov(self) -> None:
-        """Recompute the visible area based on player's field of view."""
-        self.game_map.visible[:] = compute_fov(
-            transparency=self.game_map.tiles["transparent"],
+        """Recompute the visible area based on player's field of view.
+        Only the windows around the previous and the current position are touched,
+        so the cost does not grow with the size of the map."""
+        game_map = self.game_map
+        game_map.visible[game_map.fov_window] = False
+        fov = compute_local_fov(
+            transparency=game_map.tiles["transparent"],
             pov=self.player.pos,
             radius=_FOV_RADIUS,
         )
+        game_map.fov_window = fov.window
+        game_map.visible[fov.window] = fov.visible
         # if a tile is visible, it should also be explored
-        self.game_map.explored[:] |= self.game_map.visible
+        explored = game_map.explored[fov.window]
+        if (fov.visible & ~explored).any():
+            explored |= fov.visible
+            game_map.explored_version += 1
+        game_map.dormancy.wake_visible(fov.visible, fov.window)
+
+    def end_player_turn(self) -> None:
+        """Brings the world up to date with the player's action, before the NPCs take their turn.
+        The FOV is only recomputed if the player moved or changed floors,
+        the Dijkstra maps are recomputed on their next use, see GameMap.dijkstra_map."""
+        game_map = self.game_map
+        fov_key = (game_map, self.player.pos)
+        # the NPCs' perception relies on the player's FOV being up-to-date
+        if fov_key != self._fov_key:
+            self.update_fov()
+            self._fov_key = fov_key
+
+    def step(
+        self,
+        turns: int,
+        *,
+        policy: Callable[[Engine], Action] | None = None,
+        stop: Iterable[StopCondition] = (),
+    ) -> StepResult:
+        """Plays up to `turns` turns in one call, e.g. for resting, fast-forwarding or tests.
+        A turn is the player's action, chosen by `policy` and waiting by default, and the NPCs' turn after it.
+        Stops early when the player dies, the player's action is impossible or one of the `stop` conditions holds.
+        Nothing is rendered in between, so derived state is only brought up to date where the turns need it.
+        """
+        conditions = tuple(stop)
+        for turn in range(turns):
+            action = policy(self) if policy else WaitAction(self.player)
+            try:
+                action.perform()
+            except exceptions.Impossible as exc:
+                self.message_log.add(text=exc.args[0], fg=Theme.impossible)
+                return StepResult(turn, StopReason.Refused)
+            self.end_player_turn()
+            self.handle_npc_turns()
+            if not self.player.is_alive:
+                return StepResult(turn + 1, StopReason.PlayerDied)
+            for condition in conditions:
+                if condition(self):
+                    return StepResult(turn + 1, StopReason.Condition, condition)
+        return StepResult(turns, StopReason.Completed)
+
+    @property
+    def amortizes_npc_turns(self) -> bool:
+        """Whether the NPC turn should be resolved over several frames, see NpcTurnHandler."""
+        threshold = self.amortize_min_agents
+        return threshold is not None and len(self.game_map.dormancy.awake) >= threshold
 
     def handle_npc_turns(self) -> None:
-        for entity in set(self.game_map.actors) - {self.player}:
-            if entity.ai:
-                try:
+        for _ in self.iter_npc_turns(budget_in_sec=self.ai_budget_in_sec):
+            pass
+
+    def iter_npc_turns(
+        self, *, batch_size: int | None = None, budget_in_sec: float | None = None
+    ) -> Iterator[TurnStats]:
+        """Resolves the NPC turn in batches of `batch_size` agents (a whole round if None),
+        yielding the turn's stats after every batch, so the caller can render in between.
+        The agents closest to the player act first, so the budget goes to those the player notices.
+        The sort is stable, ties keep the scheduler's order, which keeps the commit phase deterministic.
+        """
+        dormancy = self.game_map.dormancy
+        scheduler = dormancy.scheduler
+        turn_end = scheduler.time + ACTION_COST
+        start = time.perf_counter()
+        deadline = start + budget_in_sec if budget_in_sec is not None else None
+        stats = self.npc_turn_stats = TurnStats(budget_in_sec=budget_in_sec)
+        # agents faster than the player act several times per turn, one round each
+        while due := dormancy.due(turn_end):
+            agents = [actor for actor in due if actor is not self.player]
+            agents.sort(key=lambda actor: actor.dist_chebyshev(self.player))
+            stats.due += len(agents)
+            size = batch_size or len(agents) or 1
+            for batch_start in range(0, len(agents), size):
+                batch = agents[batch_start : batch_start + size]
+                stats.degraded += self.handle_npc_round(batch, deadline)
+                stats.agents += len(batch)
+                yield stats
+        scheduler.time = turn_end
+        stats.seconds = time.perf_counter() - start
+        self.game_map.lighting.end_turn()
+
+    def handle_npc_round(self, agents: list[Actor], deadline: float | None) -> int:
+        """Every agent acts once. Returns how many agents had to make do with a cheap plan."""
+        # perception phase: who sees whom is answered once for all agents
+        self.perception.refresh(agents)
+        # planning phase: agents decide against the same snapshot of the world
+        plans, degraded = plan_turns(
+            agents, deadline=deadline, workers=self.planning_workers
+        )
+        # commit phase: plans that conflict with earlier commits turn out impossible
+        for entity, plan in zip(agents, plans):
+            if entity.ai and entity.is_alive:
+                if plan is None:
                     entity.ai.perform()
-                except exceptions.Impossible:
-                    pass  # ignore impossible actions performed by the AI
+                else:
+                    entity.ai.commit(plan)
+            far_away = entity.dist_chebyshev(self.player) > _DORMANCY_DISTANCE
+            if entity.ai and entity.ai.is_idle and far_away:
+                entity.ai.sleep()
+        return degraded
 
     def save_to_file(self, filename: str) -> None:
         """Save this instance as compressed file.
         WARNING: Pickle may be used as an attack vector for arbitrary code execution,
         so never load other peoples' save files"""
+        write_save_file(filename, self.pickled())
+
+    def pickled(self) -> bytes:
+        """This instance pickled, without the event bus' subscribers."""
         subscribers = self.event_bus._subscribers
         # pickle does not like stringifying callables inside of fields
         self.event_bus._subscribers = {}
-        save_data = lzma.compress(pickle.dumps(self))
+        pickled = pickle.dumps(self)
         # restoring subscribers in case the game continues
         self.event_bus._subscribers = subscribers
-        with open(filename, "wb") as f:
-            f.write(save_data)
+        return pickled
+
+
+def write_save_file(filename: str, pickled: bytes) -> None:
+    """Compresses and writes a pickled engine behind a header with the save format version.
+    Leaves the engine alone, so it may run on another thread."""
+    header = _SAVE_MAGIC + f" {SAVE_FORMAT_VERSION}\n".encode()
+    save_data = lzma.compress(header + pickled)
+    with open(filename, "wb") as f:
+        f.write(save_data)
+
+
+def read_save_file(filename: str) -> Engine:
+    """Reads an engine written by write_save_file.
+    Raises IncompatibleSave if the file has another save format version."""
+    with open(filename, "rb") as f:
+        save_data = lzma.decompress(f.read())
+    header, _, pickled = save_data.partition(b"\n")
+    magic, _, version = header.partition(b" ")
+    if magic != _SAVE_MAGIC:
+        raise exceptions.IncompatibleSave(
+            "The save file was made by an older version of the game."
+        )
+    if version != str(SAVE_FORMAT_VERSION).encode():
+        raise exceptions.IncompatibleSave(
+            f"The save file has format version {version.decode()}, "
+            f"but this version of the game reads version {SAVE_FORMAT_VERSION}."
+        )
+    engine = pickle.loads(pickled)
+    assert isinstance(engine, Engine)
+    return engine
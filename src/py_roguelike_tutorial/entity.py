@@ -8,6 +8,7 @@ from enum import Enum, auto
 from typing import TYPE_CHECKING
 
 from py_roguelike_tutorial.constants import Color
+from py_roguelike_tutorial.scheduler import NORMAL_SPEED
 from py_roguelike_tutorial.types import Coord, Rgb
 
 if TYPE_CHECKING:
@@ -22,6 +23,7 @@ if TYPE_CHECKING:
     from py_roguelike_tutorial.components.interactable import Interactable
     from py_roguelike_tutorial.components.ranged import Ranged
     from py_roguelike_tutorial.components.health import Health
+    from py_roguelike_tutorial.components.light_source import LightSource
     from py_roguelike_tutorial.components.faction import Faction
 
 
@@ -54,7 +56,7 @@ class Entity:
     def __post_init__(self):
         if self.parent:
             self.parent = self.parent
-            self.parent.entities.add(self)
+            self.parent.add_entity(self)
 
     @property
     def game_map(self) -> GameMap:
@@ -69,7 +71,7 @@ class Entity:
         clone.x = x
         clone.y = y
         clone.parent = game_map
-        game_map.entities.add(clone)
+        game_map.add_entity(clone)
         return clone
 
     def duplicate(self):
@@ -87,9 +89,9 @@ class Entity:
         if game_map:
             if hasattr(self, "parent"):
                 if self.parent is self.game_map:
-                    self.game_map.entities.remove(self)
+                    self.game_map.remove_entity(self)
             self.parent = game_map
-            game_map.entities.add(self)
+            game_map.add_entity(self)
 
     def move(self, dx: int, dy: int) -> None:
         self.pos = self.test_move(dx, dy)
@@ -153,6 +155,7 @@ class Actor(Entity):
     equipment: Equipment = None  # type: ignore
     color: Rgb = Color.WHITE
     move_stepsize: int = 1
+    speed: int = NORMAL_SPEED
     blocks_movement: bool = True
     render_order: RenderOrder = RenderOrder.ACTOR
     ranged: Ranged | None = None
@@ -185,6 +188,7 @@ class Actor(Entity):
     def spawn(self, game_map: GameMap, x: int, y: int):
         clone = super().spawn(game_map=game_map, x=x, y=y)
         clone.inventory.duplicate()
+        game_map.dormancy.add(clone)
         return clone
 
     def die(self):
@@ -217,6 +221,7 @@ class Item(Entity):
     stacking: bool = False
     consumable: Consumable | None = None
     equippable: Equippable | None = None
+    light: LightSource | None = None
     render_order: RenderOrder = RenderOrder.ITEM
 
     @property
@@ -232,6 +237,8 @@ class Item(Entity):
             self.consumable.parent = self
         if self.equippable:
             self.equippable.parent = self
+        if self.light:
+            self.light.parent = self
 
     def __hash__(self):
         """Make the entity hashable based on its unique ID."""
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import itertools
+from typing import TYPE_CHECKING, Iterator
 
 import py_roguelike_tutorial.behavior_trees.validators as bt_val
 from py_roguelike_tutorial.behavior_trees.behavior_trees import (
-    Blackboard,
+    BtContext,
     BtNode,
     BtConstructorArgs,
+    BtRoot,
 )
 from py_roguelike_tutorial.behavior_trees.behaviors import BT_NODE_NAME_TO_CLASS
 from py_roguelike_tutorial.components.interactable import Chest
@@ -28,6 +30,7 @@ from py_roguelike_tutorial.components.fighter import Fighter
 from py_roguelike_tutorial.components.inventory import Inventory
 from py_roguelike_tutorial.components.health import Health
 from py_roguelike_tutorial.components.level import Level
+from py_roguelike_tutorial.components.light_source import LightSource
 from py_roguelike_tutorial.components.ranged import Ranged
 from py_roguelike_tutorial.components.vision import VisualSense
 from py_roguelike_tutorial.entity import Item, Actor, Prop
@@ -73,6 +76,7 @@ def item_from_dict(data: ItemData) -> Item:
     )
     equippable_data = data.equippable
     equippable = Equippable.from_dict(equippable_data) if equippable_data else None
+    light = LightSource.from_dict(data.light) if data.light else None
 
     item = Item(
         char=data.char,
@@ -85,6 +89,7 @@ def item_from_dict(data: ItemData) -> Item:
         stacking=data.stacking,
         consumable=consumable,
         equippable=equippable,
+        light=light,
         tags=set(data.tags),
     )
     return item
@@ -97,11 +102,13 @@ def actor_from_dict(data: ActorData, item_prefabs: dict[str, Item]) -> Actor:
         ai = ai_cls()
     elif ai_cls == BehaviorTreeAI and isinstance(data.ai, BehaviorTreeAIData):
         behavior_tree = EntityPrefabs.behavior_trees[data.ai.behavior_tree_id]
+        # the context is copied along with the actor on spawn, the tree is shared
+        ctx = BtContext()
         interests = set(data.ai.interests)
         vision = VisualSense(
-            behavior_tree.blackboard, interests=interests, range=data.ai.vision.range
+            ctx.blackboard, interests=interests, range=data.ai.vision.range
         )
-        ai = BehaviorTreeAI(behavior_tree, vision)
+        ai = BehaviorTreeAI(behavior_tree, ctx, vision)
     else:
         raise Exception("Unhandled actor ai")
     health = Health(max_hp=data.health.max_hp)
@@ -143,6 +150,7 @@ def actor_from_dict(data: ActorData, item_prefabs: dict[str, Item]) -> Actor:
         color=hex_to_rgb(data.color),
         name=data.name,
         move_stepsize=data.move_stepsize,
+        speed=data.speed,
         health=health,
         fighter=fighter,
         inventory=inventory,
@@ -184,22 +192,27 @@ def prop_from_dict(data: PropData, item_prefabs: dict[str, Item]) -> Prop:
     return prop
 
 
-def _to_bt_node(data: bt_val.BtNodeData) -> BtNode:
+def _to_bt_node(data: bt_val.BtNodeData, tree_id: str, index: Iterator[int]) -> BtNode:
     cls = BT_NODE_NAME_TO_CLASS[data.type]
-    return cls(
+    # numbered in pre-order, like the nodes in the yaml file
+    profile_key = (tree_id, next(index))
+    node = cls(
         BtConstructorArgs(
             children=(
-                [_to_bt_node(child) for child in data.children]
+                [_to_bt_node(child, tree_id, index) for child in data.children]
                 if data.children is not None
                 else []
             ),
             params=data.params,
         )
     )
+    node.profile_key = profile_key
+    return node
 
 
-def behavior_tree_from_dict(data: bt_val.BehaviorTreeData) -> BtNode:
-    # the blackboard will be filled after the gamemap finished initialization
-    tree = _to_bt_node(data.root)
-    tree.blackboard = Blackboard()
+def behavior_tree_from_dict(data: bt_val.BehaviorTreeData, tree_id: str) -> BtRoot:
+    tree = _to_bt_node(data.root, tree_id, itertools.count())
+    assert isinstance(tree, BtRoot), "Behavior trees must start with a Root node."
+    # compiling right away surfaces broken trees at load time
+    tree.compile()
     return tree
@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from py_roguelike_tutorial.behavior_trees.behavior_trees import BtNode
+    from py_roguelike_tutorial.behavior_trees.behavior_trees import BtRoot
     from py_roguelike_tutorial.components.faction import Faction
     from py_roguelike_tutorial.entity import Actor, Item, Prop
 
@@ -13,5 +13,5 @@ class EntityPrefabs:
     npcs: dict[str, Actor] = {}
     props: dict[str, Prop] = {}
     items: dict[str, Item] = {}
-    behavior_trees: dict[str, BtNode] = {}
+    behavior_trees: dict[str, BtRoot] = {}
     factions: dict[str, Faction] = {}
@@ -4,7 +4,7 @@ from typing import Callable, Literal, Protocol, TypedDict
 from py_roguelike_tutorial.entity import Actor
 from py_roguelike_tutorial.types import Coord
 
-type EventType = Literal["ranged_attack", "talk"]
+type EventType = Literal["ranged_attack", "talk", "noise"]
 
 
 # Base protocol for all events
@@ -27,3 +27,12 @@ class TalkEvent(GameEvent):
     type: Literal["talk"]
     actor: Actor
     target: Actor
+
+
+@dataclass
+class NoiseEvent(GameEvent):
+    """Something loud happened, e.g. a fight. Wakes up dormant NPCs within `radius`."""
+
+    type: Literal["noise"]
+    pos: Coord
+    radius: int
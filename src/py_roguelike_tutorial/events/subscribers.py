@@ -40,6 +40,14 @@ class EventBusSubscribers:
 
         self.engine.event_bus.subscribe(event_type=events.TalkEvent, callback=callback)
 
+    def wake_on_noise(self):
+        def callback(event: events.NoiseEvent) -> None:
+            game_map = self.engine.game_map
+            game_map.dormancy.wake_near(event.pos, event.radius, game_map.tiles.shape)
+
+        self.engine.event_bus.subscribe(event_type=events.NoiseEvent, callback=callback)
+
     def add_subscribers(self):
         self.ranged_attack_animation()
         self.talk()
+        self.wake_on_noise()
@@ -3,6 +3,14 @@ class Impossible(Exception):
 
     The reason is given as the exception message.
     """
-    
+
+
 class QuitWithoutSaving(Exception):
     """Raised to exit the game without autosave."""
+
+
+class IncompatibleSave(Exception):
+    """Raised when a save file was made by a version of the game with another save format.
+
+    The reason is given as the exception message.
+    """
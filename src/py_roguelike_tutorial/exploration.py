@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import tcod
+
+from py_roguelike_tutorial.constants import INTERCARDINAL_DIRECTIONS
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.game_map import GameMap
+    from py_roguelike_tutorial.types import Coord
+
+
+class FrontierMap:
+    """Distance of every tile to the closest unexplored walkable tile, for auto-explore.
+    A single Dijkstra pass from all frontier tiles at once replaces a path search per target.
+    Only recomputed once new tiles got explored or the tiles changed."""
+
+    def __init__(self):
+        self._distance: np.ndarray | None = None
+        self._key: tuple[GameMap, int] | None = None
+
+    def distance(self, game_map: GameMap) -> np.ndarray:
+        key = (game_map, game_map.explored_version)
+        if self._distance is None or key != self._key:
+            walkable = game_map.tiles["walkable"]
+            # https://python-tcod.readthedocs.io/en/latest/tcod/path.html#tcod.path.dijkstra2d
+            cost = walkable.astype(np.uint32)
+            distance = tcod.path.maxarray(walkable.shape, dtype=np.int32, order="F")
+            distance[walkable & ~game_map.explored] = 0
+            tcod.path.dijkstra2d(distance, cost, 1, 1, out=distance)
+            self._distance, self._key = distance, key
+        return self._distance
+
+    def next_step(self, game_map: GameMap, pos: Coord) -> Coord | None:
+        """The direction that leads downhill toward the frontier, None if no unexplored tile is reachable."""
+        return downhill_step(self.distance(game_map), pos)
+
+
+class TravelMaps:
+    """Distance maps toward travel targets, walking over explored tiles only.
+    Each target gets its own map, computed once and kept until the floor changes,
+    so a path preview that follows the cursor or a travel in several legs does not search again.
+    """
+
+    max_cached = 32
+
+    def __init__(self):
+        self._maps: dict[Coord, np.ndarray] = {}
+        self._key: tuple[GameMap, int] | None = None
+
+    def distance(self, game_map: GameMap, target: Coord) -> np.ndarray:
+        key = (game_map, game_map.explored_version)
+        if key != self._key:
+            self._maps.clear()
+            self._key = key
+        distance = self._maps.get(target)
+        if distance is None:
+            if len(self._maps) >= self.max_cached:
+                # dicts keep insertion order, thus drop the oldest map
+                del self._maps[next(iter(self._maps))]
+            walkable = game_map.tiles["walkable"] & game_map.explored
+            cost = walkable.astype(np.uint32)
+            distance = tcod.path.maxarray(walkable.shape, dtype=np.int32, order="F")
+            distance[target] = 0
+            tcod.path.dijkstra2d(distance, cost, 1, 1, out=distance)
+            self._maps[target] = distance
+        return distance
+
+    def next_step(self, game_map: GameMap, pos: Coord, target: Coord) -> Coord | None:
+        """The direction that leads downhill toward the target, None if there or the target is not reachable."""
+        return downhill_step(self.distance(game_map, target), pos)
+
+    def path(self, game_map: GameMap, pos: Coord, target: Coord) -> list[Coord]:
+        """The tiles from `pos` to the target, excluding `pos`. Empty if the target is not reachable."""
+        distance = self.distance(game_map, target)
+        path: list[Coord] = []
+        x, y = pos
+        while step := downhill_step(distance, (x, y)):
+            x, y = x + step[0], y + step[1]
+            path.append((x, y))
+        return path if (x, y) == target else []
+
+
+def downhill_step(distance: np.ndarray, pos: Coord) -> Coord | None:
+    """The direction toward the lowest neighbor that is lower than `pos` on a distance map, None at a minimum."""
+    width, height = distance.shape
+    x, y = pos
+    best_step, best_distance = None, distance[x, y]
+    for dx, dy in INTERCARDINAL_DIRECTIONS:
+        nx, ny = x + dx, y + dy
+        if 0 <= nx < width and 0 <= ny < height and distance[nx, ny] < best_distance:
+            best_step, best_distance = (dx, dy), distance[nx, ny]
+    return best_step
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from concurrent.futures import Executor
+from typing import NamedTuple, Sequence
+
+import numpy as np
+from tcod.map import compute_fov
+
+from py_roguelike_tutorial.types import Coord
+from py_roguelike_tutorial.utils import shared_executor
+
+type Window = tuple[slice, slice]
+
+EMPTY_WINDOW: Window = (slice(0, 0), slice(0, 0))
+
+
+class LocalFov(NamedTuple):
+    """Field of view computed on a window of the map instead of the whole map.
+    `visible` has the shape of the window, `window` locates it inside the full-size map.
+    For FOVs from a batch, the window may reach beyond the map's edges."""
+
+    visible: np.ndarray
+    window: Window
+
+    def is_visible(self, x: int, y: int) -> bool:
+        x_slice, y_slice = self.window
+        local_x, local_y = x - x_slice.start, y - y_slice.start
+        width, height = self.visible.shape
+        if not (0 <= local_x < width and 0 <= local_y < height):
+            return False
+        return bool(self.visible[local_x, local_y])
+
+
+def fov_window(shape: tuple[int, int], pov: Coord, radius: int) -> Window:
+    """The smallest part of a map of the given shape that can be seen from `pov` within `radius`."""
+    width, height = shape
+    x, y = pov
+    return (
+        slice(max(0, x - radius), min(width, x + radius + 1)),
+        slice(max(0, y - radius), min(height, y + radius + 1)),
+    )
+
+
+def compute_local_fov(transparency: np.ndarray, pov: Coord, radius: int) -> LocalFov:
+    """Computes the field of view on a radius-sized slice of `transparency`,
+    so the cost depends on the sight radius rather than on the map size.
+    Tiles outside the window are never visible, since they are beyond `radius` anyway.
+    A radius of 0 or less means unlimited sight, so the whole map is used in that case.
+    A `pov` beyond the map's edges sees nothing.
+    """
+    width, height = transparency.shape
+    x, y = pov
+    if not (0 <= x < width and 0 <= y < height):
+        return LocalFov(np.zeros((0, 0), dtype=bool), (slice(x, x), slice(y, y)))
+    if radius <= 0:
+        window: Window = (slice(0, width), slice(0, height))
+    else:
+        window = fov_window(transparency.shape, pov, radius)
+    x_slice, y_slice = window
+    visible = compute_fov(
+        transparency=transparency[window],
+        pov=(pov[0] - x_slice.start, pov[1] - y_slice.start),
+        radius=radius,
+    )
+    return LocalFov(visible, window)
+
+
+class BatchFov(NamedTuple):
+    """Stacked FOVs of many origins with the same radius.
+    `visible[i]` is the (2 * radius + 1)-sized square centered on `origins[i]`,
+    where the parts beyond the map's edges are never visible."""
+
+    visible: np.ndarray
+    origins: Sequence[Coord]
+    radius: int
+
+    def local_fov(self, index: int) -> LocalFov:
+        x, y = self.origins[index]
+        r = self.radius
+        window = (slice(x - r, x + r + 1), slice(y - r, y + r + 1))
+        return LocalFov(self.visible[index], window)
+
+
+def compute_local_fov_batch(
+    transparency: np.ndarray,
+    origins: Sequence[Coord],
+    radius: int,
+    *,
+    executor: Executor | None = None,
+    workers: int = 1,
+) -> BatchFov:
+    """Computes the windowed FOV of every origin in `origins`, on a thread pool if given more than one worker.
+    tcod's FOV runs in C without holding the GIL, so the computations run in parallel.
+    Serially, the batch is a little slower than calling compute_local_fov() per origin.
+    """
+    if radius <= 0:
+        raise ValueError("Batched FOV requires a limited radius.")
+    size = 2 * radius + 1
+    out = np.zeros((len(origins), size, size), dtype=bool)
+
+    def compute_chunk(indices: range) -> None:
+        for i in indices:
+            x, y = origins[i]
+            fov = compute_local_fov(transparency, (x, y), radius)
+            visible, (x_slice, y_slice) = fov
+            # windows are clipped at the map's edges, so they may start off-corner
+            dx, dy = x_slice.start - x + radius, y_slice.start - y + radius
+            out[i, dx : dx + visible.shape[0], dy : dy + visible.shape[1]] = visible
+
+    if workers <= 1 or len(origins) <= 1:
+        compute_chunk(range(len(origins)))
+        return BatchFov(out, origins, radius)
+
+    # one chunk per worker keeps the overhead low for the many tiny FOVs of NPCs
+    chunk_size = -(-len(origins) // workers)
+    chunks = [
+        range(start, min(start + chunk_size, len(origins)))
+        for start in range(0, len(origins), chunk_size)
+    ]
+    # consuming the results re-raises exceptions from the workers
+    list((executor or shared_executor("fov")).map(compute_chunk, chunks))
+    return BatchFov(out, origins, radius)
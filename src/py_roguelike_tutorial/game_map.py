@@ -11,10 +11,14 @@ from tcod.console import Console
 from py_roguelike_tutorial import tile_types
 from py_roguelike_tutorial.behavior_trees.behavior_trees import BlackboardSpecialKey
 from py_roguelike_tutorial.components.ai import BehaviorTreeAI
+from py_roguelike_tutorial.dormancy import Dormancy
 from py_roguelike_tutorial.entity import Actor, Item
+from py_roguelike_tutorial.fov import EMPTY_WINDOW, Window
+from py_roguelike_tutorial.lighting import Lighting
 from py_roguelike_tutorial.types import Coord, Rgba
 
 if TYPE_CHECKING:
+    from py_roguelike_tutorial.components.light_source import LightSource
     from py_roguelike_tutorial.engine import Engine
     from py_roguelike_tutorial.entity import Entity
 
@@ -29,30 +33,75 @@ class GameMap:
         self.engine = engine
         self.width, self.height = width, height
         self.tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
+        """Static once the floor is generated. The FOV, Dijkstra, auto-explore and light maps
+        are cached on that assumption, tiles changing in play (e.g. doors) must invalidate them."""
 
         self.visible = np.full((width, height), fill_value=False, order="F")
         self.explored = np.full((width, height), fill_value=False, order="F")
-
-        self.entities = set(entities)
+        self.explored_version = 0
+        """Bumped whenever tiles get explored, so the auto-explore map gets recomputed."""
+        self.fov_window: Window = EMPTY_WINDOW
+        """The part of the map that the last player FOV computation was written to."""
+
+        self.entities: set[Entity] = set()
+        self._light_holders: set[Entity] = set()
+        """Entities that lie on or carry a light, so lighting does not scan every entity."""
+        for entity in entities:
+            self.add_entity(entity)
         self.downstairs_location: Coord = (0, 0)
-        self.dijkstra_map: np.ndarray = np.zeros(
+        self._dijkstra_map: np.ndarray = np.zeros(
             self.tiles.shape, dtype=np.float32, order="F"
         )
-        self.flight_dijkstra_map: np.ndarray = self.dijkstra_map.copy()
+        self._flight_dijkstra_map: np.ndarray = self._dijkstra_map.copy()
+        self._dijkstra_key: Coord | None = None
+        """Player position the Dijkstra maps were computed for."""
+        self.lighting = Lighting(self.tiles.shape)
+        self.dormancy = Dormancy()
+
+    def add_entity(self, entity: Entity) -> None:
+        self.entities.add(entity)
+        self.track_lights(entity)
+
+    def remove_entity(self, entity: Entity) -> None:
+        self.entities.remove(entity)
+        self._light_holders.discard(entity)
+
+    def track_lights(self, entity: Entity) -> None:
+        """Called whenever an entity on this map may have gained a light, e.g. picked up a torch."""
+        if any(_lights_of(entity)):
+            self._light_holders.add(entity)
+
+    @property
+    def dijkstra_map(self) -> np.ndarray:
+        """Distance of every tile to the player. Computed on first use after the player moved
+        or the tiles changed, so turns without moving, e.g. resting, never compute it.
+        """
+        self._ensure_dijkstra_maps()
+        return self._dijkstra_map
+
+    @property
+    def flight_dijkstra_map(self) -> np.ndarray:
+        self._ensure_dijkstra_maps()
+        return self._flight_dijkstra_map
+
+    def _ensure_dijkstra_maps(self) -> None:
+        if self.engine.player.pos != self._dijkstra_key:
+            self.update_dijkstra_map()
 
     def update_flight_map(self):
-        self.flight_dijkstra_map = self.dijkstra_map * FLIGHT_FACTOR
+        self._flight_dijkstra_map = self._dijkstra_map * FLIGHT_FACTOR
 
     def finalize_floor(self):
-        for actor in self.actors:
+        # scheduling agents in a fixed order makes them take their turns in that order
+        for actor in sorted(self.actors, key=lambda actor: (actor.y, actor.x)):
+            if actor is not self.engine.player:
+                self.dormancy.add(actor)
             ai = actor.ai
             if isinstance(ai, BehaviorTreeAI):
-                ai.tree.blackboard[BlackboardSpecialKey.Agent.value] = actor
-                ai.tree.blackboard[BlackboardSpecialKey.Player.value] = (
-                    self.engine.player
+                ai.ctx.bind(agent=actor, player=self.engine.player, engine=self.engine)
+                ai.ctx.blackboard.set(
+                    BlackboardSpecialKey.SpawnLocation.value, actor.pos
                 )
-                ai.tree.blackboard[BlackboardSpecialKey.Engine.value] = self.engine
-                ai.tree.blackboard[BlackboardSpecialKey.SpawnLocation.value] = actor.pos
 
         self.update_dijkstra_map()
 
@@ -79,13 +128,26 @@ class GameMap:
     def items(self) -> Iterator[Item]:
         yield from (entity for entity in self.entities if isinstance(entity, Item))
 
+    @property
+    def light_sources(self) -> Iterator[tuple[LightSource, Coord]]:
+        """Lights lying on the floor, lights carried by actors, and flashes."""
+        for holder in tuple(self._light_holders):
+            lights = list(_lights_of(holder))
+            if not lights:
+                # the light was dropped or used up
+                self._light_holders.discard(holder)
+            for light in lights:
+                yield light, holder.pos
+        yield from self.lighting.flashes
+
     def update_dijkstra_map(self):
         # https://python-tcod.readthedocs.io/en/latest/tcod/path.html#tcod.path.dijkstra2d
         cost = self.tiles["walkable"].astype(np.uint32)
         distance = tcod.path.maxarray(self.tiles.shape, dtype=np.int32, order="F")
         distance[self.engine.player.pos] = 0
         tcod.path.dijkstra2d(distance, cost, 1, 1, out=distance)
-        self.dijkstra_map = distance
+        self._dijkstra_map = distance
+        self._dijkstra_key = self.engine.player.pos
 
         self.update_flight_map()
 
@@ -100,12 +162,16 @@ class GameMap:
         return 0 <= x < self.width and 0 <= y < self.height
 
     def render(self, console: Console, tick: int) -> None:
+        self.render_tiles(console)
+        # self.debug_render_distance_map(console, self.flight_dijkstra_map, True)
+        self.render_entities(console, tick)
+
+    def render_tiles(self, console: Console) -> None:
+        self.lighting.update(self.light_sources, self.tiles["transparent"])
         if not DEBUG:
             self.render_visibility(console)
         else:
             self.debug_render(console)
-        # self.debug_render_distance_map(console, self.flight_dijkstra_map, True)
-        self.render_entities(console, tick)
 
     def render_entities(self, console: Console, tick: int) -> None:
         rendered_entities = self.visible_entities if not DEBUG else self.entities
@@ -134,14 +200,18 @@ class GameMap:
         return tuple(positions[0])
 
     def render_visibility(self, console: Console):
-        console.rgb[0 : self.width, 0 : self.height] = np.select(
+        rgb = console.rgb[0 : self.width, 0 : self.height]
+        rgb[:] = np.select(
             condlist=[self.visible, self.explored],
             choicelist=[self.tiles["light"], self.tiles["dark"]],
             default=tile_types.SHROUD,
         )
+        self.lighting.apply(rgb, self.visible)
 
     def debug_render(self, console: Console):
-        console.rgb[0 : self.width, 0 : self.height] = self.tiles["light"]
+        rgb = console.rgb[0 : self.width, 0 : self.height]
+        rgb[:] = self.tiles["light"]
+        self.lighting.apply(rgb, np.ones(self.tiles.shape, dtype=bool))
 
     def debug_render_distance_map(
         self, console: Console, map: np.ndarray, use_min: bool
@@ -218,3 +288,12 @@ class GameMap:
     def has_line_of_sight(self, first: Entity, second: Entity) -> bool:
         line_of_sight = tcod.los.bresenham(first.pos, second.pos)[1:-1]
         return all(not self.is_blocked(*pos) for pos in line_of_sight)
+
+
+def _lights_of(entity: Entity) -> Iterator[LightSource]:
+    """The light of an item lying on the floor, or the lights an actor carries."""
+    if isinstance(entity, Item):
+        if entity.light:
+            yield entity.light
+    elif isinstance(entity, Actor) and entity.inventory:
+        yield from (item.light for item in entity.inventory.items if item.light)
@@ -34,5 +34,10 @@ class BaseEventHandler(EventDispatch[ActionOrHandler]):
     def on_render(self, console: Console, delta_time: float) -> None:
         raise NotImplementedError("Must be implemented in subclass.")
 
+    def needs_render(self, delta_time: float) -> bool:
+        """Whether the screen changes without any event, e.g. while animating.
+        `delta_time` is the time since the last render. Events always cause a render."""
+        return False
+
     def ev_quit(self, event: tcod.event.Quit, /):
         sys.exit()
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+
+import tcod
+from tcod.console import Console
+
+from py_roguelike_tutorial.handlers.base_event_handler import (
+    ActionOrHandler,
+)
+from py_roguelike_tutorial.handlers.ingame_event_handler import IngameEventHandler
+from py_roguelike_tutorial.stepping import HpDropped, StopReason, enemy_in_view
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.actions import Action
+    from py_roguelike_tutorial.engine import Engine
+    from py_roguelike_tutorial.stepping import StopCondition
+
+BATCH_FRAME_BUDGET_IN_SEC = 0.008
+"""Time per frame spent on playing turns, the screen is only rendered in between."""
+
+
+class BatchedTurnsHandler(IngameEventHandler):
+    """Plays the player's turns on its own, e.g. running or exploring, until `next_action` has nothing left to do,
+    a stop condition holds or `max_turns` were played. Stops on threats by default.
+    As many turns as fit into a frame are played at once through Engine.step(), so only every few turns get rendered.
+    Any key stops. Afterwards, control goes to wherever the turns lead from the `origin` handler.
+    """
+
+    max_turns = 200
+
+    def __init__(self, engine: Engine, origin: IngameEventHandler):
+        super().__init__(engine)
+        self.origin = origin
+        self.turns_left = self.max_turns
+        self.finished = False
+        self.stop_conditions: tuple[StopCondition, ...] = (
+            enemy_in_view,
+            HpDropped(engine),
+        )
+
+    def next_action(self, engine: Engine) -> Action | None:
+        """The player's next action, None to stop."""
+        raise NotImplementedError("subclasses must implement next_action")
+
+    def on_render(self, console: Console, delta_time: float) -> None:
+        if not self.finished:
+            self._advance()
+        super().on_render(console, delta_time)
+        stack = self.engine.stack
+        if stack.peek() is not self:
+            return  # e.g. a ranged attack animation plays first
+        if self.finished:
+            stack.pop()
+            next_handler = self.origin.after_turn()
+            if next_handler is not self.origin:
+                stack.push(next_handler)
+
+    def _advance(self) -> None:
+        deadline = time.perf_counter() + BATCH_FRAME_BUDGET_IN_SEC
+        engine = self.engine
+        while time.perf_counter() < deadline and engine.stack.peek() is self:
+            action = self.next_action(engine)
+            if action is None:
+                self.finished = True
+                return
+            result = engine.step(
+                1, policy=lambda _, action=action: action, stop=self.stop_conditions
+            )
+            self.turns_left -= result.turns
+            if result.reason is not StopReason.Completed or self.turns_left <= 0:
+                self.finished = True
+                return
+
+    def needs_render(self, delta_time: float) -> bool:
+        # turns are only played while rendering
+        return not self.finished
+
+    def ev_keydown(self, event: tcod.event.KeyDown, /) -> ActionOrHandler | None:
+        # holding down the key that started the turns should not stop them
+        if not event.repeat:
+            self.finished = True
+        return None
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from py_roguelike_tutorial.actions import Action, MoveAction
+from py_roguelike_tutorial.constants import Theme
+from py_roguelike_tutorial.exploration import FrontierMap
+from py_roguelike_tutorial.handlers.batched_turns_handler import BatchedTurnsHandler
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.engine import Engine
+    from py_roguelike_tutorial.entity import Item
+    from py_roguelike_tutorial.handlers.ingame_event_handler import (
+        IngameEventHandler,
+    )
+
+
+class ExploreHandler(BatchedTurnsHandler):
+    """Walks the player toward the closest unexplored tile until the floor is explored,
+    an item comes into view, an enemy comes into view or the player gets hurt."""
+
+    max_turns = 1000
+
+    def __init__(self, engine: Engine, origin: IngameEventHandler):
+        super().__init__(engine, origin)
+        self.frontier = FrontierMap()
+        self.seen_items: set[Item] = set(self._visible_items(engine))
+        self.stop_conditions += (self.new_item_in_view,)
+
+    def next_action(self, engine: Engine) -> Action | None:
+        step = self.frontier.next_step(engine.game_map, engine.player.pos)
+        if step is None:
+            engine.message_log.add(
+                "There is nothing left to explore.", Theme.impossible
+            )
+            return None
+        action = MoveAction(engine.player, *step)
+        # e.g. a friendly NPC stands in the way
+        return action if action.can_perform() else None
+
+    def new_item_in_view(self, engine: Engine) -> bool:
+        items = set(self._visible_items(engine))
+        new_items = items - self.seen_items
+        self.seen_items |= items
+        return bool(new_items)
+
+    @staticmethod
+    def _visible_items(engine: Engine) -> list[Item]:
+        game_map = engine.game_map
+        return [item for item in game_map.items if game_map.visible[item.x, item.y]]
@@ -37,30 +37,40 @@ class IngameEventHandler(BaseEventHandler):
             return self
         if isinstance(action_or_state, BaseEventHandler):
             return action_or_state
-        if self.handle_action(action_or_state):
-            if not self.player.is_alive:
-                from py_roguelike_tutorial.handlers.game_over_event_handler import (
-                    GameOverEventHandler,
-                )
-
-                return GameOverEventHandler(self.engine)
-            if self.player.level.requires_level_up:
-                from py_roguelike_tutorial.handlers.level_up_menu import LevelUpMenu
-
-                return LevelUpMenu(self.engine)
-            from py_roguelike_tutorial.handlers.main_game_event_handler import (
-                MainGameEventHandler,
-            )
+        if not self.handle_action(action_or_state):
+            return self
+        if self.engine.amortizes_npc_turns:
+            from py_roguelike_tutorial.handlers.npc_turn_handler import NpcTurnHandler
 
-            return (
-                self
-                if isinstance(self, MainGameEventHandler)
-                else MainGameEventHandler(self.engine)
+            return NpcTurnHandler(self.engine, origin=self)
+        self.engine.handle_npc_turns()
+        return self.after_turn()
+
+    def after_turn(self) -> BaseEventHandler:
+        """The handler to continue with once the NPCs took their turn."""
+        if not self.player.is_alive:
+            from py_roguelike_tutorial.handlers.game_over_event_handler import (
+                GameOverEventHandler,
             )
-        return self
+
+            return GameOverEventHandler(self.engine)
+        if self.player.level.requires_level_up:
+            from py_roguelike_tutorial.handlers.level_up_menu import LevelUpMenu
+
+            return LevelUpMenu(self.engine)
+        from py_roguelike_tutorial.handlers.main_game_event_handler import (
+            MainGameEventHandler,
+        )
+
+        return (
+            self
+            if isinstance(self, MainGameEventHandler)
+            else MainGameEventHandler(self.engine)
+        )
 
     def handle_action(self, action: Action | None) -> bool:
         """Handle actions returned from event methods.
+        The NPCs' turn is left to the caller.
 
         Returns True if the action will advance a turn."""
         if action is None:
@@ -70,14 +80,15 @@ class IngameEventHandler(BaseEventHandler):
         except exceptions.Impossible as exc:
             self.engine.message_log.add(text=exc.args[0], fg=Theme.impossible)
             return False
-        self.engine.game_map.update_dijkstra_map()
-        self.engine.handle_npc_turns()
-        self.engine.update_fov()
+        self.engine.end_player_turn()
         return True
 
     def on_render(self, console: Console, delta_time: float) -> None:
         self.engine.render(console, delta_time)
 
+    def needs_render(self, delta_time: float) -> bool:
+        return self.engine.tick_changes(delta_time)
+
     def ev_mousemotion(self, event: tcod.event.MouseMotion, /) -> None:
         if self.engine.game_map.in_bounds(int(event.position.x), int(event.position.y)):
             self.engine.mouse_location = int(event.position.x), int(event.position.y)
@@ -1,12 +1,56 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from tcod.console import Console
+
+from py_roguelike_tutorial.constants import Theme
 from py_roguelike_tutorial.handlers.base_event_handler import (
     ActionOrHandler,
 )
 from py_roguelike_tutorial.handlers.select_index_handler import SelectIndexHandler
+from py_roguelike_tutorial.handlers.travel_handler import TravelHandler
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.engine import Engine
+    from py_roguelike_tutorial.handlers.ingame_event_handler import (
+        IngameEventHandler,
+    )
+    from py_roguelike_tutorial.types import Coord
 
 
 class LookAroundHandler(SelectIndexHandler):
-    """Lets the player look around with the keyboard."""
+    """Lets the player look around with the keyboard.
+    Shows the way to the tile under the cursor, selecting the tile travels there."""
+
+    def __init__(self, engine: Engine, origin: IngameEventHandler):
+        super().__init__(engine)
+        self.origin = origin
+        self._preview_key: tuple[Coord, Coord, int] | None = None
+        self._preview: list[Coord] = []
+
+    def on_render(self, console: Console, delta_time: float) -> None:
+        """Highlight the way to the cursor."""
+        super().on_render(console, delta_time)
+        # the last tile is the cursor itself
+        for x, y in self.preview_path()[:-1]:
+            console.rgb["bg"][x, y] = Theme.travel_path
+
+    def preview_path(self) -> list[Coord]:
+        """Only walked again once the cursor moved or the floor changed."""
+        engine = self.engine
+        game_map = engine.game_map
+        target = engine.mouse_location
+        key = (engine.player.pos, target, game_map.explored_version)
+        if key != self._preview_key:
+            self._preview_key = key
+            self._preview = (
+                engine.travel_maps.path(game_map, engine.player.pos, target)
+                if game_map.explored[target]
+                else []
+            )
+        return self._preview
 
     def on_index_selected(self, x: int, y: int) -> ActionOrHandler | None:
         self.engine.stack.pop()
-        return None
+        return TravelHandler.start(self.engine, self.origin, (x, y))
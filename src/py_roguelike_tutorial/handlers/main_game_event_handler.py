@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from tcod.event import KeySym as Key, KeyDown
+from tcod.event import KeySym as Key, KeyDown, Modifier
 
 from py_roguelike_tutorial.actions import (
     EscapeAction,
@@ -14,7 +14,9 @@ from py_roguelike_tutorial.actions import (
 from py_roguelike_tutorial.handlers.base_event_handler import (
     ActionOrHandler,
 )
+from py_roguelike_tutorial.constants import Theme
 from py_roguelike_tutorial.handlers.character_sheet_menu import CharacterSheetMenu
+from py_roguelike_tutorial.handlers.explore_handler import ExploreHandler
 from py_roguelike_tutorial.handlers.ingame_event_handler import IngameEventHandler
 from py_roguelike_tutorial.handlers.inventory_activate_handler import (
     InventoryActivateHandler,
@@ -22,6 +24,9 @@ from py_roguelike_tutorial.handlers.inventory_activate_handler import (
 from py_roguelike_tutorial.handlers.inventory_drop_handler import InventoryDropHandler
 from py_roguelike_tutorial.handlers.key_map import CONFIRM_KEYS, MOVE_KEYS, WAIT_KEYS
 from py_roguelike_tutorial.handlers.log_history_menu import LogHistoryMenu
+from py_roguelike_tutorial.handlers.run_handler import RunHandler
+from py_roguelike_tutorial.handlers.travel_handler import TravelHandler
+from py_roguelike_tutorial.stepping import enemy_in_view
 
 if TYPE_CHECKING:
     pass
@@ -33,6 +38,9 @@ class MainGameEventHandler(IngameEventHandler):
         player = self.player
 
         match key:
+            case _ if key in MOVE_KEYS and event.mod & Modifier.SHIFT:
+                dx, dy = MOVE_KEYS[key]
+                return RunHandler(self.engine, self, dx, dy)
             case _ if key in MOVE_KEYS:
                 dx, dy = MOVE_KEYS[key]
                 return BumpAction(player, dx, dy)
@@ -52,11 +60,21 @@ class MainGameEventHandler(IngameEventHandler):
                 return CharacterSheetMenu(self.engine)
             case Key.G:
                 return PickupAction(player)
+            case Key.O:
+                if enemy_in_view(self.engine):
+                    self.engine.message_log.add(
+                        "Not with enemies in view.", Theme.impossible
+                    )
+                    return None
+                return ExploreHandler(self.engine, self)
+            case Key.T:
+                target = self.engine.game_map.downstairs_location
+                return TravelHandler.start(self.engine, self, target)
             case Key.K:
                 from py_roguelike_tutorial.handlers.look_around_handler import (
                     LookAroundHandler,
                 )
 
-                return LookAroundHandler(self.engine)
+                return LookAroundHandler(self.engine, self)
             case _:
                 return None
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future, wait
+from typing import TYPE_CHECKING
+
+import tcod
+from tcod.console import Console
+from tcod.event import Quit
+
+from py_roguelike_tutorial.handlers.base_event_handler import (
+    ActionOrHandler,
+)
+from py_roguelike_tutorial.handlers.ingame_event_handler import IngameEventHandler
+from py_roguelike_tutorial.render_functions import print_text_center
+from py_roguelike_tutorial.render_snapshot import RenderSnapshot
+from py_roguelike_tutorial.utils import shared_executor
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.engine import Engine
+
+NPC_BATCH_SIZE = 64
+SNAPSHOT_INTERVAL_IN_SEC = 1 / 60
+"""How often the worker publishes the turn's progress, at most."""
+
+
+class NpcTurnHandler(IngameEventHandler):
+    """Resolves the NPCs' turn on a worker thread, so the game keeps rendering while huge floors move.
+    While the worker plays, only the snapshots it publishes get rendered, the engine is left alone.
+    Handlers pushed mid-turn, e.g. a ranged attack animation, are held back and shown in a pause between batches.
+    Player input is blocked until the turn is complete,
+    then control goes to wherever the turn leads from the `origin` handler, e.g. the game over screen."""
+
+    def __init__(self, engine: Engine, origin: IngameEventHandler):
+        super().__init__(engine)
+        self.origin = origin
+        self.snapshot = RenderSnapshot.capture(engine)
+        self.progress = ""
+        self._resume = threading.Event()
+        """Set by the main thread while the worker may play."""
+        self._paused = threading.Event()
+        """Set by the worker once it waits for the held handlers to be shown."""
+        # a single thread, so turns never overlap
+        worker = shared_executor("npc-turn", max_workers=1)
+        self._turn: Future[None] = worker.submit(self._play_turn)
+
+    def __getstate__(self):
+        # threading state cannot be pickled, and only finished turns are saved, see finish_turn()
+        assert self.finished, "finish_turn() before saving"
+        state = self.__dict__.copy()
+        del state["_resume"], state["_paused"], state["_turn"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._resume, self._paused = threading.Event(), threading.Event()
+        # the loaded handler moves on to wherever the turn led on its first render
+        self._turn = Future()
+        self._turn.set_result(None)
+
+    @property
+    def finished(self) -> bool:
+        return self._turn.done()
+
+    def finish_turn(self) -> None:
+        """Lets the worker play the rest of the turn without pausing and waits for it, e.g. before saving.
+        An exception the worker raised is left for on_render to re-raise."""
+        # handlers pushed from now on go straight onto the stack, so the worker does not pause again
+        self.engine.stack.release()
+        self._resume.set()
+        wait([self._turn])
+
+    def _play_turn(self) -> None:
+        engine = self.engine
+        self._resume.wait()
+        published = time.perf_counter()
+        # the whole point is to take our time, so no agent gets degraded
+        for stats in engine.iter_npc_turns(batch_size=NPC_BATCH_SIZE):
+            if engine.stack.held:
+                self._resume.clear()
+                self._paused.set()
+                self._resume.wait()
+            if time.perf_counter() - published > SNAPSHOT_INTERVAL_IN_SEC:
+                self.progress = f"Monsters act... {stats.agents}/{stats.due}"
+                self.snapshot = RenderSnapshot.capture(engine)
+                published = time.perf_counter()
+
+    def on_render(self, console: Console, delta_time: float) -> None:
+        stack = self.engine.stack
+        if self.finished or self._paused.is_set():
+            # the worker does not touch the engine, so it is safe to render
+            if self.finished:
+                # re-raises exceptions from the worker
+                self._turn.result()
+            else:
+                self._paused.clear()
+            stack.release()
+            super().on_render(console, delta_time)
+            if stack.peek() is not self:
+                return  # e.g. a ranged attack animation plays first
+            if self.finished:
+                stack.pop()
+                next_handler = self.origin.after_turn()
+                if next_handler is not self.origin:
+                    stack.push(next_handler)
+                return
+        if not self._resume.is_set():
+            stack.hold()
+            self._resume.set()
+        self.engine.time_in_sec += delta_time
+        self.snapshot.render(console, self.engine.tick)
+        print_text_center(console, self.progress, 0)
+
+    def needs_render(self, delta_time: float) -> bool:
+        # the worker's progress arrives without any event
+        return True
+
+    def ev_keydown(self, event: tcod.event.KeyDown, /) -> ActionOrHandler | None:
+        return None  # no key input until the NPCs are done
+
+    def ev_quit(self, event: Quit):
+        # saving on exit must not see a half-played turn
+        self.finish_turn()
+        super().ev_quit(event)
@@ -30,6 +30,9 @@ class RangedAttackAnimation(IngameEventHandler):
 
         self.path = tcod.los.bresenham(from_pos, to)
 
+    def needs_render(self, delta_time: float) -> bool:
+        return True
+
     def on_render(self, console: Console, delta_time: float) -> None:
 
         super().on_render(console, delta_time)
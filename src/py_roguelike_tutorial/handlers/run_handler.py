@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from py_roguelike_tutorial.actions import Action, MoveAction
+from py_roguelike_tutorial.fov import fov_window
+from py_roguelike_tutorial.handlers.batched_turns_handler import BatchedTurnsHandler
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.engine import Engine
+    from py_roguelike_tutorial.handlers.ingame_event_handler import (
+        IngameEventHandler,
+    )
+
+
+class RunHandler(BatchedTurnsHandler):
+    """Keeps the player moving in one direction until something interesting happens:
+    the way is blocked, the surroundings open up or narrow (e.g. a junction, a doorway or a room),
+    the player stands on an item or the stairs, an enemy comes into view or the player gets hurt."""
+
+    def __init__(
+        self, engine: Engine, origin: IngameEventHandler, dx: int, dy: int
+    ) -> None:
+        super().__init__(engine, origin)
+        self.dx, self.dy = dx, dy
+        self.openings: int | None = None
+        """Walkable tiles around the player after the first step."""
+        self.stop_conditions += (self.something_interesting,)
+
+    def next_action(self, engine: Engine) -> Action | None:
+        action = MoveAction(engine.player, self.dx, self.dy)
+        return action if action.can_perform() else None
+
+    def something_interesting(self, engine: Engine) -> bool:
+        player = engine.player
+        game_map = engine.game_map
+        if player.pos == game_map.downstairs_location:
+            return True
+        if game_map.get_item_at_location(*player.pos):
+            return True
+        openings = self._count_openings(engine)
+        if self.openings is None:
+            self.openings = openings
+        return openings != self.openings
+
+    def _count_openings(self, engine: Engine) -> int:
+        walkable = engine.game_map.tiles["walkable"]
+        x_slice, y_slice = fov_window(walkable.shape, engine.player.pos, 1)
+        # the player's own tile is walkable as well
+        return int(np.count_nonzero(walkable[x_slice, y_slice])) - 1
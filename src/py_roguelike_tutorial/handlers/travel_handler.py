@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from py_roguelike_tutorial.actions import Action, MoveAction
+from py_roguelike_tutorial.constants import Theme
+from py_roguelike_tutorial.handlers.batched_turns_handler import BatchedTurnsHandler
+from py_roguelike_tutorial.stepping import enemy_in_view
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.engine import Engine
+    from py_roguelike_tutorial.handlers.ingame_event_handler import (
+        IngameEventHandler,
+    )
+    from py_roguelike_tutorial.types import Coord
+
+
+class TravelHandler(BatchedTurnsHandler):
+    """Walks the player to a known tile on the shortest way over explored tiles,
+    until arrived, an enemy comes into view or the player gets hurt."""
+
+    max_turns = 1000
+
+    def __init__(self, engine: Engine, origin: IngameEventHandler, target: Coord):
+        super().__init__(engine, origin)
+        self.target = target
+
+    @classmethod
+    def start(
+        cls, engine: Engine, origin: IngameEventHandler, target: Coord
+    ) -> TravelHandler | None:
+        """A handler traveling to the target, None with a message if traveling is not possible."""
+        if target == engine.player.pos:
+            return None
+        reason = None
+        if not engine.game_map.explored[target]:
+            reason = "You do not know that place yet."
+        elif not engine.travel_maps.path(engine.game_map, engine.player.pos, target):
+            reason = "You know no way there."
+        elif enemy_in_view(engine):
+            reason = "Not with enemies in view."
+        if reason:
+            engine.message_log.add(reason, Theme.impossible)
+            return None
+        return cls(engine, origin, target)
+
+    def next_action(self, engine: Engine) -> Action | None:
+        step = engine.travel_maps.next_step(
+            engine.game_map, engine.player.pos, self.target
+        )
+        if step is None:
+            return None
+        action = MoveAction(engine.player, *step)
+        # e.g. an NPC stands in the way
+        return action if action.can_perform() else None
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable
+
+import numpy as np
+
+from py_roguelike_tutorial.fov import EMPTY_WINDOW, Window, compute_local_fov
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.components.light_source import LightSource
+    from py_roguelike_tutorial.types import Coord
+
+
+def compute_light_map(
+    transparency: np.ndarray, pos: Coord, light: LightSource
+) -> tuple[Window, np.ndarray]:
+    """The colored light that a single source casts onto the tiles it can see,
+    fading linearly with the distance. Only the window around the source is returned."""
+    fov = compute_local_fov(transparency, pos, light.radius)
+    x_slice, y_slice = fov.window
+    dx = np.arange(x_slice.start, x_slice.stop)[:, np.newaxis] - pos[0]
+    dy = np.arange(y_slice.start, y_slice.stop)[np.newaxis, :] - pos[1]
+    falloff = np.clip(1 - np.sqrt(dx**2 + dy**2) / (light.radius + 1), 0, 1)
+    brightness = falloff * light.intensity * fov.visible
+    color = np.asarray(light.color, dtype=np.float32)
+    return fov.window, brightness[..., np.newaxis].astype(np.float32) * color
+
+
+class _CachedLightMap:
+    def __init__(self, pos: Coord, window: Window, rgb: np.ndarray):
+        self.pos = pos
+        self.window = window
+        self.rgb = rgb
+
+
+class Lighting:
+    """The lighting layer of a floor.
+    Every light source keeps its light map until it moves (the tiles are static, see GameMap.tiles),
+    and the composite of all light maps is only rebuilt when one of them changed,
+    so frames in which nothing moved cost next to nothing."""
+
+    def __init__(self, shape: tuple[int, int]):
+        self.light_map = np.zeros((*shape, 3), dtype=np.float32)
+        """Sum of the light colors falling onto each tile."""
+        self.bounds: Window = EMPTY_WINDOW
+        """The part of the map that receives any light at all."""
+        self.turn = 0
+        self._cache: dict[LightSource, _CachedLightMap] = {}
+        self._flashes: list[tuple[Coord, LightSource, int]] = []
+
+    def add_flash(self, pos: Coord, light: LightSource, turns: int = 1) -> None:
+        """A short-lived light that is not attached to any entity, e.g. an explosion."""
+        self._flashes.append((pos, light, self.turn + turns))
+
+    def end_turn(self) -> None:
+        self.turn += 1
+        self._flashes = [flash for flash in self._flashes if flash[2] >= self.turn]
+
+    @property
+    def flashes(self) -> Iterable[tuple[LightSource, Coord]]:
+        return ((light, pos) for pos, light, _ in self._flashes)
+
+    def update(
+        self, sources: Iterable[tuple[LightSource, Coord]], transparency: np.ndarray
+    ) -> None:
+        changed = False
+        current: set[LightSource] = set()
+        for light, pos in sources:
+            current.add(light)
+            cached = self._cache.get(light)
+            if cached is None or cached.pos != pos:
+                window, rgb = compute_light_map(transparency, pos, light)
+                self._cache[light] = _CachedLightMap(pos, window, rgb)
+                changed = True
+        for light in self._cache.keys() - current:
+            del self._cache[light]
+            changed = True
+        if changed:
+            self._composite()
+
+    def _composite(self) -> None:
+        self.light_map[self.bounds] = 0
+        if not self._cache:
+            self.bounds = EMPTY_WINDOW
+            return
+        for cached in self._cache.values():
+            self.light_map[cached.window] += cached.rgb
+        windows = [cached.window for cached in self._cache.values()]
+        self.bounds = (
+            slice(min(w[0].start for w in windows), max(w[0].stop for w in windows)),
+            slice(min(w[1].start for w in windows), max(w[1].stop for w in windows)),
+        )
+
+    def apply(self, rgb: np.ndarray, mask: np.ndarray) -> None:
+        """Brighten the background of the tiles in `mask` by the light falling onto them.
+        `rgb` and `mask` have the shape of the map."""
+        if not self._cache:
+            return
+        bg = rgb["bg"][self.bounds]
+        lit = mask[self.bounds]
+        bg[lit] = np.minimum(bg[lit] + self.light_map[self.bounds][lit], 255)
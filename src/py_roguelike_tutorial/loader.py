@@ -6,7 +6,7 @@ from typing import TYPE_CHECKING, Callable, Any
 import yaml
 from pydantic import ValidationError
 
-from py_roguelike_tutorial.behavior_trees.behavior_trees import BtNode
+from py_roguelike_tutorial.behavior_trees.behavior_trees import BtRoot
 from py_roguelike_tutorial.components.faction import Faction
 from py_roguelike_tutorial.procgen.procgen_config import DungeonTable, EntityTableRow
 from py_roguelike_tutorial.entity_deserializers import (
@@ -96,12 +96,12 @@ def load_item_entities() -> dict[str, Item]:
     return entities
 
 
-def load_behavior_trees(behavior_tree_prefabs: dict) -> dict[str, BtNode]:
+def load_behavior_trees(behavior_tree_prefabs: dict) -> dict[str, BtRoot]:
     filename = "assets/data/experiments/behavior_trees.yml"
     data: dict[str, dict] = _load_asset(filename)
 
     def create_behavior_tree_with_side_effects(val, key):
-        tree = behavior_tree_from_dict(val)
+        tree = behavior_tree_from_dict(val, tree_id=key)
         # FIXME: it would be nice if we can run this function side-effect free, postponing assignment to the prefabs.
         # The problem is that due to the Subtree node, we need the previously parsed behavior subtree prefab.
         # we could collect all of those in a temporary dict but haven't implemented yet.
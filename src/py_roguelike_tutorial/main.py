@@ -1,6 +1,11 @@
+import asyncio
+import itertools
 import random
 import time
 import traceback
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterable, Iterator
 
 import tcod
 
@@ -10,13 +15,21 @@ from py_roguelike_tutorial.procgen.procgen_config import (
     ProcgenConfig,
 )
 from py_roguelike_tutorial.constants import AUTOSAVE_FILENAME, RNG_SEED
+from py_roguelike_tutorial.engine import write_save_file
 from py_roguelike_tutorial.entity_factory import EntityPrefabs
 from py_roguelike_tutorial.handlers.base_event_handler import BaseEventHandler
 from py_roguelike_tutorial.handlers.ingame_event_handler import IngameEventHandler
+from py_roguelike_tutorial.handlers.main_game_event_handler import MainGameEventHandler
+from py_roguelike_tutorial.handlers.npc_turn_handler import NpcTurnHandler
 import py_roguelike_tutorial.loader as loader
 from py_roguelike_tutorial.screen_stack import ScreenStack
 from py_roguelike_tutorial.utils import assets_filepath
 
+SCREEN_WIDTH = 80
+SCREEN_HEIGHT = 50
+MAX_FRAME_TIME: float = 1 / 60  # 60 FPS
+AUTOSAVE_INTERVAL_IN_SEC = 60.0
+
 
 def save_game(handler: BaseEventHandler, filename: str):
     if isinstance(handler, IngameEventHandler):
@@ -35,16 +48,68 @@ def load_data_files():
     ProcgenConfig.enemy_chances = loader.load_enemy_spawn_rates(EntityPrefabs.npcs)
 
 
-def main(*, max_iterations: int | None = None):
+class Frames:
+    """Renders the handler on top of the stack and hands it the events, one frame at a time.
+    Frames are only rebuilt once something changed, so an idle game does not burn CPU."""
+
+    def __init__(self, context: tcod.context.Context, stack: ScreenStack):
+        self.context = context
+        self.stack = stack
+        self.console = tcod.console.Console(SCREEN_WIDTH, SCREEN_HEIGHT, order="F")
+        self.handler: BaseEventHandler = stack.peek()
+        self._previous_timestamp: float = time.time()
+        self._rendered_handler: BaseEventHandler | None = None
+        self._events_since_render = True
+
+    def render(self) -> None:
+        current_timestamp = time.time()
+        delta = current_timestamp - self._previous_timestamp
+
+        handler = self.handler = self.stack.peek()
+        if (
+            self._events_since_render
+            or handler is not self._rendered_handler
+            or handler.needs_render(delta)
+        ):
+            self.console.clear()
+            self._previous_timestamp = current_timestamp
+            handler.on_render(console=self.console, delta_time=delta)
+            self.context.present(self.console)
+            self._rendered_handler = handler
+            self._events_since_render = False
+
+    def handle_events(self, events: Iterable[tcod.event.Event]) -> None:
+        """Hands the events to the handler rendered last."""
+        handler = self.handler
+        try:
+            for event in events:
+                self._events_since_render = True
+                converted_event = self.context.convert_event(event)
+                next_handler = handler.handle_events(converted_event)
+                if next_handler is not handler:
+                    self.stack.push(next_handler)
+        except exceptions.QuitWithoutSaving:
+            raise
+        except Exception:  # ingame exceptions
+            traceback.print_exc()
+            if isinstance(handler, IngameEventHandler):
+                handler.engine.message_log.add(traceback.format_exc(), fg=Theme.error)
+            raise
+
+
+def _new_stack() -> ScreenStack:
+    random.seed(RNG_SEED)
+    load_data_files()
+    stack = ScreenStack()
+    stack.push(setup_game.MainMenu(stack))
+    return stack
+
+
+def _new_context() -> tcod.context.Context:
     monitor_width = 1920
     window_width = monitor_width // 2
     window_height = 1080
-    screen_width = 80
-    screen_height = 50
     window_x = monitor_width // 2 - 10
-    max_frame_time: float = 1 / 60  # 60 FPS
-
-    random.seed(RNG_SEED)
 
     filename = assets_filepath("assets/dejavu10x10_gs_tc.png")
     tileset = tcod.tileset.load_tilesheet(
@@ -53,15 +118,9 @@ def main(*, max_iterations: int | None = None):
         8,
         tcod.tileset.CHARMAP_TCOD,
     )
-
-    load_data_files()
-    stack = ScreenStack()
-    stack.push(setup_game.MainMenu(stack))
-    handler = stack.peek()
-
-    with tcod.context.new(
-        columns=screen_width,
-        rows=screen_height,
+    return tcod.context.new(
+        columns=SCREEN_WIDTH,
+        rows=SCREEN_HEIGHT,
         tileset=tileset,
         title="TSTT's Pythyfyl Roguelike",
         vsync=True,
@@ -69,47 +128,94 @@ def main(*, max_iterations: int | None = None):
         height=window_height,
         x=window_x,
         y=0,
-    ) as context:
-        root_console = tcod.console.Console(screen_width, screen_height, order="F")
+    )
+
+
+def _frame_numbers(max_iterations: int | None) -> Iterable[int]:
+    return itertools.count() if max_iterations is None else range(max_iterations)
 
-        previous_timestamp: float = time.time()
-        iterations = 0
+
+@contextmanager
+def _save_on_exit(frames: Frames, saves: Executor | None = None) -> Iterator[None]:
+    """Saves the game once the loop ends, unless quitting without saving."""
+    try:
+        yield
+    except exceptions.QuitWithoutSaving:
+        raise SystemExit()
+    except BaseException:  # save on exit and on any unexpeceted exception
+        if saves is not None:
+            # an autosave still being written must not overwrite this save
+            saves.shutdown(wait=True)
+        # the engine must not be pickled while a worker still plays the NPCs' turn
+        for handler in list(frames.stack.items):
+            if isinstance(handler, NpcTurnHandler):
+                handler.finish_turn()
+        save_game(frames.handler, AUTOSAVE_FILENAME)
+        raise
+
+
+def main(*, max_iterations: int | None = None):
+    stack = _new_stack()
+    with _new_context() as context:
+        frames = Frames(context, stack)
+        with _save_on_exit(frames):
+            for _ in _frame_numbers(max_iterations):
+                frames.render()
+                frames.handle_events(tcod.event.wait(MAX_FRAME_TIME))
+
+
+async def main_async(
+    *,
+    max_iterations: int | None = None,
+    autosave_interval_in_sec: float = AUTOSAVE_INTERVAL_IN_SEC,
+):
+    """The same game as main(), but every frame is a step of an asyncio event loop,
+    so background jobs run as tasks in between frames instead of needing their own timers.
+    Their CPU-heavy parts belong into executors, so they do not delay the next frame.
+
+    Run with asyncio.run(main_async())."""
+    stack = _new_stack()
+    loop = asyncio.get_running_loop()
+    with (
+        _new_context() as context,
+        ThreadPoolExecutor(max_workers=1, thread_name_prefix="autosave") as saves,
+    ):
+        frames = Frames(context, stack)
+        autosave = asyncio.create_task(
+            _autosave(frames, saves, autosave_interval_in_sec)
+        )
         try:
-            while True and (
-                iterations < max_iterations if max_iterations is not None else True
-            ):
-                if max_iterations is not None:
-                    iterations += 1
-
-                root_console.clear()
-
-                current_timestamp = time.time()
-                delta = current_timestamp - previous_timestamp
-                previous_timestamp = current_timestamp
-
-                handler = stack.peek()
-                handler.on_render(console=root_console, delta_time=delta)
-                context.present(root_console)
-                try:
-                    for event in tcod.event.wait(max_frame_time):
-                        converted_event = context.convert_event(event)
-                        next_handler = handler.handle_events(converted_event)
-                        if next_handler is not handler:
-                            stack.push(next_handler)
-                except exceptions.QuitWithoutSaving:
-                    raise
-                except Exception:  # ingame exceptions
-                    traceback.print_exc()
-                    if isinstance(handler, IngameEventHandler):
-                        handler.engine.message_log.add(
-                            traceback.format_exc(), fg=Theme.error
-                        )
-                    raise
-        except exceptions.QuitWithoutSaving:
-            raise SystemExit()
-        except SystemExit:
-            save_game(handler, AUTOSAVE_FILENAME)
-            raise
-        except BaseException:  # save on any unexpeceted exception
-            save_game(handler, AUTOSAVE_FILENAME)
-            raise
+            with _save_on_exit(frames, saves):
+                for _ in _frame_numbers(max_iterations):
+                    frame_start = loop.time()
+                    frames.render()
+                    # polling instead of waiting, so the loop is free for other tasks
+                    frames.handle_events(tcod.event.get())
+                    await asyncio.sleep(frame_start + MAX_FRAME_TIME - loop.time())
+        finally:
+            autosave.cancel()
+
+
+async def _autosave(
+    frames: Frames,
+    saves: Executor,
+    interval_in_sec: float = AUTOSAVE_INTERVAL_IN_SEC,
+) -> None:
+    """Saves the game every `interval_in_sec` while the player is up to move, i.e. in between turns.
+    Only pickling happens on the event loop, compressing and writing go to the `saves` executor.
+    A failed attempt is reported and the next one is made on schedule."""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval_in_sec)
+        handler = frames.stack.peek()
+        if isinstance(handler, MainGameEventHandler):
+            try:
+                pickled = handler.engine.pickled()
+                await loop.run_in_executor(
+                    saves, write_save_file, AUTOSAVE_FILENAME, pickled
+                )
+            except Exception:
+                traceback.print_exc()
+                print(f"Autosave to {AUTOSAVE_FILENAME} failed.")
+            else:
+                print(f"Game autosaved to {AUTOSAVE_FILENAME}.")
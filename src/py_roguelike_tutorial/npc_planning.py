@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, NamedTuple, Sequence
+
+from py_roguelike_tutorial.actions import MoveAction, WaitAction
+from py_roguelike_tutorial.constants import INTERCARDINAL_DIRECTIONS
+from py_roguelike_tutorial.utils import shared_executor
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.actions import Action
+    from py_roguelike_tutorial.entity import Actor
+
+
+class TurnPlans(NamedTuple):
+    plans: list[list[Action] | None]
+    degraded: int
+    """How many agents fell back to fallback_plan() because the deadline had passed."""
+
+
+@dataclass
+class TurnStats:
+    """Instrumentation of the last NPC turn."""
+
+    agents: int = 0
+    """Agent actions so far. Agents faster than the player count once per action."""
+    due: int = 0
+    """Agent actions known to be due, more come up once the agents faster than the player act again."""
+    degraded: int = 0
+    seconds: float = 0.0
+    budget_in_sec: float | None = None
+
+    @property
+    def over_budget(self) -> bool:
+        return self.degraded > 0
+
+
+def fallback_plan(agent: Actor) -> list[Action]:
+    """A cheap stand-in for the agent's own plan, once the turn's AI budget is spent.
+    Busy agents that follow the player's flow field take a step down it, all others wait.
+    Whether the step is blocked by another actor is left to the commit phase."""
+    ai = agent.ai
+    if ai is None or ai.is_idle or not ai.follows_player_flow:
+        return [WaitAction(agent)]
+    game_map = agent.game_map
+    distance, walkable = game_map.dijkstra_map, game_map.tiles["walkable"]
+    best_step, best_distance = None, distance[agent.pos]
+    for dx, dy in INTERCARDINAL_DIRECTIONS:
+        x, y = agent.x + dx, agent.y + dy
+        if (
+            game_map.in_bounds(x, y)
+            and walkable[x, y]
+            and distance[x, y] < best_distance
+        ):
+            best_step, best_distance = (dx, dy), distance[x, y]
+    if best_step is None:
+        return [WaitAction(agent)]
+    return [MoveAction(agent, *best_step)]
+
+
+def plan_turns(
+    agents: Sequence[Actor],
+    *,
+    deadline: float | None = None,
+    executor: Executor | None = None,
+    workers: int = 1,
+) -> TurnPlans:
+    """Lets every agent decide on its actions, in the order of `agents`, without performing them.
+    None means the agent performs during the commit.
+    Agents that come up after `deadline` (a time.perf_counter() value) get a fallback_plan(),
+    unless their AI does not follow the player's flow field, e.g. a confused one, which plans as usual.
+    Planning only reads the world, so with more than one worker it runs on a thread pool.
+    That is opt-in: pathfinding and FOV run in C without holding the GIL, but the tree evaluation
+    itself only scales on a free-threaded Python, elsewhere the pool costs more than it saves.
+    """
+    plans: list[list[Action] | None] = [None] * len(agents)
+    degraded = [False] * len(agents)
+    perf_counter = time.perf_counter
+
+    def plan_chunk(indices: range) -> None:
+        for i in indices:
+            agent = agents[i]
+            if agent.ai is None:
+                plans[i] = []
+            elif (
+                deadline is not None
+                and perf_counter() > deadline
+                and agent.ai.follows_player_flow
+            ):
+                plans[i] = fallback_plan(agent)
+                degraded[i] = True
+            else:
+                plans[i] = agent.ai.plan()
+
+    if workers <= 1 or len(agents) <= 1:
+        plan_chunk(range(len(agents)))
+        return TurnPlans(plans, sum(degraded))
+
+    # striding instead of splitting into blocks keeps every worker going in the order of `agents`,
+    # so when the deadline hits, those at the end of the list are the ones that degrade
+    chunks = [range(start, len(agents), workers) for start in range(workers)]
+    # consuming the results re-raises exceptions from the workers
+    list((executor or shared_executor("npc-plan")).map(plan_chunk, chunks))
+    return TurnPlans(plans, sum(degraded))
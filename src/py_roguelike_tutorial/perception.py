@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from itertools import chain
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from py_roguelike_tutorial.components.ai import BehaviorTreeAI
+from py_roguelike_tutorial.fov import (
+    LocalFov,
+    compute_local_fov,
+    compute_local_fov_batch,
+)
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.engine import Engine
+    from py_roguelike_tutorial.entity import Actor, Entity
+    from py_roguelike_tutorial.types import Coord
+
+
+class Perception:
+    """Who-sees-whom table for the NPCs of the current floor, rebuilt once per turn.
+
+    Sight is FOV-based and treated as symmetric: if the player sees an agent, the agent sees the player,
+    so answering "do I see the player?" is a lookup into the player's FOV for every agent in its radius.
+    Everything else is answered from a FOV per distinct origin tile and radius,
+    which is computed at most once per turn no matter how many agents ask."""
+
+    fov_workers: int = 1
+    """With more than one, the FOVs the shortcut cannot answer are computed up front on that many threads.
+    Otherwise each is computed when first asked for, which is cheaper without spare cores.
+    Opt-in only: the game keeps 1, raise it with e.g. `bench_simulation.py --fov-workers 4`."""
+
+    def __init__(self, engine: Engine, player_fov_radius: int):
+        self.engine = engine
+        self.player_fov_radius = player_fov_radius
+        self._fov_by_origin: dict[tuple[Coord, int], LocalFov] = {}
+        self._sees_player: dict[Actor, bool] = {}
+
+    def refresh(self, agents: list[Actor]) -> None:
+        """Forget last turn's table and fill in whether each of `agents` sees the player.
+        Expects the player's FOV to be up-to-date."""
+        self._fov_by_origin.clear()
+        if self.fov_workers > 1:
+            self.prefetch(self._fov_origins(agents))
+        self._sees_player = {
+            agent: self.can_see(agent, self.engine.player, self.vision_range(agent))
+            for agent in agents
+        }
+
+    def _fov_origins(self, agents: list[Actor]) -> Iterator[tuple[Coord, int]]:
+        """The (origin, radius) of every agent that will ask for more than the player's FOV can tell,
+        i.e. whether it sees the player from beyond the player's FOV radius, or sees entities it is interested in.
+        """
+        senses = [
+            (agent, agent.ai.visual_sense)
+            for agent in agents
+            if isinstance(agent.ai, BehaviorTreeAI)
+        ]
+        interests = set().union(*(sense.interests for _, sense in senses))
+        game_map, player = self.engine.game_map, self.engine.player
+        interesting = [
+            entity
+            for entity in chain(game_map.items, game_map.actors)
+            if entity is not player and interests & set(entity.tags)
+        ]
+        for agent, sense in senses:
+            radius = sense.range
+            if self._needs_fov(agent, player, radius) or any(
+                sense.interests & set(entity.tags)
+                and self._needs_fov(agent, entity, radius)
+                for entity in interesting
+            ):
+                yield agent.pos, radius
+
+    def prefetch(self, origins: Iterable[tuple[Coord, int]]) -> None:
+        """Compute the FOVs of all given (origin, radius) pairs up front, in batches per radius."""
+        origins_by_radius: dict[int, list[Coord]] = defaultdict(list)
+        for pos, radius in set(origins) - self._fov_by_origin.keys():
+            origins_by_radius[radius].append(pos)
+        transparency = self.engine.game_map.tiles["transparent"]
+        for radius, positions in origins_by_radius.items():
+            batch = compute_local_fov_batch(
+                transparency, positions, radius, workers=self.fov_workers
+            )
+            for i, pos in enumerate(positions):
+                self._fov_by_origin[(pos, radius)] = batch.local_fov(i)
+
+    def vision_range(self, agent: Actor) -> int:
+        if isinstance(agent.ai, BehaviorTreeAI):
+            return agent.ai.visual_sense.range
+        return self.player_fov_radius
+
+    def sees_player(self, agent: Actor) -> bool:
+        if agent in self._sees_player:
+            return self._sees_player[agent]
+        sees = self.can_see(agent, self.engine.player, self.vision_range(agent))
+        self._sees_player[agent] = sees
+        return sees
+
+    def can_see(self, viewer: Entity, target: Entity, radius: int) -> bool:
+        if viewer.dist_chebyshev(target) > radius:
+            return False
+        if self._within_player_fov(viewer, target, radius):
+            other = viewer if target is self.engine.player else target
+            return bool(self.engine.game_map.visible[other.pos])
+        return self.fov_from(viewer.pos, radius).is_visible(*target.pos)
+
+    def _within_player_fov(self, viewer: Entity, target: Entity, radius: int) -> bool:
+        """Whether the player is one of the two and the other is within the player's FOV radius,
+        so the player's FOV answers the question."""
+        player = self.engine.player
+        return (target is player or viewer is player) and viewer.dist_euclidean(
+            target
+        ) < min(radius, self.player_fov_radius)
+
+    def _needs_fov(self, viewer: Entity, target: Entity, radius: int) -> bool:
+        """Whether can_see() would compute a FOV from `viewer` for the question."""
+        return viewer.dist_chebyshev(target) <= radius and not self._within_player_fov(
+            viewer, target, radius
+        )
+
+    def fov_from(self, pos: Coord, radius: int) -> LocalFov:
+        """The FOV from the given origin. Agents sharing a tile and radius share the computation."""
+        key = (pos, radius)
+        fov = self._fov_by_origin.get(key)
+        if fov is None:
+            fov = compute_local_fov(
+                transparency=self.engine.game_map.tiles["transparent"],
+                pov=pos,
+                radius=radius,
+            )
+            self._fov_by_origin[key] = fov
+        return fov
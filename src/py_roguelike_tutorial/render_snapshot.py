@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import groupby
+from operator import attrgetter
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
+from tcod.console import Console
+
+from py_roguelike_tutorial.game_map import DEBUG
+from py_roguelike_tutorial.message_log import Message, MessageLog
+from py_roguelike_tutorial.render_functions import (
+    render_dungeon_level,
+    render_hp_bar,
+    render_xp,
+)
+from py_roguelike_tutorial.types import Rgb
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.engine import Engine
+    from py_roguelike_tutorial.entity import Entity
+
+
+class Glyph(NamedTuple):
+    x: int
+    y: int
+    char: str
+    color: Rgb
+
+    @classmethod
+    def of(cls, entity: Entity) -> Glyph:
+        return cls(entity.x, entity.y, entity.char, entity.color)
+
+
+@dataclass(frozen=True)
+class RenderSnapshot:
+    """Everything the in-game view shows, copied out of the engine at one point in time.
+    Rendering it does not touch the engine, so it can be shown while another thread plays turns.
+    The hovered names are left out, they depend on the mouse."""
+
+    tiles: np.ndarray
+    """The map's console colors, already lit and shrouded. Read-only."""
+    stacks: tuple[tuple[Glyph, ...], ...]
+    """Entities sharing a tile take turns being shown, one per tick."""
+    actors: tuple[Glyph, ...]
+    """Rendered on top of anything."""
+    messages: tuple[Message, ...]
+    hp: int
+    max_hp: int
+    current_xp: int
+    xp_needed: int
+    dungeon_level: int
+
+    @classmethod
+    def capture(cls, engine: Engine) -> RenderSnapshot:
+        game_map = engine.game_map
+        scratch = Console(game_map.width, game_map.height, order="F")
+        game_map.render_tiles(scratch)
+        tiles = scratch.rgb.copy()
+        tiles.flags.writeable = False
+        rendered_entities = (
+            game_map.visible_entities if not DEBUG else game_map.entities
+        )
+        sorted_entities = sorted(rendered_entities, key=attrgetter("pos"))
+        stacks = tuple(
+            tuple(Glyph.of(entity) for entity in group)
+            for _, group in groupby(sorted_entities, key=attrgetter("pos"))
+        )
+        player = engine.player
+        return cls(
+            tiles=tiles,
+            stacks=stacks,
+            actors=tuple(Glyph.of(actor) for actor in game_map.visible_actors),
+            # the log shows 5 lines at most, and messages only get longer by wrapping
+            messages=tuple(
+                Message(message.full_text, message.fg)
+                for message in engine.message_log.messages[-5:]
+            ),
+            hp=player.health.hp,
+            max_hp=player.health.max_hp,
+            current_xp=player.level.current_xp,
+            xp_needed=player.level.xp_to_next_level,
+            dungeon_level=engine.game_world.current_floor,
+        )
+
+    def render(self, console: Console, tick: int) -> None:
+        """Renders like Engine.render() does, without the hovered names."""
+        width, height = self.tiles.shape
+        console.rgb[0:width, 0:height] = self.tiles
+        for stack in self.stacks:
+            glyph = stack[tick % len(stack)]
+            console.print(glyph.x, glyph.y, glyph.char, fg=glyph.color)
+        for glyph in self.actors:
+            console.print(glyph.x, glyph.y, glyph.char, fg=glyph.color)
+        MessageLog.render_messages(console, 21, 45, 40, 5, self.messages)
+        render_hp_bar(console, self.hp, self.max_hp, 20)
+        render_xp(console, self.current_xp, self.xp_needed, x=0, y=46)
+        render_dungeon_level(console, self.dungeon_level, x=0, y=47)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import heapq
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.entity import Actor
+
+ACTION_COST = 100
+"""Energy an action costs. The time that passes on a player turn is measured in the same unit."""
+
+NORMAL_SPEED = 100
+"""Energy an actor gains per player turn when it is as fast as the player."""
+
+
+def action_delay(actor: Actor) -> int:
+    """Time it takes the actor to gather the energy for its next action."""
+    return max(1, ACTION_COST * NORMAL_SPEED // actor.speed)
+
+
+class TurnScheduler:
+    """Decides when the awake agents of a floor act, by the energy they gather at their speed.
+    Agents wait in a heap keyed by the time their next action is due, so a turn only touches
+    the agents that are due, and ties resolve in the order the agents were scheduled
+    rather than in hash order."""
+
+    def __init__(self):
+        self.time = 0
+        self._queue: list[tuple[int, int, Actor]] = []
+        self._entries: dict[Actor, int] = {}
+        """Sequence number of every scheduled agent's live heap entry. Other entries are stale."""
+        self._sequence = 0
+
+    def __contains__(self, actor: Actor) -> bool:
+        return actor in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, actor: Actor) -> None:
+        """Schedules the agent to act right away."""
+        self._push(actor, self.time)
+
+    def remove(self, actor: Actor) -> None:
+        # its heap entry goes stale and is skipped once it comes up
+        self._entries.pop(actor, None)
+
+    def pop_due(self, until: int) -> list[Actor]:
+        """The agents whose next action is due before `until`, in the order they act.
+        Each agent appears at most once, it is rescheduled after its action right away.
+        A fast agent that is still due afterward comes up again on the next call."""
+        queue, entries = self._queue, self._entries
+        due: list[tuple[int, Actor]] = []
+        while queue and queue[0][0] < until:
+            ready_at, sequence, actor = heapq.heappop(queue)
+            if entries.get(actor) == sequence:
+                due.append((ready_at, actor))
+        for ready_at, actor in due:
+            # counting from when the action was due carries over energy the agent gathered in excess
+            self._push(actor, ready_at + action_delay(actor))
+        return [actor for _, actor in due]
+
+    def _push(self, actor: Actor, ready_at: int) -> None:
+        self._sequence += 1
+        self._entries[actor] = self._sequence
+        heapq.heappush(self._queue, (ready_at, self._sequence, actor))
@@ -14,13 +14,31 @@ class ScreenStack:
         )  # Initialize an empty list to store stack elements
         self.debug = True
         self.id = uuid.uuid4()
+        self.held: list[BaseEventHandler] | None = None
+        """Items pushed while holding, e.g. while another thread plays turns."""
 
     def push(self, item: BaseEventHandler):
         """Add an item to the top of the stack."""
+        if self.held is not None:
+            self.held.append(item)
+            if self.debug:
+                print(f"Held {item}. stack_size:{self.size()}, {self.id}")
+            return
         self.items.append(item)
         if self.debug:
             print(f"Pushed {item}. stack_size:{self.size()}, {self.id}")
 
+    def hold(self):
+        """Collect pushed items instead of adding them, until released."""
+        if self.held is None:
+            self.held = []
+
+    def release(self):
+        """Add the items pushed since holding, in order."""
+        held, self.held = self.held, None
+        for item in held or ():
+            self.push(item)
+
     def clear(self):
         """Clear the stack."""
         self.items.clear()
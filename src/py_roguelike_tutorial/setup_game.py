@@ -1,6 +1,4 @@
-import lzma
 import os
-import pickle
 import sys
 import traceback
 
@@ -14,8 +12,9 @@ from tcod.libtcodpy import BKGND_ALPHA
 from py_roguelike_tutorial.constants import Theme
 from py_roguelike_tutorial.components.factions_manager import FactionsManager
 from py_roguelike_tutorial.constants import AUTOSAVE_FILENAME, RNG_SEED
-from py_roguelike_tutorial.engine import Engine
+from py_roguelike_tutorial.engine import Engine, read_save_file
 from py_roguelike_tutorial.entity_factory import EntityPrefabs
+from py_roguelike_tutorial.exceptions import IncompatibleSave
 from py_roguelike_tutorial.events.event_bus import EventBus
 from py_roguelike_tutorial.game_world import GameWorld
 from py_roguelike_tutorial.handlers.base_event_handler import BaseEventHandler
@@ -62,9 +61,7 @@ def new_game(stack: ScreenStack) -> Engine:
 
 def load_game(filepath: str):
     """Load an engine from a file."""
-    with open(filepath, "rb") as f:
-        engine = pickle.loads(lzma.decompress(f.read()))
-    assert isinstance(engine, Engine)
+    engine = read_save_file(filepath)
     EventBusSubscribers(engine).add_subscribers()
     return engine
 
@@ -151,6 +148,8 @@ class MainMenu(BaseEventHandler):
             return PopupMessage(
                 self.stack, f"No save file named {AUTOSAVE_FILENAME} found."
             )
+        except IncompatibleSave as exc:
+            return PopupMessage(self.stack, f"Cannot continue this game:\n{exc}")
         except Exception as exc:
             traceback.print_exc()
             return PopupMessage(self.stack, f"Failed to load save file:\n{exc}")
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass, fields
+from typing import TYPE_CHECKING, Callable, Iterable
+
+from py_roguelike_tutorial import setup_game
+from py_roguelike_tutorial.actions import (
+    Action,
+    MeleeAction,
+    MoveAction,
+    TakeStairsAction,
+    WaitAction,
+)
+from py_roguelike_tutorial.constants import INTERCARDINAL_DIRECTIONS, RNG_SEED
+from py_roguelike_tutorial.entity_factory import EntityPrefabs
+from py_roguelike_tutorial.exploration import FrontierMap
+from py_roguelike_tutorial.screen_stack import ScreenStack
+from py_roguelike_tutorial.stepping import StopReason
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.engine import Engine
+    from py_roguelike_tutorial.entity import Actor
+    from py_roguelike_tutorial.game_map import GameMap
+
+type PlayerPolicy = Callable[[Engine], Action]
+"""Decides the player's next action in place of the keyboard."""
+
+
+class ScriptedPlayer:
+    """Plays the given actions in order, then waits for good."""
+
+    def __init__(self, script: Iterable[Callable[[Actor], Action]]):
+        self._script = iter(script)
+
+    def __call__(self, engine: Engine) -> Action:
+        make_action = next(self._script, WaitAction)
+        return make_action(engine.player)
+
+
+class BotPlayer:
+    """Attacks adjacent hostiles, explores the floor and takes the stairs once nothing is left to explore,
+    so that a run plays its floors rather than mostly generating them.
+    Wanders randomly where its way is blocked, e.g. by a friendly NPC.
+    Has its own RNG, so it does not change the game's random sequence."""
+
+    max_turns_per_floor = 1000
+    """Heads for the stairs after that many turns, even if parts of the floor are left unexplored."""
+
+    def __init__(self, seed: int = RNG_SEED):
+        self.rng = random.Random(seed)
+        self.frontier = FrontierMap()
+        self._floor: GameMap | None = None
+        self._turns_on_floor = 0
+
+    def __call__(self, engine: Engine) -> Action:
+        player = engine.player
+        game_map = engine.game_map
+        # neighbors in a fixed order rather than the map's entity set, so runs are reproducible
+        for dx, dy in INTERCARDINAL_DIRECTIONS:
+            actor = game_map.get_actor_at_location(player.x + dx, player.y + dy)
+            if actor and "attitude:friendly" not in actor.tags:
+                return MeleeAction(player, dx, dy)
+        if game_map is not self._floor:
+            self._floor, self._turns_on_floor = game_map, 0
+        self._turns_on_floor += 1
+        step = None
+        if self._turns_on_floor <= self.max_turns_per_floor:
+            step = self.frontier.next_step(game_map, player.pos)
+        if step is None:
+            stairs = game_map.downstairs_location
+            if player.pos == stairs:
+                return TakeStairsAction(player)
+            step = engine.travel_maps.next_step(game_map, player.pos, stairs)
+        if step is not None:
+            move = MoveAction(player, *step)
+            if move.can_perform():
+                return move
+        dx, dy = self.rng.choice(INTERCARDINAL_DIRECTIONS)
+        return MoveAction(player, dx, dy)
+
+
+@dataclass
+class SimulationStats:
+    turns: int = 0
+    refused: int = 0
+    """Player actions that were impossible, which does not let a turn pass."""
+    npc_actions: int = 0
+    degraded: int = 0
+    seconds: float = 0.0
+
+    def __add__(self, other: SimulationStats) -> SimulationStats:
+        """The stats of both runs together, e.g. of several games."""
+        return SimulationStats(
+            *(getattr(self, f.name) + getattr(other, f.name) for f in fields(self))
+        )
+
+    @property
+    def turns_per_second(self) -> float:
+        return self.turns / self.seconds if self.seconds > 0 else 0.0
+
+
+class Simulation:
+    """Plays the game without a window, console or event loop, and never renders,
+    e.g. for soak tests and benchmarks. The player's actions come from a PlayerPolicy.
+    Level ups always go into max HP. NPC turns are resolved in full, without a time budget,
+    so that a run depends on nothing but the seeds."""
+
+    def __init__(self, engine: Engine, player: PlayerPolicy):
+        self.engine = engine
+        self.player = player
+        self.stats = SimulationStats()
+
+    @classmethod
+    def new_game(cls, player: PlayerPolicy, *, seed: int = RNG_SEED) -> Simulation:
+        from py_roguelike_tutorial.main import load_data_files
+
+        if not EntityPrefabs.npcs:
+            load_data_files()
+        random.seed(seed)
+        stack = ScreenStack()
+        # handlers pushed by events, e.g. animations, are never shown, so do not log them either
+        stack.debug = False
+        engine = setup_game.new_game(stack)
+        engine.ai_budget_in_sec = None
+        engine.amortize_min_agents = None
+        return cls(engine, player)
+
+    @property
+    def player_is_alive(self) -> bool:
+        return self.engine.player.is_alive
+
+    def step(self) -> bool:
+        """Plays the player's next action and, if it was possible, the NPCs' turn after it.
+        Returns whether the player is still alive."""
+        engine = self.engine
+        start = time.perf_counter()
+        result = engine.step(1, policy=self.player)
+        if result.reason is StopReason.Refused:
+            self.stats.refused += 1
+        else:
+            self.stats.turns += 1
+            self.stats.npc_actions += engine.npc_turn_stats.agents
+            self.stats.degraded += engine.npc_turn_stats.degraded
+            level = engine.player.level
+            while engine.player.is_alive and level.requires_level_up:
+                level.increase_max_hp()
+        self.stats.seconds += time.perf_counter() - start
+        return self.player_is_alive
+
+    def run(self, steps: int) -> SimulationStats:
+        """Steps until `steps` player actions were tried or the player died."""
+        for _ in range(steps):
+            if not self.step():
+                break
+        return self.stats
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from enum import StrEnum
+from typing import TYPE_CHECKING, Callable, NamedTuple
+
+if TYPE_CHECKING:
+    from py_roguelike_tutorial.engine import Engine
+
+type StopCondition = Callable[[Engine], bool]
+"""Checked after every turn of Engine.step(), which stops once it returns True."""
+
+
+class StopReason(StrEnum):
+    Completed = "completed"
+    Refused = "refused"
+    """The player's action was impossible, see the message log for why."""
+    PlayerDied = "player_died"
+    Condition = "condition"
+
+
+class StepResult(NamedTuple):
+    turns: int
+    """Turns that passed, including the one that triggered the stop."""
+    reason: StopReason
+    condition: StopCondition | None = None
+    """The condition that stopped the batch, for StopReason.Condition."""
+
+
+def enemy_in_view(engine: Engine) -> bool:
+    player = engine.player
+    return any(
+        actor is not player and "attitude:friendly" not in actor.tags
+        for actor in engine.game_map.visible_actors
+        if actor.is_alive
+    )
+
+
+class HpDropped:
+    """Stops once the player has less HP than when the condition was created.
+    A class rather than a closure, so handlers holding it can be pickled with the engine.
+    """
+
+    def __init__(self, engine: Engine):
+        self.start_hp = engine.player.health.hp
+
+    def __call__(self, engine: Engine) -> bool:
+        return engine.player.health.hp < self.start_hp
@@ -1,5 +1,10 @@
 import os
 import sys
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+_executors: dict[str, Executor] = {}
+_executors_lock = threading.Lock()
 
 
 def assets_filepath(filename: str):
@@ -24,3 +29,12 @@ def assets_filepath(filename: str):
         result = os.path.join(dirname, filename)
         return result
     return os.path.join(datadir, filename)
+
+
+def shared_executor(name: str, max_workers: int | None = None) -> Executor:
+    """The thread pool called `name`, created on first use and kept for the rest of the process.
+    Its threads are named after it, `max_workers` only counts when it gets created."""
+    with _executors_lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        return _executors[name]
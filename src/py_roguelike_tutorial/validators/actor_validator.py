@@ -1,6 +1,6 @@
 from typing import Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class VisionData(BaseModel):
@@ -71,4 +71,5 @@ class ActorData(BaseModel):
     equipment: EquipmentData
     ranged: RangedData | None = None
     move_stepsize: int = 1
+    speed: int = Field(default=100, gt=0)
     tags: list[str]
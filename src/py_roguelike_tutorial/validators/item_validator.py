@@ -1,6 +1,6 @@
 from typing import Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from py_roguelike_tutorial.components.equipment_type import EquipmentType
 
@@ -64,6 +64,12 @@ class EquippableData(BaseModel):
     ranged_power: int | None = None
 
 
+class LightSourceData(BaseModel):
+    radius: int
+    color: str
+    intensity: float = Field(default=1.0, ge=0, le=1)
+
+
 class ItemData(BaseModel):
     char: str
     color: str
@@ -83,3 +89,4 @@ class ItemData(BaseModel):
         | None
     ) = None
     equippable: EquippableData | None = None
+    light: LightSourceData | None = None
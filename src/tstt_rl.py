@@ -1,6 +1,13 @@
 # main entrypoint file. I would love to name this `main.py` but nuitka drops file extensions if I use --output-filename=tstt_rl
 
-from py_roguelike_tutorial.main import main
+import asyncio
+import sys
+
+from py_roguelike_tutorial.main import main, main_async
 
 if __name__ == "__main__":
-    main()
+    # the asyncio-driven loop is opt-in for now
+    if "--asyncio" in sys.argv:
+        asyncio.run(main_async())
+    else:
+        main()
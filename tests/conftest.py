@@ -0,0 +1,10 @@
+import pytest
+
+from py_roguelike_tutorial.engine import Engine
+from py_roguelike_tutorial.simulation import ScriptedPlayer, Simulation
+
+
+@pytest.fixture
+def engine() -> Engine:
+    """A new game on its first floor, without a window."""
+    return Simulation.new_game(ScriptedPlayer([])).engine
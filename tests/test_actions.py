@@ -0,0 +1,210 @@
+import pytest
+
+from py_roguelike_tutorial import tile_types
+from py_roguelike_tutorial.actions import (
+    BumpAction,
+    DropItemAction,
+    ItemAction,
+    MeleeAction,
+    MoveAction,
+    PickupAction,
+    RangedAttackAction,
+    Refusal,
+    TakeStairsAction,
+    TalkAction,
+)
+from py_roguelike_tutorial.engine import Engine
+from py_roguelike_tutorial.entity import Actor, Item
+from py_roguelike_tutorial.entity_factory import EntityPrefabs
+from py_roguelike_tutorial.exceptions import Impossible
+
+ARENA = (slice(5, 20), slice(5, 20))
+"""A walled room, with the player at its center."""
+CENTER = (12, 12)
+
+
+@pytest.fixture
+def arena(engine: Engine) -> Engine:
+    """The first floor emptied of everything but the player, who stands in a visible room."""
+    game_map = engine.game_map
+    for entity in list(game_map.entities):
+        if entity is not engine.player:
+            game_map.remove_entity(entity)
+    game_map.tiles[...] = tile_types.wall
+    game_map.tiles[ARENA] = tile_types.floor
+    game_map.visible[...] = False
+    game_map.visible[ARENA] = True
+    game_map.downstairs_location = (ARENA[0].start, ARENA[1].start)
+    engine.player.place(*CENTER)
+    return engine
+
+
+def spawn_npc(engine: Engine, prefab: str, dx: int, dy: int) -> Actor:
+    x, y = CENTER
+    return EntityPrefabs.npcs[prefab].spawn(engine.game_map, x + dx, y + dy)
+
+
+def carried(engine: Engine, prefab: str) -> Item:
+    item = EntityPrefabs.items[prefab].spawn(engine.game_map, *CENTER)
+    PickupAction(engine.player).perform()
+    return item
+
+
+def test_melee_refuses_when_nobody_is_there(arena: Engine):
+    assert MeleeAction(arena.player, 1, 0).validate() is Refusal.NothingToAttack
+    spawn_npc(arena, "orc", 1, 0)
+    assert MeleeAction(arena.player, 1, 0).validate() is None
+
+
+@pytest.mark.parametrize("dx, dy", [(8, 0), (-100, 0)], ids=["wall", "off_map"])
+def test_move_refuses_walls_and_the_map_edge(arena: Engine, dx: int, dy: int):
+    assert MoveAction(arena.player, dx, dy).validate() is Refusal.Blocked
+
+
+def test_move_refuses_blocking_entities(arena: Engine):
+    assert MoveAction(arena.player, 1, 0).validate() is None
+    spawn_npc(arena, "orc", 1, 0)
+    assert MoveAction(arena.player, 1, 0).validate() is Refusal.Blocked
+
+
+def test_ranged_attack_needs_a_bow_and_arrows(arena: Engine):
+    assert arena.player.ranged is None
+    action = RangedAttackAction(arena.player)
+    assert action.validate() is Refusal.NoRangedWeapon
+
+    archer = spawn_npc(arena, "orc_archer", 3, 0)
+    assert RangedAttackAction(archer).validate() is None
+    archer.inventory.replace_all([])
+    action = RangedAttackAction(archer)
+    assert action.validate() is Refusal.NoArrows
+    assert archer.name in Refusal.NoArrows.message(action)
+
+
+def test_only_friendly_actors_talk(arena: Engine):
+    orc = spawn_npc(arena, "orc", 1, 0)
+    action = TalkAction(arena.player, orc)
+    assert action.validate() is Refusal.NotInterested
+    assert Refusal.NotInterested.message(action).startswith(orc.name)
+
+    shopkeeper = spawn_npc(arena, "shopkeeper", -1, 0)
+    assert TalkAction(arena.player, shopkeeper).validate() is None
+
+
+def test_pickup_needs_an_item_and_room_for_it(arena: Engine):
+    assert PickupAction(arena.player).validate() is Refusal.NothingToPickUp
+    EntityPrefabs.items["dagger"].spawn(arena.game_map, *CENTER)
+    assert PickupAction(arena.player).validate() is None
+    inventory = arena.player.inventory
+    inventory._capacity = inventory.len
+    assert PickupAction(arena.player).validate() is Refusal.InventoryFull
+
+
+def test_stairs_are_taken_only_where_they_are(arena: Engine):
+    assert TakeStairsAction(arena.player).validate() is Refusal.NoStairs
+    arena.game_map.downstairs_location = CENTER
+    assert TakeStairsAction(arena.player).validate() is None
+
+
+def test_healing_is_refused_at_full_health(arena: Engine):
+    potion = carried(arena, "health_potion")
+    health = arena.player.health
+    assert health.hp == health.max_hp
+    assert ItemAction(arena.player, potion).validate() is Refusal.FullHealth
+
+    health.hp -= 1
+    assert ItemAction(arena.player, potion).try_perform() is None
+    assert health.hp == health.max_hp
+
+
+def test_items_are_dropped_whatever_using_them_would_do(arena: Engine):
+    potion = carried(arena, "health_potion")
+    scroll = carried(arena, "lightning_scroll")
+    for item in (potion, scroll):
+        assert ItemAction(arena.player, item).validate() is not None
+        DropItemAction(arena.player, item).perform()
+        assert item not in arena.player.inventory.items
+        assert item in arena.game_map.entities
+
+
+def test_lightning_needs_a_visible_enemy_in_range(arena: Engine):
+    scroll = carried(arena, "lightning_scroll")
+    assert ItemAction(arena.player, scroll).validate() is Refusal.NoEnemyInRange
+
+    spawn_npc(arena, "orc", 6, 0)  # out of range
+    assert ItemAction(arena.player, scroll).validate() is Refusal.NoEnemyInRange
+
+    orc = spawn_npc(arena, "orc", 3, 0)
+    hp = orc.health.hp
+    assert ItemAction(arena.player, scroll).try_perform() is None
+    assert orc.health.hp < hp
+
+
+def test_fireball_needs_targets_in_its_radius(arena: Engine):
+    scroll = carried(arena, "fireball_scroll")
+    x, y = CENTER
+    empty_spot = (x + 5, y)
+    action = ItemAction(arena.player, scroll, empty_spot)
+    assert action.validate() is Refusal.NoTargetsInRadius
+
+    # unseen targets are not refused up front, activating them tells the player why not
+    unseen_spot = (x + 5, y + 5)
+    arena.game_map.visible[unseen_spot] = False
+    assert ItemAction(arena.player, scroll, unseen_spot).validate() is None
+
+    orc = spawn_npc(arena, "orc", 6, 0)
+    hp = orc.health.hp
+    assert action.validate() is None
+    action.perform()
+    assert orc.health.hp < hp
+
+
+def test_refused_actions_do_nothing(arena: Engine):
+    wall = MoveAction(arena.player, 8, 0)
+    assert not wall.can_perform()
+    assert wall.try_perform() is Refusal.Blocked
+    assert arena.player.pos == CENTER
+
+    with pytest.raises(Impossible, match=Refusal.Blocked.value):
+        wall.perform()
+    assert arena.player.pos == CENTER
+
+
+def test_valid_actions_are_performed(arena: Engine):
+    step = MoveAction(arena.player, 1, 0)
+    assert step.can_perform()
+    assert step.try_perform() is None
+    assert arena.player.pos == (CENTER[0] + 1, CENTER[1])
+
+
+def test_refusal_messages_name_the_actor(arena: Engine):
+    action = RangedAttackAction(arena.player)
+    with pytest.raises(Impossible) as refused:
+        action.perform()
+    assert str(refused.value) == Refusal.NoRangedWeapon.message(action)
+    assert arena.player.name in str(refused.value)
+
+
+def test_bump_resolves_by_what_is_in_the_way(arena: Engine):
+    player = arena.player
+    assert isinstance(BumpAction(player, 1, 0).resolve(), MoveAction)
+
+    spawn_npc(arena, "orc", 1, 0)
+    assert isinstance(BumpAction(player, 1, 0).resolve(), MeleeAction)
+
+    spawn_npc(arena, "shopkeeper", -1, 0)
+    talk = BumpAction(player, -1, 0).resolve()
+    assert isinstance(talk, TalkAction)
+    assert talk.validate() is None
+
+    x, y = CENTER
+    EntityPrefabs.props["treasure_chest"].spawn(arena.game_map, x, y + 1)
+    bump = BumpAction(player, 0, 1)
+    assert bump.resolve() is None
+    assert bump.validate() is None
+
+
+def test_bump_into_a_wall_is_refused_like_the_move(arena: Engine):
+    bump = BumpAction(arena.player, 8, 0)
+    assert bump.validate() is Refusal.Blocked
+    with pytest.raises(Impossible, match=Refusal.Blocked.value):
+        bump.perform()
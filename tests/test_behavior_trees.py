@@ -0,0 +1,357 @@
+import threading
+from typing import Any, Callable
+
+import pytest
+
+from py_roguelike_tutorial.behavior_trees import validators as bt_val
+from py_roguelike_tutorial.behavior_trees.behavior_trees import (
+    BtAction,
+    BtCondition,
+    BtConstructorArgs,
+    BtContext,
+    BtMemorySelector,
+    BtMemorySequence,
+    BtNode,
+    BtResult,
+    BtRoot,
+    BtSelector,
+    BtSequence,
+    CompiledTick,
+    Dependency,
+    MemoStats,
+    union_dependencies,
+)
+from py_roguelike_tutorial.behavior_trees.behaviors import MoveToEntityBehavior
+from py_roguelike_tutorial.engine import Engine
+from py_roguelike_tutorial.entity_factory import EntityPrefabs
+from py_roguelike_tutorial.pathfinding import find_path
+
+Success, Failure, Running = BtResult.Success, BtResult.Failure, BtResult.Running
+
+
+class Probe(BtCondition):
+    """A condition returning whatever the test set as its result, counting its ticks."""
+
+    def __init__(
+        self,
+        name: str,
+        result: BtResult = Success,
+        dependencies: tuple[Dependency, ...] | None = None,
+    ):
+        super().__init__(BtConstructorArgs([], name))
+        self.result = result
+        self.ticks = 0
+        self._dependencies = dependencies
+
+    def tick(self, ctx: BtContext) -> BtResult:
+        self.ticks += 1
+        return self.result
+
+    def dependencies(self) -> tuple[Dependency, ...] | None:
+        return self._dependencies
+
+
+class Step(BtAction):
+    """An action returning whatever the test set as its result, counting its ticks and resets."""
+
+    def __init__(self, result: BtResult = Success):
+        super().__init__(BtConstructorArgs([], None))
+        self.result = result
+        self.ticks = 0
+        self.resets = 0
+
+    def tick(self, ctx: BtContext) -> BtResult:
+        self.ticks += 1
+        return self.result
+
+    def reset(self, ctx: BtContext) -> None:
+        self.resets += 1
+        super().reset(ctx)
+
+
+def on_blackboard(key: str) -> tuple[Dependency, ...]:
+    return (Dependency(key, lambda ctx: ctx.blackboard.get(key)),)
+
+
+def root(*children: BtNode) -> BtRoot:
+    return BtRoot(BtConstructorArgs(list(children), None))
+
+
+def sequence(*children: BtNode) -> BtSequence:
+    return BtSequence(BtConstructorArgs(list(children), None))
+
+
+def selector(*children: BtNode) -> BtSelector:
+    return BtSelector(BtConstructorArgs(list(children), None))
+
+
+def memory_sequence(*children: BtNode) -> BtMemorySequence:
+    return BtMemorySequence(BtConstructorArgs(list(children), None))
+
+
+def memory_selector(*children: BtNode) -> BtMemorySelector:
+    return BtMemorySelector(BtConstructorArgs(list(children), None))
+
+
+type Ticker = Callable[[BtRoot], CompiledTick]
+
+
+@pytest.fixture(params=["graph walk", "compiled"])
+def ticker(request: pytest.FixtureRequest) -> Ticker:
+    """Both forms of a tree must behave the same, tick by tick."""
+    if request.param == "compiled":
+        return lambda tree: tree.compiled
+    return lambda tree: tree.tick
+
+
+def test_repeated_conditions_are_evaluated_once_per_tick():
+    a, b, a_again = Probe("a"), Probe("b"), Probe("a")
+    tree = root(a, sequence(b, a_again))
+    ctx = BtContext()
+
+    assert tree.compiled(ctx) is Success
+    assert (a.ticks, b.ticks, a_again.ticks) == (1, 1, 0)
+    # the next tick starts with an empty memo
+    assert tree.compiled(ctx) is Success
+    assert (a.ticks, b.ticks, a_again.ticks) == (2, 2, 0)
+
+
+def test_actions_invalidate_the_memo():
+    a, a_again = Probe("a"), Probe("a")
+    tree = root(a, Step(), a_again)
+
+    assert tree.compiled(BtContext()) is Success
+    assert (a.ticks, a_again.ticks) == (1, 1)
+
+
+def test_conditions_that_do_not_repeat_are_not_memoized():
+    tree = root(Probe("a"), Step())
+    ctx = BtContext()
+
+    tree.compiled(ctx)
+    assert ctx.memo == {}
+
+
+def test_memo_stats_only_count_while_enabled():
+    a, b, a_again = Probe("a"), Probe("b"), Probe("a")
+    MemoStats.clear()
+    tree = root(a, b, a_again)
+    tree.compiled(BtContext())
+    assert not MemoStats.hits and not MemoStats.misses
+
+    MemoStats.enable()
+    try:
+        tree.compiled(BtContext())
+    finally:
+        MemoStats.disable()
+    assert MemoStats.hits[a.memo_key] == 1
+    assert MemoStats.misses[a.memo_key] == 1
+    assert b.memo_key not in MemoStats.misses
+    MemoStats.clear()
+
+
+class Gate(BtCondition):
+    """A condition whose compilation waits until the test opens the gate."""
+
+    def __init__(self):
+        super().__init__(BtConstructorArgs([], None))
+        self.entered, self.opened = threading.Event(), threading.Event()
+
+    def tick(self, ctx: BtContext) -> BtResult:
+        return Success
+
+    def compile(self) -> CompiledTick:
+        self.entered.set()
+        assert self.opened.wait(timeout=5)
+        return super().compile()
+
+
+def test_trees_compiling_on_other_threads_keep_their_memo():
+    gate, a, a_again = Gate(), Probe("a"), Probe("a")
+    tree = root(gate, a, a_again)
+    other_tree = root(Probe("b"))
+    first = threading.Thread(target=lambda: tree.compiled)
+    first.start()
+    assert gate.entered.wait(timeout=5)
+    # compiling another tree meanwhile must not reset the first tree's memo keys
+    second = threading.Thread(target=lambda: other_tree.compiled)
+    second.start()
+    second.join(timeout=0.1)
+    gate.opened.set()
+    first.join()
+    second.join()
+
+    tree.compiled(BtContext())
+    assert (a.ticks, a_again.ticks) == (1, 0)
+
+
+def test_memory_sequence_resumes_at_the_running_child(ticker: Ticker):
+    condition, walk, arrive = Probe("condition"), Step(Running), Step()
+    tick = ticker(root(memory_sequence(condition, walk, arrive)))
+    ctx = BtContext()
+
+    assert tick(ctx) is Running
+    assert tick(ctx) is Running
+    assert (condition.ticks, walk.ticks, arrive.ticks) == (1, 2, 0)
+
+    walk.result = Success
+    assert tick(ctx) is Success
+    assert (condition.ticks, walk.ticks, arrive.ticks) == (1, 3, 1)
+    # finished, so the next tick starts over
+    assert tick(ctx) is Success
+    assert condition.ticks == 2
+
+
+def test_memory_selector_does_not_retry_the_children_before_the_running_one(
+    ticker: Ticker,
+):
+    first_choice, fallback = Step(Failure), Step(Running)
+    tick = ticker(root(memory_selector(first_choice, fallback)))
+    ctx = BtContext()
+
+    assert tick(ctx) is Running
+    first_choice.result = Success
+    assert tick(ctx) is Running
+    assert (first_choice.ticks, fallback.ticks) == (1, 2)
+
+    fallback.result = Failure
+    assert tick(ctx) is Failure
+    assert tick(ctx) is Success
+    assert (first_choice.ticks, fallback.ticks) == (2, 3)
+
+
+def test_selector_retries_higher_priorities_and_aborts_the_running_child(
+    ticker: Ticker,
+):
+    flee_condition, wander = Probe("flee", Failure), Step(Running)
+    flee = Step()
+    tick = ticker(root(selector(sequence(flee_condition, flee), wander)))
+    ctx = BtContext()
+
+    assert tick(ctx) is Running
+    assert tick(ctx) is Running
+    assert (flee_condition.ticks, wander.ticks, wander.resets) == (2, 2, 0)
+
+    flee_condition.result = Success
+    assert tick(ctx) is Success
+    assert (flee.ticks, wander.ticks, wander.resets) == (1, 2, 1)
+    assert ctx.running == {}
+
+
+def test_guards_are_skipped_while_their_dependencies_hold():
+    guard, action = Probe("guard", dependencies=on_blackboard("hp")), Step(Running)
+    tick = root(sequence(guard, action)).compiled
+    ctx = BtContext()
+    ctx.blackboard.set("hp", 10)
+
+    assert tick(ctx) is Running
+    assert tick(ctx) is Running
+    assert (guard.ticks, action.ticks) == (1, 2)
+
+    # a changed dependency re-checks the guard, which now aborts the running action
+    guard.result = Failure
+    ctx.blackboard.set("hp", 3)
+    assert tick(ctx) is Failure
+    assert (guard.ticks, action.ticks, action.resets) == (2, 2, 1)
+
+
+def test_a_failed_guard_decides_until_its_dependencies_change():
+    guard, action = Probe("guard", Failure, on_blackboard("hp")), Step()
+    tick = root(sequence(guard, action)).compiled
+    ctx = BtContext()
+    ctx.blackboard.set("hp", 10)
+
+    assert tick(ctx) is Failure
+    assert tick(ctx) is Failure
+    assert (guard.ticks, action.ticks) == (1, 0)
+
+    guard.result = Success
+    ctx.blackboard.set("hp", 3)
+    assert tick(ctx) is Success
+    assert (guard.ticks, action.ticks) == (2, 1)
+
+
+def test_guards_need_every_node_in_front_to_be_reactive():
+    unreactive, guard, action = Probe("a"), Probe("b", dependencies=()), Step()
+    tick = root(sequence(unreactive, guard, action)).compiled
+    ctx = BtContext()
+
+    tick(ctx)
+    tick(ctx)
+    assert (unreactive.ticks, guard.ticks, action.ticks) == (2, 2, 2)
+
+
+@pytest.mark.parametrize(
+    "read, unchanged",
+    [
+        (lambda: (1, 2), True),  # equal plain values, even if not the same tuple
+        (lambda: [1, 2], False),  # anything else is compared by identity
+        (lambda: object(), False),
+    ],
+)
+def test_dependencies_compare_plain_values_by_equality(
+    read: Callable[[], Any], unchanged: bool
+):
+    guard = Probe("guard", dependencies=(Dependency("value", lambda ctx: read()),))
+    tick = root(sequence(guard, Step())).compiled
+    ctx = BtContext()
+
+    tick(ctx)
+    tick(ctx)
+    assert guard.ticks == (1 if unchanged else 2)
+
+
+def test_union_dependencies_merges_by_key_unless_a_node_is_not_reactive():
+    hp, hp_again, pos = on_blackboard("hp"), on_blackboard("hp"), on_blackboard("pos")
+    reactive = [Probe("a", dependencies=hp), Probe("b", dependencies=hp_again + pos)]
+
+    union = union_dependencies(reactive)
+    assert union is not None
+    assert [dependency.key for dependency in union] == ["hp", "pos"]
+    assert union_dependencies([*reactive, Step()]) is None
+
+
+def test_move_to_entity_walks_over_several_ticks(engine: Engine):
+    game_map = engine.game_map
+    walkable = [
+        (int(x), int(y))
+        for x, y in zip(*game_map.tiles["walkable"].nonzero())
+        if not game_map.is_blocked(int(x), int(y))
+    ]
+    start = walkable[0]
+    goal = next(pos for pos in walkable if len(find_path(start, pos, engine)) == 3)
+    agent = EntityPrefabs.npcs["orc_archer"].spawn(game_map, *start)
+    target = EntityPrefabs.items["dagger"].spawn(game_map, *goal)
+    move = MoveToEntityBehavior(
+        BtConstructorArgs([], bt_val.MoveToEntityDataParams(to="$target"))
+    )
+    tick = root(move).compiled
+    ctx = BtContext()
+    ctx.bind(agent=agent, player=engine.player, engine=engine)
+    ctx.blackboard.set("target", target)
+
+    assert tick(ctx) is Running
+    state = ctx.node_state[move]
+    assert [tick(ctx), tick(ctx)] == [Running, Running]
+    # the path was searched once and kept between the ticks
+    assert ctx.node_state[move] is state
+    assert agent.pos == goal
+
+    assert tick(ctx) is Success
+    assert move not in ctx.node_state
+
+
+def test_move_to_entity_fails_once_the_target_is_gone(engine: Engine):
+    game_map = engine.game_map
+    agent = EntityPrefabs.npcs["orc_archer"].spawn(game_map, *engine.player.pos)
+    target = EntityPrefabs.items["dagger"].spawn(game_map, 0, 0)
+    move = MoveToEntityBehavior(
+        BtConstructorArgs([], bt_val.MoveToEntityDataParams(to="$target"))
+    )
+    ctx = BtContext()
+    ctx.bind(agent=agent, player=engine.player, engine=engine)
+    ctx.blackboard.set("target", target)
+    game_map.remove_entity(target)
+
+    assert root(move).compiled(ctx) is Failure
+    assert move not in ctx.node_state
@@ -0,0 +1,81 @@
+import numpy as np
+
+from py_roguelike_tutorial.engine import Engine
+from py_roguelike_tutorial.entity import Actor
+from py_roguelike_tutorial.entity_factory import EntityPrefabs
+from py_roguelike_tutorial.events.events import NoiseEvent
+from py_roguelike_tutorial.types import Coord
+
+
+def sleeper(engine: Engine, pos: Coord) -> Actor:
+    agent = EntityPrefabs.npcs["orc_archer"].spawn(engine.game_map, *pos)
+    assert agent.ai is not None
+    agent.ai.sleep()
+    return agent
+
+
+def is_awake(engine: Engine, agent: Actor) -> bool:
+    dormancy = engine.game_map.dormancy
+    return agent in dormancy.awake and agent.pos not in dormancy.dormant
+
+
+def test_sleepers_are_indexed_and_unscheduled(engine: Engine):
+    agent = sleeper(engine, (3, 3))
+    dormancy = engine.game_map.dormancy
+
+    assert dormancy.dormant[(3, 3)] is agent
+    assert agent not in dormancy.scheduler
+    assert not is_awake(engine, agent)
+
+
+def test_wake_visible_wakes_only_the_sleepers_in_sight(engine: Engine):
+    seen, unseen, outside = (
+        sleeper(engine, (5, 5)),
+        sleeper(engine, (6, 5)),
+        sleeper(engine, (20, 20)),
+    )
+    visible = np.zeros((3, 3), dtype=bool)
+    visible[1, 1] = True  # (5, 5)
+
+    engine.game_map.dormancy.wake_visible(visible, (slice(4, 7), slice(4, 7)))
+
+    assert is_awake(engine, seen)
+    assert not is_awake(engine, unseen)
+    assert not is_awake(engine, outside)
+
+
+def test_wake_visible_with_more_sleepers_than_visible_tiles(engine: Engine):
+    agents = [sleeper(engine, (x, 2)) for x in range(2, 6)]
+    visible = np.ones((1, 1), dtype=bool)
+
+    engine.game_map.dormancy.wake_visible(visible, (slice(3, 4), slice(2, 3)))
+
+    assert [is_awake(engine, agent) for agent in agents] == [False, True, False, False]
+
+
+def test_getting_hurt_wakes_a_sleeper(engine: Engine):
+    agent = sleeper(engine, (5, 5))
+
+    agent.health.hp -= 1
+
+    assert is_awake(engine, agent)
+
+
+def test_healing_does_not_wake_a_sleeper(engine: Engine):
+    agent = sleeper(engine, (5, 5))
+    agent.health.hp -= 1
+    assert agent.ai is not None
+    agent.ai.sleep()
+
+    agent.health.hp += 1
+
+    assert not is_awake(engine, agent)
+
+
+def test_noise_wakes_the_sleepers_within_its_radius(engine: Engine):
+    near, far = sleeper(engine, (10, 10)), sleeper(engine, (14, 10))
+
+    engine.event_bus.publish(NoiseEvent(type="noise", pos=(11, 10), radius=2))
+
+    assert is_awake(engine, near)
+    assert not is_awake(engine, far)
@@ -0,0 +1,215 @@
+import pytest
+
+from py_roguelike_tutorial import tile_types
+from py_roguelike_tutorial.engine import Engine
+from py_roguelike_tutorial.entity_factory import EntityPrefabs
+from py_roguelike_tutorial.exploration import FrontierMap, TravelMaps, downhill_step
+from py_roguelike_tutorial.game_map import GameMap
+from py_roguelike_tutorial.handlers.explore_handler import ExploreHandler
+from py_roguelike_tutorial.handlers.main_game_event_handler import MainGameEventHandler
+from py_roguelike_tutorial.handlers.travel_handler import TravelHandler
+from py_roguelike_tutorial.stepping import enemy_in_view
+
+ROW = 5
+LENGTH = 60
+"""A walled corridor along ROW, from x=1 to x=LENGTH."""
+
+
+def corridor(engine: Engine) -> GameMap:
+    game_map = GameMap(engine=engine, width=LENGTH + 2, height=2 * ROW, entities=())
+    game_map.tiles[1 : LENGTH + 1, ROW] = tile_types.floor
+    return game_map
+
+
+def explore(game_map: GameMap, x0: int, x1: int) -> None:
+    """Marks the corridor from x0 to x1 (inclusive) as explored."""
+    game_map.explored[x0 : x1 + 1, ROW] = True
+    game_map.explored_version += 1
+
+
+@pytest.fixture
+def floor(engine: Engine) -> GameMap:
+    """The player at the west end of an otherwise empty corridor."""
+    game_map = corridor(engine)
+    engine.game_map = game_map
+    engine.player.place(1, ROW, game_map)
+    return game_map
+
+
+def start(engine: Engine) -> None:
+    engine.game_map.finalize_floor()
+    engine.update_fov()
+
+
+def play(handler: ExploreHandler | TravelHandler) -> None:
+    engine = handler.engine
+    origin = handler.origin
+    engine.stack.push(origin)
+    engine.stack.push(handler)
+    while not handler.finished:
+        handler._advance()
+
+
+def test_frontier_leads_to_the_closest_unexplored_tile(engine: Engine):
+    game_map = corridor(engine)
+    explore(game_map, 10, 40)
+    frontier = FrontierMap()
+
+    assert frontier.next_step(game_map, (12, ROW)) == (-1, 0)
+    assert frontier.next_step(game_map, (38, ROW)) == (1, 0)
+    assert frontier.distance(game_map)[12, ROW] == 3
+
+
+def test_frontier_ignores_walls_and_ends_once_explored(engine: Engine):
+    game_map = corridor(engine)
+    # unexplored walls are no frontier
+    explore(game_map, 1, LENGTH)
+    assert FrontierMap().next_step(game_map, (12, ROW)) is None
+
+
+def test_frontier_is_recomputed_once_tiles_get_explored(engine: Engine):
+    game_map = corridor(engine)
+    explore(game_map, 10, 40)
+    frontier = FrontierMap()
+    distance = frontier.distance(game_map)
+    assert frontier.distance(game_map) is distance
+
+    game_map.explored[1 : LENGTH + 1, ROW] = True
+    # without the version bump, the cached map is kept
+    assert frontier.distance(game_map) is distance
+    game_map.explored_version += 1
+    assert frontier.distance(game_map) is not distance
+    assert frontier.next_step(game_map, (12, ROW)) is None
+
+
+def test_frontier_is_recomputed_for_another_floor(engine: Engine):
+    first, second = corridor(engine), corridor(engine)
+    explore(first, 10, 40)
+    explore(second, 1, 40)
+    frontier = FrontierMap()
+
+    assert frontier.next_step(first, (12, ROW)) == (-1, 0)
+    assert frontier.next_step(second, (12, ROW)) == (1, 0)
+
+
+def test_travel_walks_over_explored_tiles_only(engine: Engine):
+    game_map = corridor(engine)
+    explore(game_map, 10, 20)
+    travel = TravelMaps()
+
+    assert travel.path(game_map, (10, ROW), (13, ROW)) == [
+        (11, ROW),
+        (12, ROW),
+        (13, ROW),
+    ]
+    assert travel.next_step(game_map, (13, ROW), (10, ROW)) == (-1, 0)
+    assert travel.next_step(game_map, (13, ROW), (13, ROW)) is None
+    assert travel.path(game_map, (10, ROW), (30, ROW)) == []
+
+
+def test_travel_maps_are_cached_per_target_until_tiles_get_explored(engine: Engine):
+    game_map = corridor(engine)
+    explore(game_map, 10, 20)
+    travel = TravelMaps()
+    to_start = travel.distance(game_map, (10, ROW))
+    to_end = travel.distance(game_map, (20, ROW))
+
+    assert travel.distance(game_map, (10, ROW)) is to_start
+    assert travel.distance(game_map, (20, ROW)) is to_end
+
+    explore(game_map, 21, 30)
+    assert travel.distance(game_map, (10, ROW)) is not to_start
+    assert travel.path(game_map, (10, ROW), (30, ROW))
+
+
+def test_travel_maps_drop_the_oldest_beyond_the_limit(engine: Engine):
+    game_map = corridor(engine)
+    explore(game_map, 1, LENGTH)
+    travel = TravelMaps()
+    travel.max_cached = 2
+    oldest = travel.distance(game_map, (1, ROW))
+    kept = travel.distance(game_map, (2, ROW))
+    travel.distance(game_map, (3, ROW))
+
+    assert travel.distance(game_map, (2, ROW)) is kept
+    assert travel.distance(game_map, (1, ROW)) is not oldest
+
+
+def test_downhill_step_stops_at_a_minimum(engine: Engine):
+    game_map = corridor(engine)
+    explore(game_map, 1, LENGTH)
+    distance = TravelMaps().distance(game_map, (5, ROW))
+    assert downhill_step(distance, (5, ROW)) is None
+    assert downhill_step(distance, (0, 0)) is None
+
+
+def test_explore_walks_until_everything_is_explored(engine: Engine, floor: GameMap):
+    start(engine)
+    handler = ExploreHandler(engine, MainGameEventHandler(engine))
+    play(handler)
+
+    assert floor.explored[1 : LENGTH + 1, ROW].all()
+    assert engine.message_log.messages[-1].plain_text == (
+        "There is nothing left to explore."
+    )
+
+
+def test_explore_stops_when_an_enemy_comes_into_view(engine: Engine, floor: GameMap):
+    orc = EntityPrefabs.npcs["orc"].spawn(floor, 30, ROW)
+    start(engine)
+    assert not enemy_in_view(engine)
+    handler = ExploreHandler(engine, MainGameEventHandler(engine))
+    play(handler)
+
+    assert enemy_in_view(engine)
+    assert floor.visible[orc.pos]
+    assert 1 < engine.player.x < orc.x
+    assert not floor.explored[orc.x + 10, ROW]
+
+
+def test_explore_stops_when_an_item_comes_into_view(engine: Engine, floor: GameMap):
+    dagger = EntityPrefabs.items["dagger"].spawn(floor, 30, ROW)
+    start(engine)
+    handler = ExploreHandler(engine, MainGameEventHandler(engine))
+    play(handler)
+
+    assert floor.visible[dagger.x, dagger.y]
+    assert engine.player.x < dagger.x
+
+
+def test_travel_stops_when_an_enemy_comes_into_view(engine: Engine, floor: GameMap):
+    explore(floor, 1, LENGTH)
+    orc = EntityPrefabs.npcs["orc"].spawn(floor, 30, ROW)
+    start(engine)
+    handler = TravelHandler.start(engine, MainGameEventHandler(engine), (LENGTH, ROW))
+    assert handler is not None
+    play(handler)
+
+    assert enemy_in_view(engine)
+    assert 1 < engine.player.x < orc.x
+
+
+def test_travel_arrives_without_threats(engine: Engine, floor: GameMap):
+    explore(floor, 1, LENGTH)
+    start(engine)
+    handler = TravelHandler.start(engine, MainGameEventHandler(engine), (LENGTH, ROW))
+    assert handler is not None
+    play(handler)
+
+    assert engine.player.pos == (LENGTH, ROW)
+
+
+def test_travel_is_not_started_toward_unknown_places_or_with_enemies_in_view(
+    engine: Engine, floor: GameMap
+):
+    explore(floor, 1, 20)
+    EntityPrefabs.npcs["orc"].spawn(floor, 5, ROW)
+    start(engine)
+    origin = MainGameEventHandler(engine)
+
+    assert TravelHandler.start(engine, origin, (30, ROW)) is None
+    assert engine.message_log.messages[-1].plain_text == (
+        "You do not know that place yet."
+    )
+    assert TravelHandler.start(engine, origin, (20, ROW)) is None
+    assert engine.message_log.messages[-1].plain_text == "Not with enemies in view."
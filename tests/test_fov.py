@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from tcod.map import compute_fov
+
+from py_roguelike_tutorial.fov import compute_local_fov, compute_local_fov_batch
+
+
+def _open_room(width: int = 30, height: int = 20) -> np.ndarray:
+    transparency = np.ones((width, height), dtype=bool, order="F")
+    transparency[10, 5:15] = False  # a wall to look around
+    return transparency
+
+
+def test_local_fov_matches_full_map_fov():
+    transparency = _open_room()
+    for pov in [(3, 3), (12, 10), (29, 19), (0, 10)]:
+        expected = compute_fov(transparency, pov, radius=8)
+        fov = compute_local_fov(transparency, pov, radius=8)
+        actual = np.zeros_like(expected)
+        actual[fov.window] = fov.visible
+        assert (actual == expected).all(), pov
+
+
+def test_local_fov_from_beyond_the_map_sees_nothing():
+    transparency = _open_room()
+    fov = compute_local_fov(transparency, (15, 21), radius=8)
+    assert fov.visible.size == 0
+    assert not fov.is_visible(15, 19)
+
+
+def test_batched_fov_matches_single_fovs():
+    transparency = _open_room()
+    origins = [(3, 3), (12, 10), (29, 19), (0, 10)]
+    with ThreadPoolExecutor(2) as executor:
+        for workers in (1, 2):
+            batch = compute_local_fov_batch(
+                transparency, origins, 8, executor=executor, workers=workers
+            )
+            for i, pov in enumerate(origins):
+                expected = compute_local_fov(transparency, pov, radius=8)
+                for x, y in np.argwhere(transparency):
+                    assert batch.local_fov(i).is_visible(x, y) == expected.is_visible(
+                        x, y
+                    ), (pov, workers)
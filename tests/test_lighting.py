@@ -0,0 +1,56 @@
+from py_roguelike_tutorial.actions import DropItemAction, PickupAction
+from py_roguelike_tutorial.engine import Engine
+from py_roguelike_tutorial.entity import Item
+from py_roguelike_tutorial.entity_factory import EntityPrefabs
+from py_roguelike_tutorial.procgen.gen_helpers import get_prefabs_at_random
+from py_roguelike_tutorial.procgen.procgen_config import ProcgenConfig
+from py_roguelike_tutorial.types import Coord
+
+
+def _light_position(engine: Engine, torch: Item) -> Coord | None:
+    assert torch.light is not None
+    lights = dict(engine.game_map.light_sources)
+    return lights.get(torch.light)
+
+
+def test_light_sources_follow_a_torch_picked_up_and_dropped(engine: Engine):
+    game_map, player = engine.game_map, engine.player
+    x, y = player.pos
+    torch = EntityPrefabs.items["torch"].spawn(game_map, x, y)
+    assert _light_position(engine, torch) == (x, y)
+
+    PickupAction(player).execute()
+    assert torch not in game_map.entities
+    player.move(1, 0)
+    assert _light_position(engine, torch) == (x + 1, y)
+
+    DropItemAction(player, torch).execute()
+    player.move(-1, 0)
+    assert _light_position(engine, torch) == (x + 1, y)
+    assert player not in game_map._light_holders
+
+
+def test_light_map_is_kept_until_the_light_moves(engine: Engine):
+    game_map = engine.game_map
+    x, y = engine.player.pos
+    torch = EntityPrefabs.items["torch"].spawn(game_map, x, y)
+    transparency = game_map.tiles["transparent"]
+    game_map.lighting.update(game_map.light_sources, transparency)
+    assert torch.light is not None
+    cached = game_map.lighting._cache[torch.light]
+
+    game_map.lighting.update(game_map.light_sources, transparency)
+    assert game_map.lighting._cache[torch.light] is cached
+
+    torch.place(x + 1, y)
+    game_map.lighting.update(game_map.light_sources, transparency)
+    assert game_map.lighting._cache[torch.light] is not cached
+
+
+def test_torches_drop_from_the_third_floor_on(engine: Engine):
+    torch = EntityPrefabs.items["torch"]
+    # many draws, so a torch shows up once it is in the table at all
+    drops = get_prefabs_at_random(ProcgenConfig.item_chances, 1000, current_floor=2)
+    assert torch not in drops
+    drops = get_prefabs_at_random(ProcgenConfig.item_chances, 1000, current_floor=3)
+    assert torch in drops
@@ -0,0 +1,173 @@
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+import numpy as np
+
+from py_roguelike_tutorial import tile_types
+from py_roguelike_tutorial.actions import MoveAction, PickupAction, WaitAction
+from py_roguelike_tutorial.behavior_trees import validators as bt_val
+from py_roguelike_tutorial.behavior_trees.behavior_trees import (
+    BtConstructorArgs,
+    BtContext,
+    BtRoot,
+)
+from py_roguelike_tutorial.behavior_trees.behaviors import PickUpItemBehavior
+from py_roguelike_tutorial.components.ai import (
+    BehaviorTreeAI,
+    ConfusedEnemy,
+    HostileEnemy,
+)
+from py_roguelike_tutorial.engine import Engine
+from py_roguelike_tutorial.entity import Actor
+from py_roguelike_tutorial.entity_factory import EntityPrefabs
+from py_roguelike_tutorial.game_map import GameMap
+from py_roguelike_tutorial.npc_planning import fallback_plan, plan_turns
+from py_roguelike_tutorial.types import Coord
+
+
+class RefusingExecutor(Executor):
+    def submit(self, fn, /, *args, **kwargs):
+        raise AssertionError("planning should not have used the thread pool")
+
+
+def free_position(engine: Engine) -> Coord:
+    game_map = engine.game_map
+    for x, y in np.argwhere(game_map.tiles["walkable"]):
+        if (
+            not game_map.is_blocked(int(x), int(y))
+            and game_map.get_item_at_location(int(x), int(y)) is None
+        ):
+            return int(x), int(y)
+    raise AssertionError("No free position on the map.")
+
+
+def spawn_picker(engine: Engine) -> Actor:
+    """An orc archer whose tree only picks up the item it stands on, remembering its id."""
+    agent = EntityPrefabs.npcs["orc_archer"].spawn(
+        engine.game_map, *free_position(engine)
+    )
+    ai = agent.ai
+    assert isinstance(ai, BehaviorTreeAI)
+    params = bt_val.PickUpItemDataParams(key="picked")
+    ai.tree = BtRoot(
+        BtConstructorArgs([PickUpItemBehavior(BtConstructorArgs([], params))], None)
+    )
+    ai.ctx = BtContext()
+    ai.visual_sense.blackboard = ai.ctx.blackboard
+    ai.ctx.bind(agent=agent, player=engine.player, engine=engine)
+    return agent
+
+
+def test_planning_is_serial_unless_workers_are_asked_for(engine: Engine):
+    agents = [spawn_picker(engine) for _ in range(3)]
+    for agent in agents:
+        EntityPrefabs.items["dagger"].spawn(engine.game_map, *agent.pos)
+
+    serial = plan_turns(agents, executor=RefusingExecutor())
+    with ThreadPoolExecutor(2) as executor:
+        parallel = plan_turns(agents, executor=executor, workers=2)
+
+    assert [type(action) for plan in serial.plans for action in plan or []] == [
+        PickupAction
+    ] * 3
+    assert [len(plan or []) for plan in parallel.plans] == [1, 1, 1]
+
+
+def test_refused_plan_undoes_the_blackboard_writes_that_relied_on_it(
+    engine: Engine,
+):
+    agent = spawn_picker(engine)
+    ai = agent.ai
+    assert isinstance(ai, BehaviorTreeAI)
+    dagger = EntityPrefabs.items["dagger"].spawn(engine.game_map, *agent.pos)
+
+    plan = ai.plan()
+    assert ai.ctx.blackboard.get("picked") == dagger.id
+    # someone else got there first
+    engine.game_map.remove_entity(dagger)
+    ai.commit(plan)
+
+    assert not ai.ctx.blackboard.has("picked")
+
+
+def test_committed_plan_keeps_the_blackboard_writes(engine: Engine):
+    agent = spawn_picker(engine)
+    ai = agent.ai
+    assert isinstance(ai, BehaviorTreeAI)
+    dagger = EntityPrefabs.items["dagger"].spawn(engine.game_map, *agent.pos)
+
+    ai.commit(ai.plan())
+
+    assert ai.ctx.blackboard.get("picked") == dagger.id
+    assert dagger in agent.inventory.items
+
+
+def open_floor(engine: Engine) -> GameMap:
+    """An empty room, with the player at its west end."""
+    game_map = GameMap(engine=engine, width=20, height=20, entities=())
+    game_map.tiles[1:19, 1:19] = tile_types.floor
+    engine.game_map = game_map
+    engine.player.place(2, 10, game_map)
+    return game_map
+
+
+def spawn_orcs(engine: Engine) -> tuple[Actor, Actor, Actor]:
+    """An orc chasing the player, an idle one and a confused one."""
+    game_map = engine.game_map
+    orc = EntityPrefabs.npcs["orc"]
+    chasing, idle, confused = (orc.spawn(game_map, 10, y) for y in (8, 10, 12))
+    assert isinstance(chasing.ai, HostileEnemy)
+    chasing.ai.alarmed = True
+    confused.ai = ConfusedEnemy(previous_ai=confused.ai, turns_remaining=3)
+    return chasing, idle, confused
+
+
+def test_expired_deadline_degrades_agents_that_follow_the_player(engine: Engine):
+    open_floor(engine)
+    agents = spawn_orcs(engine)
+
+    plans, degraded = plan_turns(agents, deadline=time.perf_counter() - 1)
+
+    chasing_plan, idle_plan, confused_plan = plans
+    assert degraded == 2
+    assert chasing_plan is not None and len(chasing_plan) == 1
+    step = chasing_plan[0]
+    assert isinstance(step, MoveAction) and (step.dx, step.dy) == (-1, 0)
+    assert idle_plan is not None and isinstance(idle_plan[0], WaitAction)
+    # confused agents stumble around as usual during the commit
+    assert confused_plan is None
+
+
+def test_agents_plan_as_usual_within_the_budget(engine: Engine):
+    open_floor(engine)
+    agents = spawn_orcs(engine)
+
+    plans, degraded = plan_turns(agents, deadline=time.perf_counter() + 60)
+
+    assert degraded == 0
+    assert plans[2] is None
+
+
+def test_fallback_plans_wait_without_a_flow_field_step(engine: Engine):
+    open_floor(engine)
+    chasing, idle, confused = spawn_orcs(engine)
+
+    for agent in (idle, confused):
+        assert [type(action) for action in fallback_plan(agent)] == [WaitAction]
+    assert [type(action) for action in fallback_plan(chasing)] == [MoveAction]
+
+
+def test_turn_stats_count_the_degraded_agents(engine: Engine):
+    open_floor(engine)
+    chasing, idle, confused = spawn_orcs(engine)
+    assert isinstance(confused.ai, ConfusedEnemy)
+    engine.ai_budget_in_sec = -1.0
+
+    engine.handle_npc_turns()
+
+    stats = engine.npc_turn_stats
+    assert (stats.due, stats.agents, stats.degraded) == (3, 3, 2)
+    assert stats.over_budget
+    assert chasing.pos == (9, 8)
+    assert idle.pos == (10, 10)
+    assert confused.ai.turns_remaining == 2
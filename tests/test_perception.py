@@ -0,0 +1,54 @@
+import pytest
+
+from py_roguelike_tutorial.components.ai import BehaviorTreeAI
+from py_roguelike_tutorial.engine import Engine
+from py_roguelike_tutorial.entity import Actor
+from py_roguelike_tutorial.entity_factory import EntityPrefabs
+
+
+def spawn_archer(engine: Engine, dx: int, interests: set[str]) -> Actor:
+    """An orc archer (vision range 10) `dx` tiles beside the player, interested in `interests`."""
+    x, y = engine.player.pos
+    if x + dx >= engine.game_map.width:
+        dx = -dx
+    agent = EntityPrefabs.npcs["orc_archer"].spawn(engine.game_map, x + dx, y)
+    assert isinstance(agent.ai, BehaviorTreeAI)
+    agent.ai.visual_sense.interests = interests
+    return agent
+
+
+def test_agents_within_the_players_fov_need_no_fov_of_their_own(engine: Engine):
+    engine.update_fov()
+    agent = spawn_archer(engine, 2, set())
+
+    engine.perception.refresh([agent])
+
+    assert engine.perception.sees_player(agent)
+    assert engine.perception._fov_by_origin == {}
+
+
+def test_prefetch_is_limited_to_agents_beyond_the_shortcut(engine: Engine):
+    engine.update_fov()
+    near = spawn_archer(engine, 2, set())
+    far = spawn_archer(engine, 9, set())
+    curious = spawn_archer(engine, 3, {"kind:dagger"})
+    EntityPrefabs.items["dagger"].spawn(engine.game_map, *curious.pos)
+
+    origins = set(engine.perception._fov_origins([near, far, curious]))
+
+    assert origins == {(far.pos, 10), (curious.pos, 10)}
+
+
+def test_prefetch_is_opt_in(engine: Engine, monkeypatch: pytest.MonkeyPatch):
+    engine.update_fov()
+    far = spawn_archer(engine, 9, set())
+    prefetched: list[set] = []
+    monkeypatch.setattr(
+        engine.perception, "prefetch", lambda origins: prefetched.append(set(origins))
+    )
+
+    engine.perception.refresh([far])
+    engine.perception.fov_workers = 2
+    engine.perception.refresh([far])
+
+    assert prefetched == [{(far.pos, 10)}]
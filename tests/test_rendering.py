@@ -0,0 +1,56 @@
+import pytest
+from tcod.console import Console
+
+from py_roguelike_tutorial.engine import TICK_INTERVAL_IN_SEC, Engine
+from py_roguelike_tutorial.entity_factory import EntityPrefabs
+from py_roguelike_tutorial.handlers.main_game_event_handler import MainGameEventHandler
+from py_roguelike_tutorial.main import SCREEN_HEIGHT, SCREEN_WIDTH, Frames, _new_context
+from py_roguelike_tutorial.render_snapshot import RenderSnapshot
+
+HOVERED_NAMES = (slice(21, None), 44)
+
+
+def new_console() -> Console:
+    return Console(SCREEN_WIDTH, SCREEN_HEIGHT, order="F")
+
+
+def test_frames_are_skipped_without_events_or_a_new_tick(engine: Engine, monkeypatch):
+    engine.stack.push(MainGameEventHandler(engine))
+    with _new_context() as context:
+        presented = []
+        monkeypatch.setattr(context, "present", presented.append)
+        frames = Frames(context, engine.stack)
+
+        frames.render()
+        assert len(presented) == 1
+        frames.render()
+        assert len(presented) == 1
+
+        # the next frame shows the next tick
+        engine.time_in_sec = TICK_INTERVAL_IN_SEC - 1e-9
+        frames.render()
+        assert len(presented) == 2
+
+
+@pytest.mark.parametrize("tick", [0, 1], ids=["first_of_stack", "second_of_stack"])
+def test_snapshots_render_like_the_engine(engine: Engine, tick: int):
+    game_map, player = engine.game_map, engine.player
+    # two items sharing a tile, so which one shows depends on the tick
+    x, y = player.pos
+    EntityPrefabs.items["dagger"].spawn(game_map, x + 1, y)
+    EntityPrefabs.items["health_potion"].spawn(game_map, x + 1, y)
+    engine.update_fov()
+    assert game_map.visible[x + 1, y]
+    engine.message_log.add("A message for the log.")
+    player.health.hp -= 3
+    engine.time_in_sec = tick * TICK_INTERVAL_IN_SEC
+
+    expected = new_console()
+    engine.render(expected, delta_time=0)
+    snapshot = RenderSnapshot.capture(engine)
+    actual = new_console()
+    snapshot.render(actual, engine.tick)
+
+    # snapshots leave out the names hovered by the mouse, see render_names_at()
+    actual.rgb[HOVERED_NAMES] = expected.rgb[HOVERED_NAMES]
+    assert (actual.rgb == expected.rgb).all()
@@ -0,0 +1,121 @@
+import asyncio
+import lzma
+import pickle
+
+import pytest
+import tcod.event
+
+from py_roguelike_tutorial.engine import Engine, read_save_file
+from py_roguelike_tutorial.exceptions import IncompatibleSave
+from py_roguelike_tutorial.handlers.explore_handler import ExploreHandler
+from py_roguelike_tutorial.handlers.main_game_event_handler import MainGameEventHandler
+from py_roguelike_tutorial.handlers.npc_turn_handler import NpcTurnHandler
+from py_roguelike_tutorial.handlers.run_handler import RunHandler
+from py_roguelike_tutorial.handlers.travel_handler import TravelHandler
+from py_roguelike_tutorial import main
+from py_roguelike_tutorial.main import Frames, _new_context, _save_on_exit
+
+
+@pytest.mark.parametrize(
+    "make_handler",
+    [
+        lambda engine, origin: RunHandler(engine, origin, 1, 0),
+        lambda engine, origin: ExploreHandler(engine, origin),
+        lambda engine, origin: TravelHandler(engine, origin, engine.player.pos),
+    ],
+    ids=["run", "explore", "travel"],
+)
+def test_engine_pickles_with_batched_turns_handler_on_stack(
+    engine: Engine, make_handler
+):
+    origin = MainGameEventHandler(engine)
+    engine.stack.push(origin)
+    engine.stack.push(make_handler(engine, origin))
+
+    loaded = pickle.loads(engine.pickled())
+
+    assert loaded.player.pos == engine.player.pos
+    assert loaded.stack.size() == engine.stack.size()
+
+
+def test_save_files_load_back(engine: Engine, tmp_path):
+    filename = str(tmp_path / "save.sav")
+    engine.save_to_file(filename)
+
+    loaded = read_save_file(filename)
+
+    assert loaded.player.pos == engine.player.pos
+    assert loaded.game_world.current_floor == engine.game_world.current_floor
+
+
+@pytest.mark.parametrize(
+    "header, reason",
+    [(b"", "older version"), (b"tstt-save 0\n", "format version 0")],
+    ids=["before_versioning", "other_version"],
+)
+def test_saves_of_other_formats_are_refused(
+    engine: Engine, tmp_path, header: bytes, reason: str
+):
+    filename = tmp_path / "save.sav"
+    filename.write_bytes(lzma.compress(header + engine.pickled()))
+
+    with pytest.raises(IncompatibleSave, match=reason):
+        read_save_file(str(filename))
+
+
+def test_engine_pickles_with_npc_turn_handler_on_stack(engine: Engine):
+    origin = MainGameEventHandler(engine)
+    engine.stack.push(origin)
+    handler = NpcTurnHandler(engine, origin)
+    engine.stack.push(handler)
+    handler.finish_turn()
+
+    loaded = pickle.loads(engine.pickled())
+
+    assert loaded.stack.size() == engine.stack.size()
+    loaded_handler = loaded.stack.peek()
+    assert isinstance(loaded_handler, NpcTurnHandler)
+    assert loaded_handler.finished
+
+
+def test_saving_on_exit_waits_for_the_npc_turn(engine: Engine, tmp_path, monkeypatch):
+    filename = str(tmp_path / "autosave.sav")
+    monkeypatch.setattr(main, "AUTOSAVE_FILENAME", filename)
+    origin = MainGameEventHandler(engine)
+    engine.stack.push(origin)
+    handler = NpcTurnHandler(engine, origin)
+    engine.stack.push(handler)
+
+    with _new_context() as context, pytest.raises(KeyboardInterrupt):
+        with _save_on_exit(Frames(context, engine.stack)):
+            raise KeyboardInterrupt
+
+    assert handler.finished
+    loaded = read_save_file(filename)
+    assert isinstance(loaded.stack.peek(), NpcTurnHandler)
+
+
+def test_autosave_keeps_going_after_a_failed_attempt(
+    engine: Engine, tmp_path, monkeypatch, capsys
+):
+    filename = tmp_path / "autosave.sav"
+    monkeypatch.setattr(main, "AUTOSAVE_FILENAME", str(filename))
+    engine.stack.push(MainGameEventHandler(engine))
+    monkeypatch.setattr(main, "_new_stack", lambda: engine.stack)
+    monkeypatch.setattr(tcod.event, "get", lambda: [])
+    pickled = Engine.pickled
+    attempts = []
+
+    def fail_once(self: Engine) -> bytes:
+        attempts.append(self)
+        if len(attempts) == 1:
+            raise OSError("disk full")
+        return pickled(self)
+
+    monkeypatch.setattr(Engine, "pickled", fail_once)
+
+    asyncio.run(main.main_async(max_iterations=30, autosave_interval_in_sec=0.01))
+
+    assert len(attempts) > 1
+    assert "disk full" in capsys.readouterr().err
+    assert read_save_file(str(filename)).player.pos == engine.player.pos
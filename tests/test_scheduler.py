@@ -0,0 +1,72 @@
+import pytest
+
+from py_roguelike_tutorial.engine import Engine
+from py_roguelike_tutorial.entity import Actor
+from py_roguelike_tutorial.entity_factory import EntityPrefabs
+from py_roguelike_tutorial.scheduler import ACTION_COST, NORMAL_SPEED, TurnScheduler
+
+
+@pytest.fixture
+def orc(engine: Engine):
+    """Makes orcs of the given speed. Requests the engine so the prefabs are loaded."""
+
+    def make(speed: int = NORMAL_SPEED) -> Actor:
+        actor = EntityPrefabs.npcs["orc"].duplicate()
+        actor.speed = speed
+        return actor
+
+    return make
+
+
+def play_turns(scheduler: TurnScheduler, turns: int) -> list[Actor]:
+    """Every action in the order taken, over `turns` player turns."""
+    actions = []
+    for _ in range(turns):
+        turn_end = scheduler.time + ACTION_COST
+        while due := scheduler.pop_due(turn_end):
+            actions += due
+        scheduler.time = turn_end
+    return actions
+
+
+def test_ties_act_in_the_order_they_were_scheduled(orc):
+    scheduler = TurnScheduler()
+    actors = [orc() for _ in range(5)]
+    for actor in actors:
+        scheduler.add(actor)
+
+    assert play_turns(scheduler, 2) == actors + actors
+
+
+def test_speed_multiples_act_proportionally_more_often(orc):
+    scheduler = TurnScheduler()
+    fast, normal, slow = orc(2 * NORMAL_SPEED), orc(), orc(NORMAL_SPEED // 2)
+    for actor in (slow, normal, fast):
+        scheduler.add(actor)
+
+    actions = play_turns(scheduler, 4)
+
+    assert [actions.count(actor) for actor in (fast, normal, slow)] == [8, 4, 2]
+
+
+def test_energy_in_excess_of_an_action_carries_over(orc):
+    scheduler = TurnScheduler()
+    # 100 * 100 // 150 = 66 time units between actions, so ten fit into 600
+    quick = orc(150)
+    scheduler.add(quick)
+
+    assert len(play_turns(scheduler, 6)) == 10
+
+
+def test_removed_agents_skip_their_turns_until_added_again(orc):
+    scheduler = TurnScheduler()
+    first, second = orc(), orc()
+    scheduler.add(first)
+    scheduler.add(second)
+
+    scheduler.remove(first)
+    assert first not in scheduler
+    assert play_turns(scheduler, 1) == [second]
+
+    scheduler.add(first)
+    assert play_turns(scheduler, 1) == [second, first]
@@ -0,0 +1,53 @@
+import dataclasses
+
+from py_roguelike_tutorial.exploration import FrontierMap
+from py_roguelike_tutorial.simulation import BotPlayer, Simulation, SimulationStats
+
+
+def play(steps: int, seed: int) -> Simulation:
+    simulation = Simulation.new_game(BotPlayer(seed), seed=seed)
+    simulation.run(steps)
+    return simulation
+
+
+def outcome(simulation: Simulation) -> tuple:
+    engine = simulation.engine
+    stats = dataclasses.replace(simulation.stats, seconds=0.0)
+    messages = [message.full_text for message in engine.message_log.messages]
+    return (
+        stats,
+        engine.game_world.current_floor,
+        engine.player.pos,
+        engine.player.health.hp,
+        messages,
+    )
+
+
+def test_runs_with_the_same_seed_play_out_the_same():
+    first, second = play(300, seed=3), play(300, seed=3)
+
+    assert first.stats.turns > 0
+    assert outcome(first) == outcome(second)
+
+
+def test_the_bot_explores_its_floor_before_taking_the_stairs():
+    simulation = Simulation.new_game(BotPlayer(42), seed=42)
+    engine = simulation.engine
+    first_floor = engine.game_map
+    # the player starts on the stairs
+    stairs = first_floor.downstairs_location
+    assert engine.player.pos == stairs
+
+    while simulation.step() and engine.game_map is first_floor:
+        pass
+
+    assert engine.game_map is not first_floor
+    assert simulation.stats.turns > 1
+    assert FrontierMap().next_step(first_floor, stairs) is None
+
+
+def test_stats_add_up():
+    first = SimulationStats(turns=3, refused=1, npc_actions=5, degraded=0, seconds=1.0)
+    second = SimulationStats(turns=2, refused=0, npc_actions=1, degraded=1, seconds=0.5)
+
+    assert first + second == SimulationStats(5, 1, 6, 1, 1.5)
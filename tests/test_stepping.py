@@ -0,0 +1,113 @@
+from py_roguelike_tutorial import tile_types
+from py_roguelike_tutorial.actions import MoveAction, WaitAction
+from py_roguelike_tutorial.components.ai import HostileEnemy
+from py_roguelike_tutorial.engine import Engine
+from py_roguelike_tutorial.entity import Actor
+from py_roguelike_tutorial.entity_factory import EntityPrefabs
+from py_roguelike_tutorial.game_map import GameMap
+from py_roguelike_tutorial.simulation import ScriptedPlayer
+from py_roguelike_tutorial.stepping import HpDropped, StopReason, enemy_in_view
+
+ROW = 5
+
+
+def corridor(engine: Engine, length: int = 40) -> GameMap:
+    """An empty corridor along ROW, with the player at its west end."""
+    game_map = GameMap(engine=engine, width=length + 2, height=2 * ROW, entities=())
+    game_map.tiles[1 : length + 1, ROW] = tile_types.floor
+    engine.game_map = game_map
+    engine.player.place(1, ROW, game_map)
+    return game_map
+
+
+def spawn_orc(engine: Engine, x: int, *, alarmed: bool = False) -> Actor:
+    orc = EntityPrefabs.npcs["orc"].spawn(engine.game_map, x, ROW)
+    assert isinstance(orc.ai, HostileEnemy)
+    orc.ai.alarmed = alarmed
+    return orc
+
+
+def start(engine: Engine) -> None:
+    engine.game_map.finalize_floor()
+    engine.update_fov()
+
+
+def walk_east(engine: Engine) -> MoveAction:
+    return MoveAction(engine.player, 1, 0)
+
+
+def test_step_completes_all_turns(engine: Engine):
+    corridor(engine)
+    start(engine)
+
+    result = engine.step(3)
+
+    assert (result.turns, result.reason, result.condition) == (
+        3,
+        StopReason.Completed,
+        None,
+    )
+
+
+def test_step_stops_on_a_refused_action_without_counting_it(engine: Engine):
+    corridor(engine)
+    start(engine)
+    into_the_wall = ScriptedPlayer(
+        [WaitAction, WaitAction, lambda player: MoveAction(player, 0, 1)]
+    )
+
+    result = engine.step(5, policy=into_the_wall)
+
+    assert (result.turns, result.reason) == (2, StopReason.Refused)
+    assert engine.player.pos == (1, ROW)
+    assert engine.message_log.messages[-1].plain_text == "The way is blocked."
+
+
+def test_step_stops_when_the_player_dies(engine: Engine):
+    corridor(engine)
+    spawn_orc(engine, 2, alarmed=True)
+    start(engine)
+    engine.player.health.hp = 1
+
+    result = engine.step(5)
+
+    assert (result.turns, result.reason) == (1, StopReason.PlayerDied)
+    assert not engine.player.is_alive
+
+
+def test_step_stops_once_the_player_got_hurt(engine: Engine):
+    corridor(engine)
+    spawn_orc(engine, 2, alarmed=True)
+    start(engine)
+    hurt = HpDropped(engine)
+
+    result = engine.step(5, stop=[hurt])
+
+    assert (result.turns, result.reason) == (1, StopReason.Condition)
+    assert result.condition is hurt
+    assert engine.player.is_alive
+
+
+def test_step_stops_once_an_enemy_comes_into_view(engine: Engine):
+    corridor(engine)
+    orc = spawn_orc(engine, 30)
+    start(engine)
+    assert not enemy_in_view(engine)
+
+    result = engine.step(30, policy=walk_east, stop=[enemy_in_view])
+
+    assert result.reason is StopReason.Condition
+    assert result.condition is enemy_in_view
+    assert result.turns == engine.player.x - 1
+    assert engine.game_map.visible[orc.pos]
+    assert engine.player.x < orc.x
+
+
+def test_step_ignores_friendly_actors_in_view(engine: Engine):
+    corridor(engine)
+    EntityPrefabs.npcs["shopkeeper"].spawn(engine.game_map, 4, ROW)
+    start(engine)
+
+    result = engine.step(2, stop=[enemy_in_view])
+
+    assert result.reason is StopReason.Completed